@@ -0,0 +1,420 @@
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+warnings.filterwarnings('ignore', category=UserWarning)
+warnings.filterwarnings('ignore', category=FutureWarning)
+
+# --- Training Harness ---
+# One bake-off for every food. The food's design matrix is built once. Every
+# (candidate, CV fold) fit then runs as its own task on a process pool, and
+# the pool workers share the matrix through a read-only memory map. Each task
+# fits one clone, single-threaded so the tasks don't oversubscribe the cores,
+# and records its accuracy on the held-out fold and its fit time.
+# The winner is the deployable candidate with the best mean CV accuracy. It is
+# refit on all rows and saved under the same file names the server loads.
+# Only tree ensembles are deployable, because the prediction cache, the tree
+# compiler and the lookup tables all read the fitted trees. Logistic
+# regression and gradient boosting still run as baselines.
+# Data sources, as in the old per-food scripts and notebooks:
+#   rice, paneer: the raw datasets; milk: milk_spoilage_preprocessed.csv;
+#   dal, roti: the seeded synthetic data of DalSpoilage_V3.ipynb / RotiSpoilage_V3.ipynb
+#   (the bundled dal and roti CSVs use different category names from the served models).
+# The CSVs are read through dataset_cache.py, which keeps a typed columnar copy of each.
+#
+#   python ML/training.py [rice milk paneer dal roti] [--cv 5] [--n-jobs -1]   # report only
+#   python ML/training.py rice --save    # also write the winner's artifacts into ML/rice
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+SEED = 42
+
+sys.path.insert(0, os.path.dirname(ML_DIR))
+from dataset_cache import read_dataset, save_frame
+
+
+def ml_path(food, filename):
+    return os.path.join(ML_DIR, food, filename)
+
+
+def n_jobs_params(estimator):
+    """The estimator's n_jobs-like parameters (nested ones too, for pipelines)."""
+    return {key: value for key, value in estimator.get_params().items() if key == 'n_jobs' or key.endswith('__n_jobs')}
+
+
+def _fit_fold(name, estimator, X, y, train, test):
+    from sklearn.base import clone
+    model = clone(estimator)
+    model.set_params(**{key: 1 for key in n_jobs_params(model)})
+    start = time.perf_counter()
+    model.fit(X[train], y[train])
+    fit_seconds = time.perf_counter() - start
+    return name, float(model.score(X[test], y[test])), fit_seconds
+
+
+# --- RICE ---
+def rice_design():
+    df = read_dataset(ml_path('rice', 'rice_spoilage_dataset.csv'))
+    smell_map = {'Normal': 0, 'Stale/Slightly Off': 1, 'Sour/Fermented': 2, 'Foul/Musty': 3}
+    appearance_map = {'Normal/Glossy': 0, 'Dull/Dry': 1, 'Slimy/Discolored': 2, 'Visible Mold': 3}
+    df['smell_encoded'] = df['observed_smell'].map(smell_map)
+    df['appearance_encoded'] = df['observed_appearance'].map(appearance_map)
+    df = pd.get_dummies(df, columns=['storage_location', 'cooling_method'])
+    dummy_cols = [col for col in df.columns if 'storage_location_' in col or 'cooling_method_' in col]
+    feature_columns = ['hours_since_cooking', 'initial_hours_at_room_temp', 'smell_encoded', 'appearance_encoded'] + dummy_cols
+    return {'X': df[feature_columns].astype(np.float64), 'y': df['Spoilage_Index']}
+
+
+def rice_candidates():
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    return {
+        'Random Forest': RandomForestClassifier(random_state=SEED),
+        'Logistic Regression': make_pipeline(StandardScaler(), LogisticRegression(random_state=SEED, max_iter=1000)),
+    }
+
+
+def save_rice(design, name, model):
+    import joblib
+    from sklearn.preprocessing import StandardScaler
+    joblib.dump(model, ml_path('rice', 'rice_model.joblib'))
+    joblib.dump(StandardScaler().fit(design['X']), ml_path('rice', 'rice_scaler.joblib'))
+    return ['rice_model.joblib', 'rice_scaler.joblib']
+
+
+# --- MILK ---
+MILK_SCALED_COLS = ['days_since_open_or_purchase', 'cumulative_hours_at_room_temp', 'observed_smell', 'observed_consistency']
+
+
+def milk_design():
+    from sklearn.preprocessing import StandardScaler
+    df = read_dataset(ml_path('milk', 'milk_spoilage_preprocessed.csv'))
+    X = df.drop('Spoilage_Index', axis=1).astype(np.float64)
+    scaler = StandardScaler().fit(X[MILK_SCALED_COLS])
+    X[MILK_SCALED_COLS] = scaler.transform(X[MILK_SCALED_COLS])
+    return {'X': X, 'y': df['Spoilage_Index'], 'scaler': scaler}
+
+
+def milk_candidates():
+    from xgboost import XGBClassifier
+    return {'XGBoost': XGBClassifier(random_state=SEED, objective='multi:softmax', num_class=3, eval_metric='mlogloss')}
+
+
+def save_milk(design, name, model):
+    import joblib
+    joblib.dump(model, ml_path('milk', 'xgboost_milk_spoilage_model.joblib'))
+    joblib.dump(design['scaler'], ml_path('milk', 'scaler_milk_spoilage.joblib'))
+    return ['xgboost_milk_spoilage_model.joblib', 'scaler_milk_spoilage.joblib']
+
+
+# --- PANEER ---
+def paneer_design():
+    df = read_dataset(ml_path('paneer', 'paneer_spoilage_dataset.csv'))
+    y = df['paneer_state']
+    X = df.drop('paneer_state', axis=1)
+    # Ordinal codes, as plain numbers so they aren't one-hot encoded with the categoricals below
+    X['observed_smell'] = X['observed_smell'].map({'Normal/Sweetish': 0, 'Sour/Acidic': 1, 'Foul/Ammoniacal': 2, 'Soapy/Rancid': 3}).astype(np.float64)
+    X['texture_surface'] = X['texture_surface'].map({'Normal/Firm': 0, 'Hard/Rubbery': 1, 'Slimy/Sticky': 2}).astype(np.float64)
+    categorical_features = X.select_dtypes(include=['object', 'category']).columns
+    X = pd.get_dummies(X, columns=categorical_features, drop_first=True)
+    return {'X': X.astype(np.float64), 'y': y}
+
+
+def paneer_candidates():
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from xgboost import XGBClassifier
+    return {
+        'Logistic Regression': LogisticRegression(solver='lbfgs', max_iter=1000, random_state=SEED),
+        'Random Forest': RandomForestClassifier(n_estimators=100, random_state=SEED),
+        'XGBoost': XGBClassifier(objective='multi:softmax', num_class=4, random_state=SEED, eval_metric='mlogloss'),
+    }
+
+
+def save_paneer(design, name, model):
+    import joblib
+    model_file = f"{name.lower().replace(' ', '_')}_paneer_model.joblib"
+    joblib.dump(model, ml_path('paneer', model_file))
+    with open(ml_path('paneer', 'paneer_model_columns.json'), 'w') as f:
+        json.dump(design['X'].columns.tolist(), f)
+    with open(ml_path('paneer', 'paneer_model_config.json'), 'w') as f:
+        json.dump({'model_file': model_file, 'columns_file': 'paneer_model_columns.json'}, f, indent=2)
+    # The design matrix, for tree_compiler.py verify. As .npy columns, so it loads without pyarrow
+    save_frame(design['X'].assign(paneer_state=design['y']), ml_path('paneer', 'paneer_preprocessed'), format='npy')
+    return [model_file, 'paneer_model_columns.json', 'paneer_model_config.json', 'paneer_preprocessed']
+
+
+# --- DAL ---
+DAL_NUMERICAL_COLS = ['Time_since_preparation_hours', 'Oil_separation']
+DAL_CATEGORICAL_COLS = ['Storage_place', 'Acidity_source', 'Consistency', 'Container_type', 'Smell']
+
+
+def create_synthetic_dal_data(n_rows=5000):
+    """DalSpoilage_V3.ipynb's generator, unchanged, so a retrain sees the same rows."""
+    np.random.seed(SEED)
+    storage_places = ['Room Temperature', 'Refrigerator', 'Freezer']
+    acidity_sources = ['Low/Normal', 'Moderate', 'High']
+    consistencies = ['Normal', 'Slightly Thickened', 'Watery', 'Slimy']
+    container_types = ['Steel/Metal', 'Plastic', 'Ceramic/Glass']
+    smells = ['Normal', 'Slightly Sour', 'Very Sour', 'Musty', 'Foul']
+    df = pd.DataFrame({
+        'Time_since_preparation_hours': np.random.uniform(0, 120, n_rows),
+        'Storage_place': np.random.choice(storage_places, n_rows, p=[0.4, 0.55, 0.05]),
+        'Acidity_source': np.random.choice(acidity_sources, n_rows, p=[0.6, 0.3, 0.1]),
+        'Consistency': np.random.choice(consistencies, n_rows, p=[0.7, 0.2, 0.08, 0.02]),
+        'Container_type': np.random.choice(container_types, n_rows, p=[0.5, 0.3, 0.2]),
+        'Smell': np.random.choice(smells, n_rows, p=[0.65, 0.25, 0.05, 0.03, 0.02]),
+        'Oil_separation': np.random.uniform(0.0, 1.0, n_rows)
+    })
+
+    def determine_spoilage(row):
+        if row['Storage_place'] == 'Room Temperature' and row['Time_since_preparation_hours'] > 24:
+            return 'Spoiled'
+        if row['Storage_place'] == 'Room Temperature' and row['Time_since_preparation_hours'] > 8 and \
+           (row['Acidity_source'] == 'High' or row['Smell'] in ['Very Sour', 'Foul']):
+            return 'Spoiled'
+        if row['Consistency'] == 'Slimy' or row['Smell'] == 'Foul':
+            return 'Spoiled'
+        if row['Storage_place'] == 'Refrigerator' and row['Time_since_preparation_hours'] > 72 and \
+           row['Acidity_source'] == 'High':
+            return 'Spoiled'
+        spoil_prob = row['Time_since_preparation_hours'] / 120.0 * 0.4 + row['Oil_separation'] * 0.3
+        if row['Storage_place'] == 'Refrigerator':
+            spoil_prob *= 0.5
+        elif row['Storage_place'] == 'Freezer':
+            spoil_prob *= 0.1
+        if np.random.rand() < spoil_prob:
+            return 'Spoiled'
+        return 'Not Spoiled'
+
+    df['Spoiled_flag'] = df.apply(determine_spoilage, axis=1)
+    return df
+
+
+def dal_design():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
+    df = create_synthetic_dal_data()
+    df[DAL_CATEGORICAL_COLS] = df[DAL_CATEGORICAL_COLS].astype('category')
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', StandardScaler(), DAL_NUMERICAL_COLS),
+        ('cat', OneHotEncoder(handle_unknown='ignore'), DAL_CATEGORICAL_COLS)
+    ], remainder='drop')
+    le = LabelEncoder()
+    y = le.fit_transform(df['Spoiled_flag'])
+    X = preprocessor.fit_transform(df.drop('Spoiled_flag', axis=1))
+    X = X.toarray() if hasattr(X, 'toarray') else X
+    return {'X': np.asarray(X, dtype=np.float64), 'y': y, 'preprocessor': preprocessor, 'le': le}
+
+
+def dal_candidates():
+    # The notebook's GridSearchCV grid, one candidate per point
+    import itertools
+    from xgboost import XGBClassifier
+    return {
+        f'XGBoost n={n} lr={lr} depth={depth} mcw={mcw}': XGBClassifier(
+            objective='binary:logistic', eval_metric='logloss', random_state=SEED,
+            n_estimators=n, learning_rate=lr, max_depth=depth, min_child_weight=mcw)
+        for n, lr, depth, mcw in itertools.product([150, 200, 300], [0.05, 0.1], [3, 5, 7], [1, 3])
+    }
+
+
+def save_dal(design, name, model):
+    import joblib
+    feature_names = design['preprocessor'].get_feature_names_out()
+    joblib.dump(model, ml_path('dal', 'dal_spoilage_final_model.joblib'))
+    joblib.dump(design['preprocessor'], ml_path('dal', 'dal_spoilage_preprocessor.joblib'))
+    joblib.dump(design['le'], ml_path('dal', 'dal_spoilage_label_encoder.joblib'))
+    joblib.dump(feature_names, ml_path('dal', 'dal_spoilage_feature_names.joblib'))
+    with open(ml_path('dal', 'dal_model_columns.json'), 'w') as f:
+        json.dump(list(feature_names), f, indent=4)
+    return ['dal_spoilage_final_model.joblib', 'dal_spoilage_preprocessor.joblib', 'dal_spoilage_label_encoder.joblib',
+            'dal_spoilage_feature_names.joblib', 'dal_model_columns.json']
+
+
+# --- ROTI ---
+def generate_synthetic_roti_data(n_samples=3500):
+    """RotiSpoilage_V3.ipynb's generator, unchanged, so a retrain sees the same rows."""
+    np.random.seed(SEED)
+    storage_locations = ['Room Temperature', 'Refrigerator', 'Freezer', 'Open Counter', 'Lunchbox']
+    storage_containers = ['Airtight Box', 'Aluminium Foil Wrap', 'Cloth/Basket', 'Ziploc Bag', 'Open Plate']
+    fat_contents = ['Low (0-5%)', 'Medium (5-10%)', 'High (>10%)']
+    ambient_seasons = ['Warm & Humid', 'Cool & Dry', 'Neutral', 'Monsoon (Very Humid)']
+    observed_textures = ['Soft & Pliable', 'Slightly Hardened', 'Dry & Brittle', 'Slimy/Sticky', 'Fuzzy/Mold']
+    observed_appearances = ['Golden Brown', 'Lightly Spotted', 'Dark Patches', 'Oil Separation/Condensation', 'Visible Fuzz/Growth']
+    df = pd.DataFrame({
+        'time_since_cooking_hr': np.random.uniform(0.5, 72, n_samples).round(1),
+        'storage_location': np.random.choice(storage_locations, n_samples, p=[0.4, 0.3, 0.1, 0.1, 0.1]),
+        'storage_container': np.random.choice(storage_containers, n_samples, p=[0.3, 0.2, 0.2, 0.1, 0.2]),
+        'fat_content': np.random.choice(fat_contents, n_samples, p=[0.4, 0.4, 0.2]),
+        'ambient_season': np.random.choice(ambient_seasons, n_samples, p=[0.3, 0.3, 0.3, 0.1]),
+        'observed_texture': np.random.choice(observed_textures, n_samples, p=[0.6, 0.2, 0.1, 0.05, 0.05]),
+        'observed_appearance': np.random.choice(observed_appearances, n_samples, p=[0.6, 0.2, 0.1, 0.05, 0.05]),
+    })
+    df['roti_state'] = 0
+    rule_1 = (df['time_since_cooking_hr'] > 24) & (df['storage_location'] == 'Room Temperature')
+    df.loc[rule_1, 'roti_state'] = 1
+    rule_2 = (df['observed_texture'].isin(['Slimy/Sticky', 'Fuzzy/Mold'])) | \
+             (df['observed_appearance'].isin(['Visible Fuzz/Growth', 'Dark Patches']))
+    df.loc[rule_2, 'roti_state'] = 1
+    rule_3 = (df['observed_appearance'] == 'Oil Separation/Condensation') & \
+             (df['time_since_cooking_hr'] > 6) & (df['time_since_cooking_hr'] <= 48) & (df['roti_state'] == 0)
+    df.loc[rule_3, 'roti_state'] = np.random.choice([0, 1], size=rule_3.sum(), p=[0.2, 0.8])
+    rule_4 = df['storage_location'].isin(['Refrigerator', 'Freezer']) & (df['roti_state'] == 0)
+    df.loc[rule_4, 'roti_state'] = np.random.choice([0, 1], size=rule_4.sum(), p=[0.99, 0.01])
+    rule_5 = df['ambient_season'].isin(['Warm & Humid', 'Monsoon (Very Humid)']) & \
+             (df['time_since_cooking_hr'] > 8) & (df['roti_state'] == 0)
+    df.loc[rule_5, 'roti_state'] = np.random.choice([0, 1], size=rule_5.sum(), p=[0.7, 0.3])
+    rule_6 = (df['time_since_cooking_hr'] > 60) & ~df['storage_location'].isin(['Refrigerator', 'Freezer'])
+    df.loc[rule_6, 'roti_state'] = 1
+    return df.drop_duplicates().reset_index(drop=True)
+
+
+def roti_design():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    df = generate_synthetic_roti_data()
+    X = df.drop('roti_state', axis=1)
+    categorical_features = X.select_dtypes(include=['object']).columns.tolist()
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', Pipeline([('scaler', StandardScaler())]), ['time_since_cooking_hr']),
+        ('cat', Pipeline([('onehot', OneHotEncoder(handle_unknown='ignore'))]), categorical_features)
+    ], remainder='passthrough')
+    X = preprocessor.fit_transform(X)
+    X = X.toarray() if hasattr(X, 'toarray') else X
+    return {'X': np.asarray(X, dtype=np.float64), 'y': df['roti_state'].to_numpy(), 'preprocessor': preprocessor}
+
+
+def roti_candidates():
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    return {
+        'Logistic Regression': LogisticRegression(solver='liblinear', random_state=SEED),
+        'Random Forest': RandomForestClassifier(n_estimators=100, max_depth=10, random_state=SEED),
+        'Gradient Boosting': GradientBoostingClassifier(n_estimators=100, learning_rate=0.1, random_state=SEED),
+    }
+
+
+def save_roti(design, name, model):
+    import joblib
+    from sklearn.pipeline import Pipeline
+    joblib.dump(Pipeline(steps=[('preprocessor', design['preprocessor']), ('classifier', model)]),
+                ml_path('roti', 'roti_spoiler_pipeline.joblib'))
+    return ['roti_spoiler_pipeline.joblib']
+
+
+class TrainingSpec:
+    def __init__(self, design, candidates, save, deployable):
+        """deployable(name) says whether the server can load that candidate's model."""
+        self.design = design
+        self.candidates = candidates
+        self.save = save
+        self.deployable = deployable
+
+
+FOODS = {
+    'rice': TrainingSpec(rice_design, rice_candidates, save_rice, lambda name: name == 'Random Forest'),
+    'milk': TrainingSpec(milk_design, milk_candidates, save_milk, lambda name: name == 'XGBoost'),
+    'paneer': TrainingSpec(paneer_design, paneer_candidates, save_paneer, lambda name: name in ('Random Forest', 'XGBoost')),
+    'dal': TrainingSpec(dal_design, dal_candidates, save_dal, lambda name: name.startswith('XGBoost')),
+    'roti': TrainingSpec(roti_design, roti_candidates, save_roti, lambda name: name == 'Random Forest'),
+}
+
+
+def bake_off(food, cv=5, n_jobs=-1, save=False):
+    """Cross-validates every candidate for the food, refits the winner on all rows and optionally saves it.
+    Returns a summary dict."""
+    from joblib import Parallel, delayed
+    from sklearn.base import clone
+    from sklearn.model_selection import StratifiedKFold
+    spec = FOODS[food]
+    start = time.perf_counter()
+    design = spec.design()
+    frame = design['X']
+    X = frame.to_numpy(dtype=np.float64) if isinstance(frame, pd.DataFrame) else frame
+    y = np.asarray(design['y'])
+    design_seconds = time.perf_counter() - start
+
+    candidates = spec.candidates()
+    folds = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=SEED).split(X, y))
+    cv_start = time.perf_counter()
+    # The design matrix is memory-mapped once and shared by every worker, not pickled per task
+    fits = Parallel(n_jobs=n_jobs, max_nbytes='64K', mmap_mode='r')(
+        delayed(_fit_fold)(name, estimator, X, y, train, test)
+        for name, estimator in candidates.items() for train, test in folds
+    )
+    cv_seconds = time.perf_counter() - cv_start
+
+    results = {name: {'scores': [], 'fit_seconds': []} for name in candidates}
+    for name, score, fit_seconds in fits:
+        results[name]['scores'].append(score)
+        results[name]['fit_seconds'].append(fit_seconds)
+    table = {name: {
+        'cv_accuracy': float(np.mean(r['scores'])), 'cv_std': float(np.std(r['scores'])),
+        'fit_seconds': float(np.mean(r['fit_seconds'])), 'deployable': spec.deployable(name)
+    } for name, r in results.items()}
+    winner = max((name for name in table if table[name]['deployable']), key=lambda name: table[name]['cv_accuracy'])
+
+    refit_start = time.perf_counter()
+    model = clone(candidates[winner])
+    saved_n_jobs = n_jobs_params(model)
+    model.set_params(**{key: n_jobs for key in saved_n_jobs})
+    model.fit(frame, y) # the DataFrame where there is one, so the model keeps its feature names
+    model.set_params(**saved_n_jobs) # serve with the estimator's own setting, not the trainer's
+    refit_seconds = time.perf_counter() - refit_start
+    files = spec.save(design, winner, model) if save else []
+    return {
+        'food': food, 'rows': len(y), 'features': X.shape[1], 'folds': cv, 'candidates': table, 'winner': winner,
+        'design_seconds': design_seconds, 'cv_seconds': cv_seconds, 'refit_seconds': refit_seconds,
+        'fit_seconds_total': float(sum(f for _, _, f in fits)), 'wall_seconds': time.perf_counter() - start, 'saved': files
+    }
+
+
+def print_summary(summary):
+    print(f"--- {summary['food']}: {summary['rows']:,} rows x {summary['features']} features, "
+          f"{len(summary['candidates'])} candidates x {summary['folds']} folds ---")
+    print(f"{'candidate':<38} {'cv accuracy':>14} {'fit s/fold':>10}")
+    for name, row in sorted(summary['candidates'].items(), key=lambda item: -item[1]['cv_accuracy']):
+        marker = '*' if name == summary['winner'] else (' ' if row['deployable'] else '-')
+        print(f"{marker} {name:<36} {row['cv_accuracy'] * 100:>7.2f}% ±{row['cv_std'] * 100:>4.2f} {row['fit_seconds']:>10.2f}")
+    baselines = [name for name, row in summary['candidates'].items() if not row['deployable']]
+    print(f"Winner: {summary['winner']}" + (" (- baseline only: the server can't load it)" if baselines else ''))
+    print(f"Wall time {summary['wall_seconds']:.1f}s: design matrix {summary['design_seconds']:.1f}s, "
+          f"CV {summary['cv_seconds']:.1f}s ({summary['fit_seconds_total']:.1f}s of fits), refit {summary['refit_seconds']:.1f}s")
+    for filename in summary['saved']:
+        print(f"✅ Saved {os.path.join('ML', summary['food'], filename)}")
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Cross-validate candidate models per food and retrain the winner.')
+    parser.add_argument('foods', nargs='*', default=list(FOODS), choices=list(FOODS))
+    parser.add_argument('--cv', type=int, default=5, help='folds')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='processes for the CV fits (-1: all cores)')
+    parser.add_argument('--save', action='store_true', help="write the winners' artifacts into ML/<food>")
+    parser.add_argument('--output', help='also write the summaries as JSON')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summaries = []
+    for food in args.foods:
+        summaries.append(bake_off(food, cv=args.cv, n_jobs=args.n_jobs, save=args.save))
+        print_summary(summaries[-1])
+    print(f"--- {len(summaries)} foods in {time.perf_counter() - start:.1f}s (--n-jobs {args.n_jobs}, {os.cpu_count()} cores) ---")
+    if args.save:
+        print("--- Rebuild the derived artifacts from backend/: python tree_compiler.py compile, "
+              "python lookup_tables.py compile, python portable_models.py export ---")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
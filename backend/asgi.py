@@ -0,0 +1,49 @@
+import asyncio
+import importlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from hypercorn.app_wrappers import WSGIWrapper
+from quart import Quart
+from quart_cors import cors
+
+import app as wsgi
+
+# --- ASGI Server ---
+# hypercorn asgi:app --bind 0.0.0.0:5000   (from backend/)
+#
+# The I/O-bound routes (/api/chat, /api/get-ngos, /api/notify-ngo, /api/signup,
+# /api/login) are async handlers here (blueprints/async_*.py): they await Gemini,
+# Maps, SMTP and Firestore, so one process holds as many of them in flight as it
+# has open connections instead of one per thread. Every other route (the
+# predictions, status endpoints) is the Flask app from app.py, run on a thread
+# pool of PREDICTION_THREADS (default: the number of cores) so CPU-bound model
+# calls never block the event loop. BLUEPRINTS picks the route groups as in app.py.
+
+ASYNC_BLUEPRINTS = {'chat': 'async_chat', 'auth': 'async_auth', 'ngo': 'async_ngo'}
+PREDICTION_THREADS = int(os.getenv('PREDICTION_THREADS', os.cpu_count() or 1))
+MAX_BODY_BYTES = 16 * 1024 * 1024 # the batch predict route takes large bodies
+
+quart_app = cors(Quart(__name__))
+for name in wsgi.ENABLED_BLUEPRINTS:
+    if name in ASYNC_BLUEPRINTS:
+        quart_app.register_blueprint(importlib.import_module(f'blueprints.{ASYNC_BLUEPRINTS[name]}').bp)
+ASYNC_PATHS = {rule.rule for rule in quart_app.url_map.iter_rules() if rule.endpoint != 'static'}
+print(f"--- Async routes: {', '.join(sorted(ASYNC_PATHS)) or 'none'} ---")
+
+prediction_executor = ThreadPoolExecutor(max_workers=PREDICTION_THREADS, thread_name_prefix='predict')
+flask_app = WSGIWrapper(wsgi.app, MAX_BODY_BYTES)
+
+async def run_flask(scope, receive, send):
+    loop = asyncio.get_running_loop()
+
+    def call_soon(func, *args):
+        return asyncio.run_coroutine_threadsafe(func(*args), loop).result()
+
+    await flask_app(scope, receive, send, lambda *args: loop.run_in_executor(prediction_executor, *args), call_soon)
+
+async def app(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] not in ASYNC_PATHS:
+        await run_flask(scope, receive, send)
+    else:
+        await quart_app(scope, receive, send) # async routes, and lifespan events
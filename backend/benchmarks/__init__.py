@@ -0,0 +1,2 @@
+# Benchmarks for the backend. Run them from backend/, e.g.:
+#   python -m benchmarks.startup
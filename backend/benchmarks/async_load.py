@@ -0,0 +1,167 @@
+"""
+Load test of the I/O-bound routes on the sync server (gunicorn, one worker with
+--threads threads) and the async one (asgi.py on hypercorn, one worker). Gemini,
+Maps and Firestore are the offline fakes with FAKE_LATENCY_SECONDS per call,
+and mail goes to the local SMTP stand-in with the same delay. Each concurrency
+level keeps that many clients sending /api/chat, /api/get-ngos,
+/api/notify-ngo, /api/login and /api/signup requests back to back for
+--seconds. The sync server tops out at about threads / latency requests per
+second; the async one keeps scaling with the number of connections.
+
+    python -m benchmarks.async_load [--concurrency 1 8 32 128] [--latency 0.1] [--threads 8]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+
+import httpx
+
+from benchmarks.startup import BACKEND_DIR
+from stubs.smtp import FakeSmtpServer
+
+SERVERS = {
+    'sync': lambda args: ['gunicorn', '--workers', '1', '--worker-class', 'gthread', '--threads', str(args.threads), 'app:app'],
+    'async': lambda args: ['hypercorn', '--workers', '1', '--backlog', '2048', 'asgi:app'],
+}
+DONATION = {'ngo_name': 'Load Test NGO', 'donorContact': '99999 99999', 'foodDetails': 'Rice, 2 kg', 'pickupAddress': '1 Example Road'}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def make_requests():
+    """Endless round robin over the I/O-bound routes, as (method, url, kwargs)."""
+    n = itertools.count()
+    for route in itertools.cycle(['chat', 'ngos', 'notify', 'login', 'signup']):
+        i = next(n)
+        if route == 'chat':
+            yield 'POST', '/api/chat', {'json': {'message': f'I have rice and dal ({i})', 'mode': 'Veg', 'userId': f'user-{i % 50}',
+                                                 'history': [{'role': 'user', 'content': 'hi'}]}}
+        elif route == 'ngos':
+            yield 'GET', '/api/get-ngos', {'params': {'lat': 19.07 + (i % 97) * 0.001, 'lng': 72.87 + (i % 89) * 0.001}}
+        elif route == 'notify':
+            yield 'POST', '/api/notify-ngo', {'json': DONATION}
+        elif route == 'login':
+            yield 'POST', '/api/login', {'json': {'email': 'loadtest@example.com', 'password': 'secret'}}
+        else:
+            yield 'POST', '/api/signup', {'json': {'email': f'user{i}-{time.monotonic_ns()}@example.com', 'password': 'secret'}}
+
+
+async def send(reader, writer, port, method, url, kwargs):
+    """One HTTP/1.1 keep-alive request on an open connection; returns the status code."""
+    body = json.dumps(kwargs['json']).encode() if 'json' in kwargs else b''
+    if 'params' in kwargs:
+        url += '?' + urllib.parse.urlencode(kwargs['params'])
+    writer.write((f"{method} {url} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode() + body)
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+    length = int(next((v for k, v in headers.items() if k.lower() == 'content-length'), 0))
+    await reader.readexactly(length)
+    return int(lines[0].split()[1])
+
+
+async def run_level(port, concurrency, seconds):
+    # A minimal client on raw streams: one keep-alive connection per simulated
+    # user. (httpx's pool costs more CPU per request than the servers under test
+    # once there are more than a few dozen connections, which skews the numbers.)
+    requests = make_requests()
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=2 ** 20)
+        try:
+            while time.perf_counter() < deadline:
+                method, url, kwargs = next(requests)
+                start = time.perf_counter()
+                try:
+                    ok = await send(reader, writer, port, method, url, kwargs) < 400
+                except (OSError, asyncio.IncompleteReadError):
+                    ok = False
+                    writer.close()
+                    reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=2 ** 20)
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0,
+        'errors': errors
+    }
+
+
+def wait_up(proc, base_url, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            httpx.get(base_url + '/api/services/status', timeout=2)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start in time')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--servers', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32, 128])
+    parser.add_argument('--latency', type=float, default=0.1, help='simulated seconds per Gemini / Maps / Firestore / SMTP call')
+    parser.add_argument('--threads', type=int, default=8, help='threads of the sync worker')
+    parser.add_argument('--seconds', type=float, default=3.0, help='duration of each concurrency level')
+    args = parser.parse_args()
+
+    failed = False
+    with FakeSmtpServer(delay=args.latency) as smtp:
+        env = dict(
+            os.environ, FIRESTORE_BACKEND='fake', GEMINI_BACKEND='fake', MAPS_BACKEND='fake',
+            FAKE_LATENCY_SECONDS=str(args.latency), LOG_SINK='memory', NGO_CACHE_TTL_SECONDS='0',
+            SMTP_HOST='127.0.0.1', SMTP_PORT=str(smtp.port), SMTP_SSL='0',
+            EMAIL_SENDER='loadtest@example.com', EMAIL_APP_PASSWORD='secret', BLUEPRINTS='chat,auth,ngo'
+        )
+        print(f"{'server':<8}{'clients':>8}{'req/s':>9}{'p50':>9}{'p95':>9}{'errors':>8}")
+        for server in args.servers:
+            port = free_port()
+            base_url = f'http://127.0.0.1:{port}'
+            proc = subprocess.Popen(
+                [sys.executable, '-m'] + SERVERS[server](args) + ['--bind', f'127.0.0.1:{port}'],
+                cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_up(proc, base_url)
+                httpx.post(base_url + '/api/signup', json={'email': 'loadtest@example.com', 'password': 'secret'}, timeout=30)
+                for concurrency in args.concurrency:
+                    r = asyncio.run(run_level(port, concurrency, args.seconds))
+                    print(f"{server:<8}{concurrency:>8}{r['rps']:>9.1f}{r['p50'] * 1000:>7.0f}ms{r['p95'] * 1000:>7.0f}ms{r['errors']:>8}")
+                    failed |= r['errors'] > 0
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
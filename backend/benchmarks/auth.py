@@ -0,0 +1,135 @@
+"""
+/api/signup and /api/login against the in-memory Firestore stand-in with a
+simulated round trip. Signup is timed as the old query-then-set and as the
+single create(); login is timed with and without the user cache over a trace
+of returning users, wrong passwords and unknown emails. Every response is
+checked, on the Flask routes and on the async (ASGI) ones.
+
+    python -m benchmarks.auth [--users 300] [--logins 3000] [--firestore-ms 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ['FIRESTORE_BACKEND'] = 'fake'
+os.environ['LOG_SINK'] = 'memory'
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def legacy_signup(db, email, password):
+    """The signup before this change: a where() query for the email, then set()."""
+    if len(db.collection('users').where('email', '==', email).get()) > 0:
+        return 400
+    db.collection('users').document(email).set({'email': email, 'password': password, 'role': 'user'})
+    return 201
+
+
+def login_trace(users, n, seed=0):
+    """(email, password, expected status): mostly returning users, some wrong passwords and unknown emails."""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(users)] # a few users log in far more often
+    trace = []
+    for _ in range(n):
+        u = rng.choices(range(users), weights)[0]
+        kind = rng.random()
+        if kind < 0.8:
+            trace.append((f'user{u}@example.com', f'pw{u}', 200))
+        elif kind < 0.9:
+            trace.append((f'user{u}@example.com', 'wrong', 401))
+        else:
+            trace.append((f'nobody{rng.randrange(20)}@example.com', 'pw', 401))
+    return trace
+
+
+def timed(post, calls):
+    samples = []
+    for path, body, expected in calls:
+        start = time.perf_counter()
+        status = post(path, body)
+        samples.append(time.perf_counter() - start)
+        assert status == expected, (path, body, status, expected)
+    return samples
+
+
+def report(label, samples, firestore_calls):
+    print(f"{label:<22} {percentile(samples, 0.5) * 1000:>8.2f} {percentile(samples, 0.95) * 1000:>8.2f} "
+          f"{firestore_calls / len(samples):>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--logins', type=int, default=3000)
+    parser.add_argument('--firestore-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    import app
+    import services
+    from blueprints import auth
+    from user_cache import UserCache
+    db = services.firebase.get()
+    db._store.latency = args.firestore_ms / 1000.0
+    client = app.app.test_client()
+
+    def post(path, body):
+        return client.post(path, json=body).status_code
+
+    print(f"--- {args.users} users, {args.logins} logins, {args.firestore_ms:.0f} ms per Firestore call ---")
+    print(f"{'':<22} {'p50 ms':>8} {'p95 ms':>8} {'calls/req':>12}")
+
+    signups = [(f'user{u}@example.com', f'pw{u}') for u in range(args.users)]
+    calls = db.calls
+    samples = []
+    for email, password in signups[:args.users // 2] + signups[:10]: # the last 10 are duplicates
+        start = time.perf_counter()
+        legacy_signup(db, email, password)
+        samples.append(time.perf_counter() - start)
+    report('signup, query + set', samples, db.calls - calls)
+    db._store.collections.clear()
+
+    calls = db.calls
+    samples = timed(post, [('/api/signup', {'email': e, 'password': p}, 201) for e, p in signups[:args.users // 2]]
+                    + [('/api/signup', {'email': e, 'password': p}, 400) for e, p in signups[:10]])
+    report('signup, create()', samples, db.calls - calls)
+
+    # Users signed up on another process: not in this process's cache
+    for email, password in signups[args.users // 2:]:
+        db.collection('users').document(email)._write({'email': email, 'password': password, 'role': 'user'})
+
+    trace = [('/api/login', {'email': e, 'password': p}, status) for e, p, status in login_trace(args.users, args.logins)]
+    for label, ttl in (('login, no cache', 0), ('login, user cache', 60)):
+        auth.users = UserCache(auth.fetch_user, ttl_seconds=ttl, negative_ttl_seconds=5)
+        calls = db.calls
+        samples = timed(post, trace)
+        report(label, samples, db.calls - calls)
+    print(f"--- user cache: {auth.users.stats()} ---")
+
+    # A negatively cached email that then signs up can log in at once
+    assert post('/api/login', {'email': 'late@example.com', 'password': 'pw'}) == 401
+    assert post('/api/signup', {'email': 'late@example.com', 'password': 'pw'}) == 201
+    assert post('/api/login', {'email': 'late@example.com', 'password': 'pw'}) == 200
+
+    # The async routes give the same answers
+    import asgi
+    db._store.latency = 0
+    async_client = asgi.quart_app.test_client()
+
+    async def check():
+        for path, body, expected in trace[:200] + [('/api/signup', {'email': 'user0@example.com', 'password': 'x'}, 400),
+                                                   ('/api/signup', {'email': 'async@example.com', 'password': 'pw'}, 201),
+                                                   ('/api/login', {'email': 'async@example.com', 'password': 'pw'}, 200)]:
+            status = (await async_client.post(path, json=body)).status_code
+            assert status == expected, (path, body, status, expected)
+
+    asyncio.run(check())
+    print("--- async routes: same responses ---")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+/api/predict_batch against the single predict routes: rows of each food's
+dataset are sent one by one to the food's route and together as one batch
+(prediction cache off), and every item the single route answers must get the
+same answer from the batch. Dal is also sent with Oil_separation null, which
+the model scores as a missing value. Exits 1 on any difference.
+
+    python -m benchmarks.batch_parity [--items 50] [--foods rice dal ...]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.routes import DAL_VOCABULARY, DATASET_ROUTES, load_rows
+
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+os.environ['LOG_SINK'] = 'memory'
+
+
+def food_bodies(food, n):
+    path, dataset, label = DATASET_ROUTES[f'predict_{food}']
+    bodies = load_rows(dataset, label, DAL_VOCABULARY if food == 'dal' else None)[:n]
+    if food == 'dal':
+        bodies += [{**body, 'Oil_separation': None} for body in bodies]
+    return path, bodies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=50, help='dataset rows per food')
+    parser.add_argument('--foods', nargs='+', default=['rice', 'milk', 'paneer', 'dal', 'roti'])
+    args = parser.parse_args()
+
+    import app
+    from blueprints import predictions
+    client = app.app.test_client()
+
+    print(f"--- {args.items} rows per food (dal also with Oil_separation null), prediction cache off ---")
+    print(f"{'food':<8} {'items':>6} {'compared':>9} {'single ms':>10} {'batch ms':>9}")
+    failed = False
+    for food in args.foods:
+        path, bodies = food_bodies(food, args.items)
+        predictions.models.get(food, wait=True)
+        start = time.perf_counter()
+        singles = [client.post(path, json=body) for body in bodies]
+        single_s = time.perf_counter() - start
+        start = time.perf_counter()
+        response = client.post('/api/predict_batch', json={'items': [{'food': food, **body} for body in bodies]})
+        batch_s = time.perf_counter() - start
+        assert response.status_code == 200, response.get_json()
+        compared = 0
+        for body, single, result in zip(bodies, singles, response.get_json()['results']):
+            if single.status_code != 200:
+                continue
+            compared += 1
+            answer = {key: value for key, value in result.items() if key not in ('food', 'index')}
+            if answer != single.get_json():
+                failed = True
+                print(f"❌ {food}: {body}\n   single: {single.get_json()}\n   batch:  {answer}")
+        print(f"{food:<8} {len(bodies):>6} {compared:>9} {single_s * 1000:>10.1f} {batch_s * 1000:>9.1f}")
+    print("--- a batch answer differs from the single route ---" if failed else
+          "--- every batch answer matches the single route ---")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
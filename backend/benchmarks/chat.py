@@ -0,0 +1,89 @@
+"""
+Compares /api/chat with and without the per-user session pool, against the
+fake Gemini backend. Each simulated user holds a multi-turn conversation, and
+for every request the fake records the full prompt it would have sent.
+
+"new chars" is the part of a prompt that is not a prefix of that user's
+previous prompt: the part Gemini's prefix caching can't reuse. "history
+queries" counts get_chat_history calls (a Firestore query each when the
+database is configured).
+
+    python -m benchmarks.chat [--users 50] [--turns 8]
+"""
+import argparse
+import os
+import time
+
+os.environ['GEMINI_BACKEND'] = 'fake'
+os.environ['LOG_SINK'] = 'memory'
+
+
+def common_prefix_chars(previous, prompt):
+    chars = 0
+    for a, b in zip(previous, prompt):
+        if a != b:
+            break
+        chars += len(a)
+    return chars
+
+
+def run(chat, client, users, turns):
+    for model in chat.chat_models.get().values():
+        model.requests.clear()
+    history_queries = [0]
+    get_chat_history = chat.get_chat_history
+    def counting_get_chat_history(*args, **kwargs):
+        history_queries[0] += 1
+        return get_chat_history(*args, **kwargs)
+    chat.get_chat_history = counting_get_chat_history
+    samples, total_chars, new_chars = [], 0, 0
+    model = chat.chat_models.get()['veg']
+    for u in range(users):
+        history, previous = [], []
+        for t in range(turns):
+            message = f"I have rice, tomatoes and {t} onions, what can I make?"
+            start = time.perf_counter()
+            reply = client.post('/api/chat', json={
+                'message': message, 'mode': 'Veg', 'history': history, 'userId': f'bench-user-{u}'
+            }).get_json()
+            samples.append(time.perf_counter() - start)
+            prompt = model.requests[-1]
+            total_chars += sum(len(p) for p in prompt)
+            new_chars += sum(len(p) for p in prompt) - common_prefix_chars(previous, prompt)
+            previous = prompt
+            history += [{'role': 'user', 'content': message}, {'role': 'model', 'content': reply['text']}]
+    chat.get_chat_history = get_chat_history
+    samples.sort()
+    n = len(samples)
+    return {
+        'requests': n,
+        'p50_ms': samples[n // 2] * 1e3,
+        'avg_prompt_chars': total_chars / n,
+        'avg_new_chars': new_chars / n,
+        'history_queries': history_queries[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--turns', type=int, default=8)
+    args = parser.parse_args()
+
+    import app
+    from blueprints import chat
+    client = app.app.test_client()
+    pool_size = chat.chat_sessions.max_sessions
+    print(f"system instruction: {len(chat.chat_models.get()['veg'].system_instruction)} chars, "
+          f"{args.users} users x {args.turns} turns")
+    print(f"{'':>10}{'p50':>10}{'prompt chars':>15}{'new chars':>12}{'history queries':>18}")
+    for label, size in (('no pool', 0), ('pool', pool_size)):
+        chat.chat_sessions.max_sessions = size
+        chat.chat_sessions.clear()
+        r = run(chat, client, args.users, args.turns)
+        print(f"{label:>10}{r['p50_ms']:>8.2f}ms{r['avg_prompt_chars']:>15.0f}{r['avg_new_chars']:>12.0f}{r['history_queries']:>18}")
+    print(f"pool stats: {chat.chat_sessions.stats()}")
+
+
+if __name__ == '__main__':
+    main()
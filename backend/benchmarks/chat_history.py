@@ -0,0 +1,92 @@
+"""
+Firestore history queries per chat message, with and without the per-user
+history cache. Uses an in-memory stand-in for the chat_logs query with a
+simulated round trip, and writes that land in the store with a lag (as they
+do through the background log sink). Every read is checked against the full
+conversation; without the cache, reads made before the sink catches up miss
+the latest turns ("stale reads").
+
+    python -m benchmarks.chat_history [--users 200] [--messages 10] [--query-ms 40]
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ['LOG_SINK'] = 'memory'
+
+
+class LaggingStore:
+    """chat_logs stand-in: a write becomes visible to queries `lag` writes later."""
+    def __init__(self, query_seconds, lag):
+        self.query_seconds = query_seconds
+        self.lag = lag
+        self.visible = {}
+        self.pending = []
+        self.queries = 0
+
+    def write(self, userId, turn):
+        self.pending.append((userId, turn))
+        while len(self.pending) > self.lag:
+            user, t = self.pending.pop(0)
+            self.visible.setdefault(user, []).append(t)
+
+    def fetch(self, userId, limit):
+        self.queries += 1
+        time.sleep(self.query_seconds)
+        return list(self.visible.get(userId, []))[-limit:]
+
+    def truth(self, userId, limit):
+        turns = self.visible.get(userId, []) + [t for u, t in self.pending if u == userId]
+        return turns[-limit:]
+
+
+def run(chat, users, messages, query_seconds, cache_users, seed=0):
+    rng = random.Random(seed)
+    store = LaggingStore(query_seconds, lag=3)
+    chat.chat_history.fetch = store.fetch
+    chat.chat_history.max_users = cache_users
+    chat.chat_history.clear()
+    # Seed some users with earlier conversations
+    for u in range(users):
+        for m in range(rng.randint(0, 4)):
+            store.write(f'user-{u}', (f'old {m}', f'old reply {m}'))
+    for _ in range(store.lag): # let the seeded turns become visible
+        store.write('seed', ('', ''))
+    order = [u for u in range(users) for _ in range(messages)]
+    rng.shuffle(order)
+    wrong, elapsed = 0, 0.0
+    for n, u in enumerate(order):
+        userId = f'user-{u}'
+        start = time.perf_counter()
+        history = chat.get_chat_history(userId)
+        elapsed += time.perf_counter() - start
+        expected = [{'role': r, 'parts': [p]} for um, br in store.truth(userId, 5) for r, p in (('user', um), ('model', br))]
+        wrong += history != expected
+        turn = (f'message {n}', f'reply {n}')
+        store.write(userId, turn)
+        chat.chat_history.append(userId, *turn)
+    return {'reads': len(order), 'queries': store.queries, 'avg_ms': elapsed / len(order) * 1e3,
+            'wrong': wrong, 'stats': chat.chat_history.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--messages', type=int, default=10)
+    parser.add_argument('--query-ms', type=float, default=40.0)
+    args = parser.parse_args()
+
+    import services
+    from blueprints import chat
+    services.firebase.set(services.firebase.get() or object()) # get_chat_history only runs with a database configured
+    print(f"{args.users} users x {args.messages} messages, {args.query_ms:.0f}ms per query")
+    print(f"{'':>10}{'reads':>8}{'queries':>9}{'avg read':>11}{'hit ratio':>11}{'stale reads':>13}")
+    for label, cache_users in (('no cache', 0), ('cache', 10000)):
+        r = run(chat, args.users, args.messages, args.query_ms / 1000.0, cache_users)
+        hit_ratio = r['stats']['hit_ratio'] if cache_users else 0.0
+        print(f"{label:>10}{r['reads']:>8}{r['queries']:>9}{r['avg_ms']:>9.2f}ms{hit_ratio:>11}{r['wrong']:>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Time to first byte for /api/chat, buffered vs streaming (server-sent events),
+against the fake Gemini backend with simulated prefill and per-chunk
+generation time. A typical recipe reply is used.
+
+    python -m benchmarks.chat_stream [--requests 20] [--chunk-delay-ms 30]
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ['GEMINI_BACKEND'] = 'fake'
+os.environ['LOG_SINK'] = 'memory'
+
+RECIPE_REPLY = {
+    'replyText': "Here's a quick tomato rice you can make with your leftovers. It takes about 15 minutes.",
+    'recipes': [{
+        'title': 'Leftover Tomato Rice',
+        'ingredients': ['2 cups cooked rice', '2 tomatoes, chopped', '1 onion, sliced', '1 tsp mustard seeds',
+                        '8 curry leaves', '1/2 tsp turmeric', 'Salt to taste', '1 tbsp oil'],
+        'steps': ['Heat oil and add mustard seeds and curry leaves.', 'Add onion and cook until soft.',
+                  'Add tomatoes, turmeric and salt; cook until mushy.', 'Fold in the rice and heat through.',
+                  'Garnish with coriander and serve hot.'],
+        'estimatedTime': '15 minutes',
+        'servings': 2
+    }],
+    'safetyTips': ['Reheat leftover rice until steaming hot all the way through.',
+                   'Do not reheat rice more than once.'],
+    'command': None
+}
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--prefill-ms', type=float, default=300.0, help='simulated time to first token')
+    parser.add_argument('--chunk-delay-ms', type=float, default=30.0, help='simulated time per streamed chunk')
+    args = parser.parse_args()
+
+    import app
+    from blueprints import chat
+    reply_text = "```json\n" + json.dumps(RECIPE_REPLY, indent=2) + "\n```"
+    for model in chat.chat_models.get().values():
+        model.reply = lambda message: reply_text
+        model.latency_per_kchar = (args.prefill_ms / 1000.0) / (len(model.system_instruction) / 1000.0)
+        model.chunk_delay = args.chunk_delay_ms / 1000.0
+    client = app.app.test_client()
+    body = {'message': 'I have rice and tomatoes', 'mode': 'Veg'}
+
+    results = {}
+    for label, stream in (('buffered', False), ('stream', True)):
+        ttfb, first_token, first_recipe, total = [], [], [], []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            resp = client.post('/api/chat', json={**body, 'stream': stream}, buffered=False)
+            seen_token = seen_recipe = None
+            for i, chunk in enumerate(resp.response):
+                now = time.perf_counter() - start
+                if i == 0:
+                    ttfb.append(now)
+                text = chunk.decode() if isinstance(chunk, bytes) else chunk
+                if seen_token is None and (not stream or 'event: replyText' in text):
+                    seen_token = now
+                if seen_recipe is None and (not stream or 'event: recipe' in text):
+                    seen_recipe = now
+            resp.close()
+            total.append(time.perf_counter() - start)
+            first_token.append(seen_token)
+            first_recipe.append(seen_recipe)
+        results[label] = (ttfb, first_token, first_recipe, total)
+
+    print(f"{args.requests} requests, prefill {args.prefill_ms:.0f}ms, {args.chunk_delay_ms:.0f}ms per chunk")
+    print(f"{'':>10}{'TTFB p50':>12}{'first token':>14}{'first recipe':>15}{'complete p50':>15}")
+    for label, (ttfb, first_token, first_recipe, total) in results.items():
+        print(f"{label:>10}{percentile(ttfb, 0.5) * 1e3:>10.0f}ms{percentile(first_token, 0.5) * 1e3:>12.0f}ms"
+              f"{percentile(first_recipe, 0.5) * 1e3:>13.0f}ms{percentile(total, 0.5) * 1e3:>13.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
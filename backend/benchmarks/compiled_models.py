@@ -0,0 +1,62 @@
+"""
+Latency of predict_proba for each food's pickled estimator against its
+compiled ensemble (tree_compiler.py), on rows drawn from the food's training
+inputs, at a few batch sizes. Batch size 1 is what the predict routes send.
+Also checks both give the same predicted class for every timed row.
+
+    python -m benchmarks.compiled_models [--sizes 1 10 100 1000] [--repeat 50]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from tree_compiler import COMPILED_FOODS, TRAINING_INPUTS, load_compiled_model, source_model
+
+
+def take_rows(X, rows):
+    if hasattr(X, 'iloc'):
+        return X.iloc[rows]
+    return X[rows]
+
+
+def median_ms(fn, repeat):
+    fn() # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--foods', nargs='*', default=list(COMPILED_FOODS))
+    parser.add_argument('--sizes', nargs='*', type=int, default=[1, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    from blueprints import predictions
+    rng = np.random.default_rng(0)
+    mismatches = 0
+    print(f"{'food':<8}{'rows':>6}{'pickle':>12}{'compiled':>12}{'speedup':>9}")
+    for food in args.foods:
+        model, path = source_model(predictions, food)
+        compiled = load_compiled_model(food, path)
+        if compiled is None:
+            raise SystemExit(1)
+        X = TRAINING_INPUTS[food](predictions)
+        for size in args.sizes:
+            batch = take_rows(X, rng.integers(0, X.shape[0], size))
+            repeat = max(3, args.repeat // max(1, size // 100))
+            before = median_ms(lambda: model.predict_proba(batch), repeat)
+            after = median_ms(lambda: compiled.predict_proba(batch), repeat)
+            mismatches += int(np.sum(np.asarray(model.predict(batch)) != compiled.predict(batch)))
+            print(f"{food:<8}{size:>6}{before:>10.3f}ms{after:>10.3f}ms{before / after:>8.1f}x")
+    print(f"predicted classes differing: {mismatches}")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
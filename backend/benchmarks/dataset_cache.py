@@ -0,0 +1,91 @@
+"""
+Loading the training CSVs through the dataset cache vs parsing them with
+pandas. For each CSV: a full parse (text columns made categorical, as the cache
+stores them), the first cached read (parse + write the columnar copy) and a
+warm cached read, with every column touched so the memory-mapped pages are
+really read. Then each training design matrix is built with the cache off and
+on. --scale N also times the rice CSV repeated N times, to show how the cost
+grows with the file. The cache is written to a temporary directory, and every
+cached frame is checked against the parsed one.
+
+    python -m benchmarks.dataset_cache [--repeat 5] [--scale 200]
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import dataset_cache
+from dataset_cache import BACKEND_DIR, cached_copy, frames_equal, load_frame, read_csv, typed_frame
+
+
+def best_ms(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def touch(frame):
+    for column in frame.columns:
+        values = frame[column]
+        np.asarray(values.cat.codes if values.dtype == 'category' else values).sum()
+    return frame
+
+
+def time_source(source, cache_dir, repeat):
+    parse_ms = best_ms(lambda: touch(typed_frame(read_csv(source))), repeat)
+    start = time.perf_counter()
+    path, built = cached_copy(source, cache_dir)
+    first_ms = (time.perf_counter() - start) * 1000
+    assert built
+    warm_ms = best_ms(lambda: touch(load_frame(cached_copy(source, cache_dir)[0])), repeat)
+    assert frames_equal(load_frame(path), read_csv(source)), source
+    return parse_ms, first_ms, warm_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='best of N for each timing')
+    parser.add_argument('--scale', type=int, default=200, help='also time the rice CSV repeated N times (0: skip)')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.join(BACKEND_DIR, 'ML'))
+    import training
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, 'cache')
+        sources = sorted(glob.glob(os.path.join(BACKEND_DIR, 'ML', '*', '*.csv')))
+        read_csv(sources[0]) # warm up pandas
+        if args.scale:
+            rice = read_csv(os.path.join(BACKEND_DIR, 'ML', 'rice', 'rice_spoilage_dataset.csv'))
+            scaled = os.path.join(tmp, f'rice_x{args.scale}.csv')
+            rice.iloc[np.tile(np.arange(len(rice)), args.scale)].to_csv(scaled, index=False)
+            sources.append(scaled)
+
+        print(f"--- {'Feather' if dataset_cache.have_pyarrow() else '.npy'} columns, best of {args.repeat} ---")
+        print(f"{'csv':<42} {'MB':>6} {'parse ms':>9} {'first ms':>9} {'cached ms':>10} {'speedup':>8}")
+        for source in sources:
+            parse_ms, first_ms, warm_ms = time_source(source, cache_dir, args.repeat)
+            label = os.path.relpath(source, BACKEND_DIR) if source.startswith(BACKEND_DIR) else os.path.basename(source)
+            print(f"{label:<42} {os.path.getsize(source) / 1e6:>6.1f} {parse_ms:>9.2f} {first_ms:>9.2f} {warm_ms:>10.2f} "
+                  f"{parse_ms / warm_ms:>7.1f}x")
+
+        print(f"{'design matrix':<42} {'cache off ms':>12} {'cache on ms':>12} {'speedup':>8}")
+        for food in ('rice', 'milk', 'paneer'):
+            dataset_cache.CACHE_DIR = ''
+            off_ms = best_ms(training.FOODS[food].design, args.repeat)
+            dataset_cache.CACHE_DIR = cache_dir
+            training.FOODS[food].design() # build the copy
+            on_ms = best_ms(training.FOODS[food].design, args.repeat)
+            print(f"{food:<42} {off_ms:>12.2f} {on_ms:>12.2f} {off_ms / on_ms:>7.1f}x")
+    print("--- every cached frame matches its CSV ---")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+/api/forecast against the round trips it replaces: for items from each
+food's dataset, one forecast call vs re-submitting the item to its predict
+route at every step up to the cap (prediction cache off). Every step of
+every curve is checked against the single route's answer.
+
+    python -m benchmarks.forecast [--items 10] [--foods rice milk ...]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.routes import DAL_VOCABULARY, DATASET_ROUTES, load_rows
+
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+os.environ['LOG_SINK'] = 'memory'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=10, help='items per food')
+    parser.add_argument('--foods', nargs='+', default=['rice', 'milk', 'paneer', 'dal', 'roti'])
+    args = parser.parse_args()
+
+    import app
+    from blueprints import predictions
+    client = app.app.test_client()
+
+    print(f"--- {args.items} items per food, prediction cache off ---")
+    print(f"{'food':<8} {'steps/item':>10} {'forecast ms':>12} {'single calls ms':>16} {'speedup':>8}")
+    for food in args.foods:
+        path, dataset, label = DATASET_ROUTES[f'predict_{food}']
+        field = predictions.FORECAST_AXES[food][0]
+        bodies = load_rows(dataset, label, DAL_VOCABULARY if food == 'dal' else None)
+        predictions.models.get(food, wait=True)
+        client.post('/api/forecast', json={'food': food, **bodies[0]}) # warm up
+        forecast_s = singles_s = steps = 0
+        for body in bodies[:args.items]:
+            start = time.perf_counter()
+            response = client.post('/api/forecast', json={'food': food, **body})
+            forecast_s += time.perf_counter() - start
+            assert response.status_code == 200, (body, response.get_json())
+            curve = response.get_json()
+            steps += curve['count']
+            start = time.perf_counter()
+            answers = [client.post(path, json={**body, field: step[curve['unit']]}).get_json() for step in curve['steps']]
+            singles_s += time.perf_counter() - start
+            for step, answer in zip(curve['steps'], answers):
+                assert step['status'] == answer['status'] and step['is_safe'] == answer['is_safe'], (food, body, step, answer)
+        n = min(args.items, len(bodies))
+        print(f"{food:<8} {steps / n:>10.1f} {forecast_s / n * 1000:>12.2f} {singles_s / n * 1000:>16.2f} "
+              f"{singles_s / forecast_s:>7.1f}x")
+    print("--- every step matches the single route ---")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Cold-start import check. Runs `python -X importtime -c "import app"` in a fresh
+interpreter for each blueprint set (see BLUEPRINTS in app.py), and reports the
+import time of app and the slowest modules it pulled in. Exits 1 if any set
+goes over its budget in import_budget.json, or imports one of the modules that
+must only load on first use (ML libraries, Google / Firebase SDKs), so a
+regression in startup time fails the run.
+
+    python -m benchmarks.import_time [--runs 5] [--top 5]
+    python -m benchmarks.import_time --update   # rewrite the budgets from this machine
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.startup import BACKEND_DIR
+
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_budget.json')
+CONFIGS = {
+    'all': {},
+    'predictions': {'BLUEPRINTS': 'predictions'},
+    'chat': {'BLUEPRINTS': 'chat'},
+    'auth': {'BLUEPRINTS': 'auth'},
+    'ngo': {'BLUEPRINTS': 'ngo'},
+    'inference': {'SERVER_PROFILE': 'inference'},
+}
+BUDGET_HEADROOM = 1.5 # --update sets each budget to 1.5x the measured time
+
+
+def parse_importtime(stderr):
+    """[(module, depth, self_us, cumulative_us)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_once(config):
+    env = dict(os.environ, MODEL_LOADING='lazy', LOG_SINK='memory', **CONFIGS[config])
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    rows = parse_importtime(proc.stderr)
+    # A module's line comes after its own imports, so app's imports are the rows
+    # between the previous top-level line (site and friends) and app's line.
+    end = next(i for i, r in enumerate(rows) if r[0] == 'app' and r[1] == 0)
+    start = max((i + 1 for i, r in enumerate(rows[:end]) if r[1] == 0), default=0)
+    under_app = rows[start:end]
+    return {
+        'import_ms': rows[end][3] / 1000,
+        'modules': [r[0] for r in under_app],
+        'slowest': sorted(((r[0], r[3] / 1000) for r in under_app if r[1] == 1), key=lambda r: -r[1])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--configs', nargs='+', default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--update', action='store_true', help='write new budgets to import_budget.json')
+    args = parser.parse_args()
+
+    with open(BUDGET_PATH, 'r') as f:
+        budget = json.load(f)
+    forbidden = budget['forbidden_modules']
+
+    failures = []
+    measured = {}
+    print(f"{'blueprints':<13}{'import':>10}{'budget':>10}{'modules':>9}  slowest imports")
+    for config in args.configs:
+        best = min((run_once(config) for _ in range(args.runs)), key=lambda r: r['import_ms'])
+        measured[config] = best['import_ms']
+        limit = budget['max_import_ms'].get(config)
+        slowest = ', '.join(f"{name} {ms:.0f}ms" for name, ms in best['slowest'][:args.top])
+        print(f"{config:<13}{best['import_ms']:>8.0f}ms{limit if limit is not None else '-':>8}ms{len(best['modules']):>9}  {slowest}")
+        if limit is not None and best['import_ms'] > limit and not args.update:
+            failures.append(f"{config}: import took {best['import_ms']:.0f}ms, budget is {limit}ms")
+        eager = sorted({m for m in best['modules'] if any(m == f or m.startswith(f + '.') for f in forbidden)})
+        if eager:
+            failures.append(f"{config}: imported at startup: {', '.join(eager[:8])}{' ...' if len(eager) > 8 else ''}")
+
+    if args.update:
+        for config, ms in measured.items():
+            budget['max_import_ms'][config] = int(ms * BUDGET_HEADROOM // 10 * 10 + 10)
+        with open(BUDGET_PATH, 'w') as f:
+            json.dump(budget, f, indent=2)
+            f.write('\n')
+        print(f"--- Wrote {BUDGET_PATH} ---")
+    for failure in failures:
+        print(f"❌ {failure}")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
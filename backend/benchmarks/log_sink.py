@@ -0,0 +1,50 @@
+"""
+Shows that /api/predict latency does not depend on how slow the log backend is.
+Runs the rice route against the in-memory log writer with increasing simulated
+commit latency and prints p50/p99 request latency for each.
+
+    python -m benchmarks.log_sink [--requests 500]
+"""
+import argparse
+import os
+import time
+
+os.environ['LOG_SINK'] = 'memory'
+
+from benchmarks.startup import SAMPLE_REQUESTS
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--delays-ms', type=float, nargs='+', default=[0, 50, 250])
+    args = parser.parse_args()
+
+    import app
+    import services
+    log_sink = services.log_sink.get()
+    client = app.app.test_client()
+    payload = SAMPLE_REQUESTS['/api/predict']
+    client.post('/api/predict', json=payload) # load the model
+
+    print(f"{'commit delay':>13}{'p50':>10}{'p99':>10}  sink stats")
+    for delay_ms in args.delays_ms:
+        log_sink.writer.delay = delay_ms / 1000.0
+        samples = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            client.post('/api/predict', json=payload)
+            samples.append(time.perf_counter() - start)
+        log_sink.flush(timeout=60)
+        stats = log_sink.stats()
+        print(f"{delay_ms:>11.0f}ms{percentile(samples, 0.5) * 1e3:>8.2f}ms{percentile(samples, 0.99) * 1e3:>8.2f}ms"
+              f"  written={stats['written']} commits={stats['commits']} dropped={stats['dropped']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+/api/notify-ngo sending each email inside the request (MAIL_QUEUE_SIZE=0)
+versus handing it to the delivery queue, against the local SMTP stand-in
+with a simulated connection setup (TLS handshake + login) and per-message
+delivery time. Reports request latency, the time until every email has been
+accepted by the server, and how many SMTP connections it took. A last run
+injects temporary failures and dropped connections and checks every email
+still arrives, exactly once.
+
+    python -m benchmarks.mail_queue [--requests 50] [--connect-ms 300] [--deliver-ms 50]
+"""
+import argparse
+import os
+import time
+
+os.environ['LOG_SINK'] = 'memory'
+os.environ['SMTP_SSL'] = '0'
+os.environ.setdefault('EMAIL_SENDER', 'bench@example.com')
+os.environ.setdefault('EMAIL_APP_PASSWORD', 'bench')
+os.environ['MAIL_RETRY_SECONDS'] = '0.05'
+
+from stubs.smtp import FakeSmtpServer
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def donation(i):
+    return {'ngo_name': f'NGO {i}', 'foodDetails': 'Paneer, 2 kg', 'pickupAddress': 'Pune',
+            'donorContact': '555-0100'}
+
+
+def run(client, smtp, n, expect):
+    """Posts n donations; returns (request latencies, seconds until smtp has them all)."""
+    start = time.perf_counter()
+    samples = []
+    for i in range(n):
+        t = time.perf_counter()
+        res = client.post('/api/notify-ngo', json=donation(i))
+        samples.append(time.perf_counter() - t)
+        assert res.status_code == expect, (res.status_code, res.get_json())
+    while len(smtp.messages) < n:
+        time.sleep(0.001)
+    return samples, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--connect-ms', type=float, default=300.0)
+    parser.add_argument('--deliver-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    smtp = FakeSmtpServer(delay=args.deliver_ms / 1000.0, connect_delay=args.connect_ms / 1000.0).start()
+    os.environ['SMTP_HOST'], os.environ['SMTP_PORT'] = smtp.host, str(smtp.port)
+    try:
+        import app
+        from blueprints import ngo
+        client = app.app.test_client()
+        n = args.requests
+
+        print(f"--- {n} notifications, {args.connect_ms:.0f} ms connect+login, {args.deliver_ms:.0f} ms per message ---")
+        print(f"{'mode':<8} {'p50 ms':>8} {'p95 ms':>8} {'delivered s':>12} {'connections':>12} {'logins':>7}")
+        for label, queued in (('inline', False), ('queued', True)):
+            smtp.messages.clear()
+            smtp.connections = smtp.logins = 0
+            queue = ngo.make_mail_queue() if queued else None
+            ngo.mail_queue.set(queue)
+            samples, delivered = run(client, smtp, n, 202 if queued else 200)
+            print(f"{label:<8} {percentile(samples, 0.5) * 1000:>8.1f} {percentile(samples, 0.95) * 1000:>8.1f} "
+                  f"{delivered:>12.2f} {smtp.connections:>12} {smtp.logins:>7}")
+
+        # Failure injection: 421 replies, then dropped connections, each hitting a third of the batch
+        smtp.messages.clear()
+        smtp.connections = smtp.logins = 0
+        retries_before = queue.stats()['retries']
+        job_ids = []
+        for i in range(n):
+            if i in (n // 3, 2 * n // 3):
+                assert queue.flush(60), 'queue did not drain'
+                smtp.fail_next(3, mode='421' if i == n // 3 else 'disconnect')
+            job_ids.append(client.post('/api/notify-ngo', json=donation(i)).get_json()['jobId'])
+        assert queue.flush(60), 'queue did not drain'
+        states = [client.get(f'/api/notify-ngo/{job_id}').get_json()['state'] for job_id in job_ids]
+        names = sorted(raw.split(b'Subject: ')[1].split(b'\n')[0] for _, _, raw in smtp.messages)
+        stats = client.get('/api/mail/status').get_json()
+        print(f"--- failures: {states.count('sent')}/{n} sent, {len(smtp.messages)} received "
+              f"({len(set(names))} distinct), {stats['retries'] - retries_before} retries, {smtp.connections} connections ---")
+        assert states.count('sent') == n and len(set(names)) == n == len(smtp.messages)
+        queue.close()
+    finally:
+        smtp.stop()
+
+
+if __name__ == '__main__':
+    main()
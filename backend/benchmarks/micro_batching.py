@@ -0,0 +1,91 @@
+"""
+Throughput and latency of one single-item predict route under concurrent
+clients, with the model calls micro-batched over a range of windows.
+Each client is a thread with its own Flask test client, sending rows of the
+food's dataset back to back. The prediction cache is off, so every request
+reaches the model. Window 0 is the unbatched baseline, and every response at
+the other windows is checked against it.
+
+    python -m benchmarks.micro_batching [--food rice] [--clients 1 8] [--windows 0 1 2 5] [--requests 100]
+"""
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.routes import DAL_VOCABULARY, DATASET_ROUTES, load_rows
+
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+os.environ['LOG_SINK'] = 'memory'
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(app, path, bodies, clients, requests):
+    """(wall seconds, latencies, {row index: response json}) for `clients` threads of `requests` each."""
+    barrier = threading.Barrier(clients + 1)
+    latencies, responses = [], {}
+
+    def client(c):
+        test_client = app.test_client()
+        barrier.wait()
+        for r in range(requests):
+            i = (c * requests + r) % len(bodies)
+            start = time.perf_counter()
+            response = test_client.post(path, json=bodies[i])
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, (bodies[i], response.get_json())
+            responses[i] = response.get_json()
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, responses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--food', default='rice', choices=['rice', 'milk', 'paneer', 'dal', 'roti'])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--windows', type=float, nargs='+', default=[0, 1, 2, 5])
+    parser.add_argument('--max-items', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=100, help='per client')
+    args = parser.parse_args()
+
+    import app
+    from blueprints import predictions
+    from micro_batcher import MicroBatcher
+    route = f'predict_{args.food}'
+    path, dataset, label = DATASET_ROUTES[route]
+    bodies = load_rows(dataset, label, DAL_VOCABULARY if args.food == 'dal' else None)
+    predictions.models.get(args.food, wait=True)
+    unbatched = predictions.micro_batchers[args.food]
+
+    print(f"--- {path}, {args.requests} requests per client, prediction cache off ---")
+    print(f"{'clients':>7} {'window ms':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean batch':>10}")
+    expected = {}
+    for clients in args.clients:
+        for window in args.windows:
+            batcher = MicroBatcher(unbatched.predict, window_ms=window, max_items=args.max_items)
+            predictions.micro_batchers[args.food] = batcher
+            run(app.app, path, bodies, clients, 5) # warm up
+            batcher._stats = dict.fromkeys(batcher._stats, 0)
+            wall, latencies, responses = run(app.app, path, bodies, clients, args.requests)
+            for i, body in responses.items():
+                assert expected.setdefault(i, body) == body, (bodies[i], expected[i], body)
+            mean_batch = batcher.stats()['mean_size'] if batcher.enabled else 1.0
+            print(f"{clients:>7} {window:>9g} {len(latencies) / wall:>8.0f} {percentile(latencies, 0.5) * 1000:>8.2f} "
+                  f"{percentile(latencies, 0.95) * 1000:>8.2f} {percentile(latencies, 0.99) * 1000:>8.2f} {mean_batch:>10.1f}")
+    predictions.micro_batchers[args.food] = unbatched
+    print(f"--- all {len(expected)} distinct rows got the same answer at every window ---")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+/api/get-ngos with and without the geohash tile cache, against the fake Maps
+client with a simulated round trip. The trace is synthetic: requests cluster
+around a few neighbourhoods per city, as real users do. Also replays the trace
+against a fresh cache opened on the same SQLite file (a restart).
+
+"recall" is the share of the direct 5 km call's results that the cached
+answer also returns.
+
+    python -m benchmarks.ngo_cache [--requests 2000] [--maps-ms 120]
+"""
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+
+os.environ['MAPS_BACKEND'] = 'fake'
+os.environ['LOG_SINK'] = 'memory'
+
+from stubs.maps import CITY_CENTRES
+
+
+def synthetic_trace(n, seed=0, hotspots_per_city=6, spread_m=1500.0):
+    rng = random.Random(seed)
+    hotspots = []
+    for lat, lng in CITY_CENTRES.values():
+        for _ in range(hotspots_per_city):
+            r, theta = 15000 * rng.random(), rng.uniform(0, 2 * math.pi)
+            hotspots.append((lat + r * math.cos(theta) / 111320.0,
+                             lng + r * math.sin(theta) / (111320.0 * math.cos(math.radians(lat)))))
+    trace = []
+    for _ in range(n):
+        lat, lng = rng.choice(hotspots)
+        trace.append((lat + rng.gauss(0, spread_m) / 111320.0,
+                      lng + rng.gauss(0, spread_m) / (111320.0 * math.cos(math.radians(lat)))))
+    return trace
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def replay(client, trace):
+    samples, answers = [], []
+    for lat, lng in trace:
+        start = time.perf_counter()
+        answers.append(client.get(f'/api/get-ngos?lat={lat}&lng={lng}').get_json())
+        samples.append(time.perf_counter() - start)
+    return samples, answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--maps-ms', type=float, default=120.0)
+    args = parser.parse_args()
+
+    import app
+    import services
+    from blueprints import ngo
+    gmaps = services.maps.get()
+    from ngo_cache import NgoTileCache
+    gmaps.latency = args.maps_ms / 1000.0
+    client = app.app.test_client()
+    trace = synthetic_trace(args.requests)
+    path = os.path.join(tempfile.mkdtemp(), 'ngo_tiles.sqlite3')
+
+    def make_cache():
+        return NgoTileCache(ngo.fetch_ngos, radius_m=ngo.NGO_SEARCH_RADIUS_M, ttl_seconds=86400, path=path)
+
+    runs = {}
+    for label, cache in (('direct', None), ('cache', make_cache()), ('restarted', 'reopen')):
+        if cache == 'reopen':
+            cache = make_cache()
+        ngo.ngo_cache.set(cache)
+        calls_before = gmaps.calls
+        samples, answers = replay(client, trace)
+        runs[label] = (samples, answers, gmaps.calls - calls_before, cache.stats() if cache else None)
+
+    direct = runs['direct'][1]
+    print(f"{args.requests} requests, {args.maps_ms:.0f}ms per Maps call")
+    print(f"{'':>10}{'Maps calls':>12}{'hit ratio':>11}{'p50':>10}{'p99':>10}{'recall':>9}{'avg results':>13}")
+    for label, (samples, answers, calls, stats) in runs.items():
+        recall = [len({n['id'] for n in a} & {n['id'] for n in d}) / len(d) for a, d in zip(answers, direct) if d]
+        print(f"{label:>10}{calls:>12}{(stats or {}).get('hit_ratio', 0.0) or 0.0:>11}"
+              f"{percentile(samples, 0.5) * 1e3:>8.1f}ms{percentile(samples, 0.99) * 1e3:>8.1f}ms"
+              f"{sum(recall) / len(recall):>9.3f}{sum(len(a) for a in answers) / len(answers):>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+p50/p99 latency of /api/predict/paneer with the compiled encoder, against the
+previous DataFrame / get_dummies handler (rebuilt here from encoders.py's
+parity reference, predict + predict_proba and all) mounted on a side route.
+The prediction cache is off so every request reaches the model. Also checks
+both handlers return the same response for every payload.
+
+    python -m benchmarks.paneer [--requests 2000]
+"""
+import argparse
+import itertools
+import os
+import random
+import time
+
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+os.environ['LOG_SINK'] = 'memory'
+
+from encoders import PANEER_CATEGORIES, _paneer_features_pandas
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def mount_legacy_route(app_module, predictions):
+    from flask import request, jsonify
+
+    def predict_paneer_legacy():
+        paneer = predictions.models.get('paneer')
+        paneer_model, paneer_model_columns = paneer['model'], paneer['columns']
+        data = request.get_json()
+        final_input_df = _paneer_features_pandas(paneer_model_columns, predictions.paneer_smell_map,
+                                                 predictions.paneer_texture_map, data)
+        prediction_code = paneer_model.predict(final_input_df)[0]
+        prediction_proba = paneer_model.predict_proba(final_input_df)[0]
+        confidence = max(prediction_proba) * 100
+        status = predictions.paneer_status_map.get(int(prediction_code), "Unknown")
+        return jsonify({
+            'status': status, 'message': f"Prediction: {status}. Confidence: {confidence:.2f}%",
+            'is_safe': bool(int(prediction_code) < 3), 'prediction_code': int(prediction_code),
+            'confidence': f"{confidence:.2f}%"
+        })
+
+    app_module.app.add_url_rule('/bench/paneer_legacy', 'predict_paneer_legacy', predict_paneer_legacy, methods=['POST'])
+
+
+def payloads(n, seed=0):
+    rng = random.Random(seed)
+    from blueprints import predictions
+    combos = list(itertools.product(predictions.paneer_smell_map, predictions.paneer_texture_map, *PANEER_CATEGORIES.values()))
+    out = []
+    for _ in range(n):
+        smell, texture, cooked, ptype, storage, container = rng.choice(combos)
+        data = {'days_since_purchase_or_cooked': round(rng.uniform(0, predictions.PANEER_DAYS_CAP), 1), 'is_cooked': cooked,
+                'paneer_type': ptype, 'storage_location': storage, 'observed_smell': smell, 'texture_surface': texture}
+        if container is not None:
+            data['storage_container_raw'] = container
+        out.append(data)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    import app
+    from blueprints import predictions
+    mount_legacy_route(app, predictions)
+    client = app.app.test_client()
+    predictions.models.get('paneer', wait=True)
+    batch = payloads(args.requests)
+
+    timings, responses = {}, {}
+    for label, url in (('before', '/bench/paneer_legacy'), ('after', '/api/predict/paneer')):
+        client.post(url, json=batch[0]) # warm up
+        samples, bodies = [], []
+        for data in batch:
+            start = time.perf_counter()
+            bodies.append(client.post(url, json=data).get_json())
+            samples.append(time.perf_counter() - start)
+        timings[label], responses[label] = samples, bodies
+
+    differing = sum(a != b for a, b in zip(responses['before'], responses['after']))
+    print(f"{args.requests} paneer requests, prediction cache off")
+    print(f"{'':>8}{'p50':>10}{'p99':>10}")
+    for label, samples in timings.items():
+        print(f"{label:>8}{percentile(samples, 0.5) * 1e3:>8.2f}ms{percentile(samples, 0.99) * 1e3:>8.2f}ms")
+    print(f"responses differing: {differing}")
+    raise SystemExit(1 if differing else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Memory of the pre-fork server (gunicorn.conf.py) with and without shared models.
+Starts gunicorn with N workers in each mode, sends every predict route a few
+hundred requests so each worker has served traffic, then reads each process's
+/proc/<pid>/smaps_rollup:
+
+    per-worker       PRELOAD_MODELS=0: each worker loads its own models
+    preload          models loaded once in the master, no gc.freeze
+    preload+freeze   the default: models loaded in the master, gc frozen before the fork
+
+USS is the memory only that process holds (private pages), PSS splits shared
+pages between the processes using them, so the PSS total is what the whole
+server really costs. Workers run a full gc.collect() every --gc-every requests,
+standing in for the full collections a long-running worker eventually does.
+
+    python -m benchmarks.prefork_memory [--workers 4] [--requests 400]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.startup import BACKEND_DIR, SAMPLE_REQUESTS
+
+MODES = {
+    'per-worker': {'PRELOAD_MODELS': '0'},
+    'preload': {'PRELOAD_MODELS': '1', 'GC_FREEZE': '0'},
+    'preload+freeze': {'PRELOAD_MODELS': '1', 'GC_FREEZE': '1'},
+}
+
+# gunicorn.conf.py plus a post_request hook that runs a full collection now and then
+CONFIG = '''
+exec(compile(open({path!r}).read(), {path!r}, 'exec'))
+
+def post_request(worker, req, environ, resp):
+    if worker.nr % {gc_every} == 0:
+        gc.collect()
+'''
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def children(pid):
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        if int(stat.rsplit(')', 1)[1].split()[1]) == pid:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def memory_mb(pid):
+    """Rss, Pss and Uss (private clean + dirty) of a process, in MB."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {'rss': fields['Rss'], 'pss': fields['Pss'], 'uss': fields['Private_Clean'] + fields['Private_Dirty']}
+
+
+def post(port, url, payload):
+    req = urllib.request.Request(f'http://127.0.0.1:{port}{url}', data=json.dumps(payload).encode(),
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.status
+
+
+def wait_ready(proc, port, workers, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {proc.returncode}")
+        if len(children(proc.pid)) >= workers:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/models/status', timeout=5) as resp:
+                    states = {m['status'] for m in json.load(resp)['models'].values()}
+                if states == {'ready'}:
+                    return
+            except OSError:
+                pass
+        time.sleep(0.2)
+    raise RuntimeError('gunicorn did not become ready in time')
+
+
+def run_mode(mode, args):
+    port = free_port()
+    with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as config:
+        config.write(CONFIG.format(path=os.path.join(BACKEND_DIR, 'gunicorn.conf.py'), gc_every=args.gc_every))
+    env = dict(os.environ, WEB_CONCURRENCY=str(args.workers), GUNICORN_BIND=f'127.0.0.1:{port}',
+               LOG_SINK='memory', **MODES[mode])
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', config.name, 'app:app'],
+                            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(proc, port, args.workers)
+        before = {pid: memory_mb(pid) for pid in children(proc.pid)}
+        calls = [item for _ in range(args.requests // len(SAMPLE_REQUESTS)) for item in SAMPLE_REQUESTS.items()]
+        with ThreadPoolExecutor(max_workers=args.workers * 2) as pool:
+            statuses = list(pool.map(lambda item: post(port, *item), calls))
+        workers = children(proc.pid)
+        return {
+            'master': memory_mb(proc.pid),
+            'workers': {pid: {'booted': before.get(pid), 'served': memory_mb(pid)} for pid in workers},
+            'errors': sum(1 for s in statuses if s != 200)
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        os.unlink(config.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=400, help='predict requests sent to the server, over all routes')
+    parser.add_argument('--gc-every', type=int, default=25, help='requests between full collections in each worker')
+    parser.add_argument('--json', action='store_true', help='print raw results as JSON')
+    args = parser.parse_args()
+
+    report = {mode: run_mode(mode, args) for mode in args.modes}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'mode':<16}{'worker USS booted':>19}{'worker USS served':>19}{'worker RSS':>12}{'master RSS':>12}{'total PSS':>11}")
+    for mode, r in report.items():
+        workers = list(r['workers'].values())
+        booted = sum(w['booted']['uss'] for w in workers if w['booted']) / len(workers)
+        served = sum(w['served']['uss'] for w in workers) / len(workers)
+        rss = sum(w['served']['rss'] for w in workers) / len(workers)
+        total_pss = r['master']['pss'] + sum(w['served']['pss'] for w in workers)
+        print(f"{mode:<16}{booted:>16.1f} MB{served:>16.1f} MB{rss:>9.1f} MB{r['master']['rss']:>9.1f} MB{total_pss:>8.1f} MB")
+    print(f"(averages over {args.workers} workers; USS = private to the worker, PSS total = master + workers)")
+    failed = [mode for mode, r in report.items() if r['errors']]
+    for mode in failed:
+        print(f"❌ {mode}: {report[mode]['errors']} requests failed")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Import time and memory of app.py under each server profile: the full server
+(pickled models, or PREDICTION_MODE=compiled) and SERVER_PROFILE=inference
+(portable models, no pandas / sklearn / xgboost / Google SDKs). Each profile
+runs in a fresh interpreter. RSS is read from /proc after importing app, and
+again after every model is loaded and each predict route has answered once.
+Fails if the inference profile imported any of the heavy modules.
+
+    python -m benchmarks.profiles [--runs 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.startup import BACKEND_DIR, SAMPLE_REQUESTS
+
+PROFILES = {
+    'full': {'SERVER_PROFILE': 'full', 'PREDICTION_MODE': 'model'},
+    'full+compiled': {'SERVER_PROFILE': 'full', 'PREDICTION_MODE': 'compiled'},
+    'inference': {'SERVER_PROFILE': 'inference', 'PREDICTION_MODE': 'model'},
+}
+HEAVY_MODULES = ['pandas', 'sklearn', 'joblib', 'xgboost', 'scipy', 'google.generativeai', 'firebase_admin', 'googlemaps']
+
+# Runs inside the child interpreter; prints one JSON line with the measurements.
+CHILD = r'''
+import json, sys, time
+def status_mb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+t0 = time.perf_counter()
+import app
+t_import = time.perf_counter() - t0
+rss_import = status_mb('VmRSS')
+from blueprints import predictions
+predictions.models.warm(wait=True)
+client = app.app.test_client()
+statuses = {}
+for url, payload in json.loads(sys.argv[1]).items():
+    statuses[url] = client.post(url, json=payload).status_code
+heavy = [m for m in json.loads(sys.argv[2]) if m in sys.modules]
+print(json.dumps({'import': t_import, 'rss_import': rss_import, 'rss_serving': status_mb('VmRSS'),
+                  'peak': status_mb('VmHWM'), 'modules': len(sys.modules), 'heavy': heavy, 'statuses': statuses}))
+'''
+
+
+def run_once(profile):
+    env = dict(os.environ, MODEL_LOADING='lazy', LOG_SINK='memory', **PROFILES[profile])
+    proc = subprocess.run(
+        [sys.executable, '-c', CHILD, json.dumps(SAMPLE_REQUESTS), json.dumps(HEAVY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='print raw results as JSON')
+    args = parser.parse_args()
+
+    report = {}
+    for profile in args.profiles:
+        runs = [run_once(profile) for _ in range(args.runs)]
+        report[profile] = min(runs, key=lambda r: r['import'])
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'profile':<15}{'import':>9}{'RSS import':>13}{'RSS serving':>14}{'peak':>10}{'modules':>9}  heavy modules")
+        for profile, r in report.items():
+            print(f"{profile:<15}{r['import']:>8.2f}s{r['rss_import']:>10.1f} MB{r['rss_serving']:>11.1f} MB"
+                  f"{r['peak']:>7.1f} MB{r['modules']:>9}  {', '.join(r['heavy']) or '-'}")
+
+    failed = False
+    for profile, r in report.items():
+        errors = {url: status for url, status in r['statuses'].items() if status != 200}
+        if errors:
+            print(f"❌ {profile}: predict routes failed {errors}")
+            failed = True
+    if 'inference' in report and report['inference']['heavy']:
+        print(f"❌ inference profile imported {', '.join(report['inference']['heavy'])}")
+        failed = True
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
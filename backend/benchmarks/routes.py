@@ -0,0 +1,287 @@
+"""
+End-to-end benchmark of every backend route, in process, on the Flask app
+from app.py. Firestore, Gemini and Maps are the offline fakes, and mail goes
+to the local SMTP stand-in, each with its own simulated latency. The predict
+routes are driven with rows of the bundled datasets (ML/<food>/*.csv, minus
+the label column; dal's translated to the model's categories), in order; the
+other routes with generated users, locations and donations.
+
+For each route: p50/p95/p99 latency, requests per second (one client, back to
+back) and the peak memory allocated while serving a request (tracemalloc, in
+a separate, shorter pass so tracing doesn't slow the timed one). Results are
+compared with routes_baseline.json when it exists; --save rewrites it,
+--check exits 1 if a route's p50 got more than --tolerance slower. Other
+settings (PREDICTION_MODE, PREDICTION_CACHE_SIZE, ...) come from the
+environment, as for the server.
+
+    python -m benchmarks.routes [--requests 200] [--latency-ms 20] [--routes predict_milk chat ...]
+    python -m benchmarks.routes --save             # record this run as the baseline
+    python -m benchmarks.routes --output run.json  # also write this run's results
+"""
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ['FIRESTORE_BACKEND'] = 'fake'
+os.environ['GEMINI_BACKEND'] = 'fake'
+os.environ['MAPS_BACKEND'] = 'fake'
+os.environ['FAKE_LATENCY_SECONDS'] = '0' # set per service below
+os.environ['LOG_SINK'] = 'firestore' # prediction/chat logs go to the fake Firestore in the background
+os.environ['NGO_CACHE_PATH'] = ''
+os.environ['SMTP_SSL'] = '0'
+os.environ.setdefault('EMAIL_SENDER', 'bench@example.com')
+os.environ.setdefault('EMAIL_APP_PASSWORD', 'bench')
+
+from benchmarks.startup import BACKEND_DIR
+from bulk_score import DATASET_VOCABULARY
+from stubs.smtp import FakeSmtpServer
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'routes_baseline.json')
+
+# Route name -> (path, dataset, label column); the dataset's other columns are the request body
+DATASET_ROUTES = {
+    'predict_rice': ('/api/predict', 'ML/rice/rice_spoilage_dataset.csv', 'Spoilage_Index'),
+    'predict_milk': ('/api/predict_milk', 'ML/milk/milk_spoilage_dataset.csv', 'Spoilage_Index'),
+    'predict_paneer': ('/api/predict/paneer', 'ML/paneer/paneer_spoilage_dataset.csv', 'paneer_state'),
+    'predict_dal': ('/api/predict_dal', 'ML/dal/dal_spoilage_dataset .csv', 'Spoiled_flag'),
+    'predict_roti': ('/api/predict_roti', 'ML/roti/roti_spoilage_dataset.csv', 'roti_state'),
+}
+# The dal dataset's rows are translated to the dal model's categories, as bulk_score.py does
+DAL_VOCABULARY = DATASET_VOCABULARY['dal']
+BATCH_SIZE = 50
+CHAT_MESSAGES = ['I have leftover rice and dal, what can I make?', 'Is 2 day old paneer safe?',
+                 'Give me a Jain recipe with roti', 'How do I store cooked rice?']
+CITIES = [(19.076, 72.8777), (28.6139, 77.209), (12.9716, 77.5946), (18.5204, 73.8567)]
+
+
+def load_rows(path, label, vocabulary=None):
+    """The dataset's rows as request bodies: numbers as numbers, the label column dropped."""
+    vocabulary = vocabulary or {}
+    rows = []
+    with open(os.path.join(BACKEND_DIR, path), newline='', encoding='utf-8') as f:
+        for record in csv.DictReader(f):
+            body = {}
+            for key, value in record.items():
+                if key == label:
+                    continue
+                if key in vocabulary:
+                    body[key] = vocabulary[key][value]
+                    continue
+                try:
+                    body[key] = float(value) if '.' in value else int(value)
+                except ValueError:
+                    body[key] = value
+            rows.append(body)
+    return rows
+
+
+def make_routes(seed=0):
+    """Route name -> endless iterator of (method, path, json body or query string)."""
+    rng = random.Random(seed)
+    datasets = {name: load_rows(path, label, DAL_VOCABULARY if name == 'predict_dal' else None)
+                for name, (_, path, label) in DATASET_ROUTES.items()}
+
+    def rows(path, bodies):
+        for body in itertools.cycle(bodies):
+            yield 'POST', path, body
+
+    routes = {name: rows(path, datasets[name]) for name, (path, _, _) in DATASET_ROUTES.items()}
+
+    def batches():
+        foods = [(name.split('_')[1], bodies) for name, bodies in datasets.items()]
+        while True:
+            items = []
+            for _ in range(BATCH_SIZE):
+                food, bodies = rng.choice(foods)
+                items.append({'food': food, **rng.choice(bodies)})
+            yield 'POST', '/api/predict_batch', items
+
+    def chats():
+        for i in itertools.count():
+            yield 'POST', '/api/chat', {'message': rng.choice(CHAT_MESSAGES), 'mode': rng.choice(['Veg', 'Non-Veg', 'Jain']),
+                                        'userId': f'user-{i % 50}'}
+
+    def ngo_searches():
+        while True:
+            lat, lng = rng.choice(CITIES)
+            yield 'GET', '/api/get-ngos', f'lat={lat + rng.gauss(0, 0.03):.5f}&lng={lng + rng.gauss(0, 0.03):.5f}'
+
+    def donations():
+        for i in itertools.count():
+            yield 'POST', '/api/notify-ngo', {'ngo_name': f'NGO {i % 40}', 'donorContact': '99999 99999',
+                                              'foodDetails': 'Rice, 2 kg', 'pickupAddress': f'{i} Example Road'}
+
+    def signups():
+        for i in itertools.count():
+            yield 'POST', '/api/signup', {'email': f'bench{i}@example.com', 'password': f'pw{i}'}
+
+    def logins():
+        for i in itertools.count():
+            # Users signed up by the signup route, plus the odd unknown email and wrong password
+            k, roll = rng.randrange(100), rng.random()
+            email = f'bench{k}@example.com' if roll < 0.9 else f'nobody{k}@example.com'
+            yield 'POST', '/api/login', {'email': email, 'password': f'pw{k}' if roll < 0.8 else 'wrong'}
+
+    routes.update({'predict_batch': batches(), 'chat': chats(), 'get_ngos': ngo_searches(),
+                   'notify_ngo': donations(), 'signup': signups(), 'login': logins()})
+    return routes
+
+
+def call(client, method, path, body):
+    if method == 'GET':
+        return client.get(f'{path}?{body}' if body else path)
+    return client.post(path, json=body)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(client, requests, n, alloc_n):
+    """Latency stats and peak allocation for n (+ alloc_n) requests from the iterator."""
+    statuses = {}
+    samples = []
+    start = time.perf_counter()
+    for _ in range(n):
+        method, path, body = next(requests)
+        t = time.perf_counter()
+        status = call(client, method, path, body).status_code
+        samples.append(time.perf_counter() - t)
+        statuses[status] = statuses.get(status, 0) + 1
+    elapsed = time.perf_counter() - start
+    peaks = []
+    tracemalloc.start()
+    for _ in range(alloc_n):
+        method, path, body = next(requests)
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        call(client, method, path, body)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return {
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+        'rps': round(n / elapsed, 1),
+        'alloc_kib': round(percentile(peaks, 0.5) / 1024, 1) if peaks else None,
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def change(new, old):
+    if not old or new is None:
+        return ''
+    return f'{(new - old) / old * 100:+.0f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per route')
+    parser.add_argument('--alloc-requests', type=int, default=20, help='requests per route traced for allocations')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='simulated round trip of every stand-in')
+    parser.add_argument('--firestore-ms', type=float)
+    parser.add_argument('--gemini-ms', type=float)
+    parser.add_argument('--maps-ms', type=float)
+    parser.add_argument('--smtp-ms', type=float)
+    parser.add_argument('--routes', nargs='+', help='route names (default: all)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true', help='write this run to --baseline')
+    parser.add_argument('--output', help='also write this run to this JSON file')
+    parser.add_argument('--check', action='store_true', help='exit 1 if a p50 regressed beyond --tolerance')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+    latency = {name: (value if value is not None else args.latency_ms) / 1000.0 for name, value in
+               (('firestore', args.firestore_ms), ('gemini', args.gemini_ms), ('maps', args.maps_ms), ('smtp', args.smtp_ms))}
+
+    smtp = FakeSmtpServer(delay=latency['smtp']).start()
+    os.environ['SMTP_HOST'], os.environ['SMTP_PORT'] = smtp.host, str(smtp.port)
+    try:
+        import app
+        import services
+        from blueprints import chat
+        services.firebase.get()._store.latency = latency['firestore']
+        services.maps.get().latency = latency['maps']
+        for model in chat.chat_models.get().values():
+            model.latency = latency['gemini']
+        client = app.app.test_client()
+
+        routes = make_routes()
+        names = args.routes or list(routes)
+        unknown = set(names) - set(routes)
+        if unknown:
+            parser.error(f"unknown routes: {', '.join(sorted(unknown))} (expected: {', '.join(routes)})")
+
+        results = {}
+        print(f"--- {args.requests} requests per route; stand-in latency (ms): "
+              f"{', '.join(f'{k} {v * 1000:g}' for k, v in latency.items())} ---")
+        print(f"{'route':<16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'alloc KiB':>10}  statuses")
+        for name in names:
+            requests = routes[name]
+            for _ in range(args.warmup): # model loading, first session, first tile
+                call(client, *next(requests))
+            results[name] = r = measure(client, requests, args.requests, args.alloc_requests)
+            print(f"{name:<16} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['rps']:>8.1f} "
+                  f"{r['alloc_kib'] if r['alloc_kib'] is not None else '-':>10}  {r['statuses']}")
+    finally:
+        smtp.stop()
+
+    run = {
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': f'{platform.machine()}, {os.cpu_count()} cpu',
+        'settings': {'requests': args.requests, 'latency_ms': {k: v * 1000 for k, v in latency.items()},
+                     **{k: os.getenv(k) for k in ('PREDICTION_MODE', 'PREDICTION_CACHE_SIZE', 'SERVER_PROFILE') if os.getenv(k)}},
+        'routes': results,
+    }
+
+    regressed = []
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"--- vs baseline {os.path.basename(args.baseline)} ({baseline.get('commit')}, {baseline.get('created_at')}) ---")
+        if baseline.get('settings') != run['settings']:
+            print(f"⚠️ Different settings from the baseline's {baseline.get('settings')}; the numbers may not be comparable")
+        print(f"{'route':<16} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'alloc':>8}")
+        for name, r in results.items():
+            old = baseline['routes'].get(name)
+            if old is None:
+                print(f"{name:<16} (not in baseline)")
+                continue
+            print(f"{name:<16} " + ' '.join(f"{change(r[k], old.get(k)):>8}" for k in ('p50_ms', 'p95_ms', 'p99_ms', 'rps', 'alloc_kib')))
+            if old.get('p50_ms') and r['p50_ms'] > old['p50_ms'] * (1 + args.tolerance):
+                regressed.append(name)
+
+    for path in ([args.baseline] if args.save else []) + ([args.output] if args.output else []):
+        with open(path, 'w') as f:
+            json.dump(run, f, indent=2)
+            f.write('\n')
+        print(f"--- Wrote {path} ---")
+
+    if regressed:
+        print(f"❌ p50 more than {args.tolerance:.0%} slower than the baseline: {', '.join(regressed)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
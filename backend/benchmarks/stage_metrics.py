@@ -0,0 +1,108 @@
+"""
+Overhead of the per-stage timers on the predict routes. First the timer on
+its own: one request's worth of marks (as many as the milk route takes) and
+done(), from one thread and from several at once (they share the lock).
+Then a predict route through the Flask test client with STAGE_METRICS on and
+off, interleaved so drift hits both alike. Exits 1 if a request's timer
+costs more than --budget-us microseconds.
+
+    python -m benchmarks.stage_metrics [--requests 100000] [--threads 4] [--budget-us 5]
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+from stage_metrics import StageMetrics
+
+STAGES = ['parse', 'validate', 'frame', 'scale', 'cache', 'predict', 'log', 'respond']
+PANEER = {
+    'days_since_purchase_or_cooked': 2, 'is_cooked': 'Raw (in a block)', 'paneer_type': 'Packaged/Branded',
+    'storage_location': 'Refrigerator', 'storage_container_raw': 'Original packaging',
+    'observed_smell': 'Normal/Sweetish', 'texture_surface': 'Normal/Firm'
+}
+
+
+def timer_cost(metrics, n):
+    """Seconds per request for n requests' worth of timer calls."""
+    start = time.perf_counter()
+    for _ in range(n):
+        timer = metrics.timer('milk')
+        for stage in STAGES:
+            timer.mark(stage)
+        timer.done('model')
+    return (time.perf_counter() - start) / n
+
+
+def loop_cost(n):
+    """The same loop without the timer, to subtract."""
+    start = time.perf_counter()
+    for _ in range(n):
+        for stage in STAGES:
+            pass
+    return (time.perf_counter() - start) / n
+
+
+def threaded_cost(metrics, n, threads):
+    barrier = threading.Barrier(threads + 1)
+
+    def work():
+        barrier.wait()
+        timer_cost(metrics, n)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (n * threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--route-requests', type=int, default=2000)
+    parser.add_argument('--budget-us', type=float, default=5.0)
+    args = parser.parse_args()
+
+    metrics = StageMetrics()
+    timer_cost(metrics, 1000) # warm up
+    single = timer_cost(metrics, args.requests) - loop_cost(args.requests)
+    threaded = threaded_cost(metrics, args.requests // args.threads, args.threads) - loop_cost(args.requests)
+    off = timer_cost(StageMetrics(enabled=False), args.requests) - loop_cost(args.requests)
+    render_start = time.perf_counter()
+    text = metrics.render()
+    render_ms = (time.perf_counter() - render_start) * 1000
+    print(f"--- Timer, {len(STAGES)} stages + done() per request ---")
+    print(f"1 thread:            {single * 1e6:6.2f} us/request")
+    print(f"{args.threads} threads (shared): {threaded * 1e6:6.2f} us/request (wall time / requests)")
+    print(f"STAGE_METRICS=0:     {off * 1e6:6.2f} us/request")
+    print(f"render():            {render_ms:6.2f} ms for {len(text.splitlines())} lines")
+
+    import app
+    from blueprints import predictions
+    client = app.app.test_client()
+    client.post('/api/predict/paneer', json=PANEER) # load the model
+    samples = {True: [], False: []}
+    for i in range(args.route_requests):
+        enabled = i % 2 == 0
+        predictions.stage_metrics.enabled = enabled
+        start = time.perf_counter()
+        client.post('/api/predict/paneer', json=PANEER)
+        samples[enabled].append(time.perf_counter() - start)
+    predictions.stage_metrics.enabled = True
+    on, off = statistics.median(samples[True]), statistics.median(samples[False])
+    print(f"--- /api/predict/paneer (cached result), {args.route_requests // 2} requests each ---")
+    print(f"p50 with metrics {on * 1e6:.1f} us, without {off * 1e6:.1f} us, difference {(on - off) * 1e6:+.1f} us")
+
+    if single * 1e6 > args.budget_us:
+        print(f"❌ Timer overhead {single * 1e6:.2f} us/request is over the {args.budget_us:g} us budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Startup benchmark: measures import time of app.py and the time until each
+predict route gives its first real (non-"warming") answer, for every
+MODEL_LOADING mode. Each mode runs in a fresh interpreter so nothing is cached.
+
+    python -m benchmarks.startup [--modes eager lazy background] [--runs 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_REQUESTS = {
+    '/api/predict': {
+        'hours_since_cooking': 6, 'initial_hours_at_room_temp': 2, 'storage_location': 'Refrigerator',
+        'cooling_method': 'Cooled in shallow container', 'observed_smell': 'Normal', 'observed_appearance': 'Normal/Glossy'
+    },
+    '/api/predict_milk': {
+        'milk_type': 'Pasteurized (Pouch/Bottle)', 'days_since_open_or_purchase': 2, 'was_boiled': True,
+        'storage_location': 'Refrigerator', 'cumulative_hours_at_room_temp': 1,
+        'observed_smell': 'Normal/Fresh', 'observed_consistency': 'Normal/Smooth'
+    },
+    '/api/predict/paneer': {
+        'days_since_purchase_or_cooked': 2, 'is_cooked': 'Raw (in a block)', 'paneer_type': 'Packaged/Branded',
+        'storage_location': 'Refrigerator', 'storage_container_raw': 'Original packaging',
+        'observed_smell': 'Normal/Sweetish', 'texture_surface': 'Normal/Firm'
+    },
+    '/api/predict_dal': {
+        'Time_since_preparation_hours': 6, 'Storage_place': 'Refrigerator', 'Acidity_source': 'Low/Normal',
+        'Consistency': 'Normal', 'Container_type': 'Steel/Metal', 'Smell': 'Normal', 'Oil_separation': 0.1
+    },
+    '/api/predict_roti': {
+        'time_since_cooking_hr': 10, 'storage_location': 'Room Temperature', 'storage_container': 'Casserole/Hotpot',
+        'fat_content': 'Ghee/Oil applied on top', 'ambient_season': 'Winter (Cool/Dry)',
+        'observed_texture': 'Soft & Pliable', 'observed_appearance': 'Normal'
+    },
+}
+
+# Runs inside the child interpreter; prints one JSON line with the timings.
+CHILD = r'''
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t_import = time.perf_counter() - t0
+client = app.app.test_client()
+requests = json.loads(sys.argv[1])
+first = {}
+warming = {}
+for url, payload in requests.items():
+    warming[url] = 0
+    while True:
+        resp = client.post(url, json=payload)
+        if resp.status_code != 503:
+            break
+        warming[url] += 1
+        time.sleep(0.005)
+    first[url] = time.perf_counter() - t0
+print(json.dumps({'import': t_import, 'first_response': first, 'warming_replies': warming, 'total': time.perf_counter() - t0}))
+'''
+
+
+def run_once(mode):
+    env = dict(os.environ, MODEL_LOADING=mode)
+    proc = subprocess.run(
+        [sys.executable, '-c', CHILD, json.dumps(SAMPLE_REQUESTS)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', nargs='+', default=['eager', 'lazy', 'background'])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='print raw results as JSON')
+    args = parser.parse_args()
+
+    report = {}
+    for mode in args.modes:
+        runs = [run_once(mode) for _ in range(args.runs)]
+        best = min(runs, key=lambda r: r['total'])
+        report[mode] = best
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'mode':<12}{'import':>10}{'1st rice':>11}{'all routes':>12}  warming replies")
+    for mode, r in report.items():
+        print(f"{mode:<12}{r['import']:>9.3f}s{r['first_response']['/api/predict']:>10.3f}s{r['total']:>11.3f}s  {sum(r['warming_replies'].values())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+from quart import Blueprint, current_app, jsonify, request
+
+import services
+from blueprints import auth as sync_auth
+from blueprints.auth import NO_DATABASE, SERVER_ERROR, login_reply, new_user_record, read_credentials, signup_reply
+
+# --- Auth Blueprint (async) ---
+# /api/signup and /api/login for the ASGI server (asgi.py): the checks and
+# responses are blueprints/auth.py's helpers, with the Firestore calls awaited
+# on the async client instead of holding a worker thread. Both share the user
+# cache of blueprints/auth.py; /api/auth/status is served by that blueprint.
+
+bp = Blueprint('async_auth', __name__)
+
+async def fetch_user(email):
+    """blueprints.auth.fetch_user on the async Firestore client."""
+    user_doc = await services.firebase_async.get().collection('users').document(email).get()
+    return user_doc.to_dict() if user_doc.exists else None
+
+@bp.route('/api/signup', methods=['POST'])
+async def signup():
+    db = services.firebase_async.get()
+    if not db:
+        return jsonify(NO_DATABASE), 500
+
+    record, error = new_user_record(await request.get_json())
+    if error:
+        return jsonify(error), 400
+
+    try:
+        # Create new user, with the email as the document ID: create() fails if it exists
+        created = True
+        try:
+            await db.collection('users').document(record['email']).create({**record, 'created_at': services.server_timestamp()})
+        except Exception as e:
+            if not services.is_already_exists(e):
+                raise
+            created = False
+        body, status = signup_reply(record, created)
+        return jsonify(body), status
+
+    except Exception as e:
+        current_app.logger.error(f"Signup Error: {e}")
+        return jsonify(SERVER_ERROR), 500
+
+@bp.route('/api/login', methods=['POST'])
+async def login():
+    db = services.firebase_async.get()
+    if not db:
+        return jsonify(NO_DATABASE), 500
+
+    email, password, error = read_credentials(await request.get_json())
+    if error:
+        return jsonify(error), 400
+
+    try:
+        body, status = login_reply(await sync_auth.users.get_async(email, fetch_user), password)
+        return jsonify(body), status
+
+    except Exception as e:
+        current_app.logger.error(f"Login Error: {e}")
+        return jsonify(SERVER_ERROR), 500
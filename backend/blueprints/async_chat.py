@@ -0,0 +1,136 @@
+import traceback
+from contextlib import asynccontextmanager
+
+from quart import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+import services
+from blueprints import chat as sync_chat
+from blueprints.chat import build_chat_response, log_chat_to_firestore, sanitize_chat_message, sse_event, wants_stream
+from chat_stream import ReplyStreamParser
+
+# --- Chat Blueprint (async) ---
+# /api/chat for the ASGI server (asgi.py). Same prompt, session pool, history
+# cache and responses as blueprints/chat.py (whose state it shares), but
+# Gemini is called with send_message_async and the history query is awaited
+# on Firestore's async client, so a chat in flight holds no thread.
+
+bp = Blueprint('async_chat', __name__)
+
+async def fetch_chat_history(userId, limit=5):
+    """blueprints.chat.fetch_chat_history on the async Firestore client."""
+    from firebase_admin import firestore
+    docs = services.firebase_async.get().collection('chat_logs') \
+        .where('userId', '==', userId) \
+        .order_by('timestamp', direction=firestore.Query.DESCENDING) \
+        .limit(limit) \
+        .stream()
+    turns = []
+    async for doc in docs:
+        data = doc.to_dict()
+        turns.append((data.get('userMessage'), data.get('botResponse', 'I do not recall.')))
+    turns.reverse()
+    return turns
+
+async def get_chat_history(userId, limit=5):
+    if not services.firebase_async.get() or not userId:
+        return []
+    try:
+        turns = await sync_chat.chat_history.get_async(userId, fetch_chat_history, limit)
+    except Exception as e:
+        print(f"Error fetching history: {e}")
+        return []
+    history = []
+    for user_message, bot_response in turns:
+        history.append({'role': 'user', 'parts': [user_message]})
+        history.append({'role': 'model', 'parts': [bot_response]})
+    return history
+
+async def start_chat_session(userId, mode_key, history):
+    return sync_chat.new_chat_session(mode_key, await get_chat_history(userId), history)
+
+@asynccontextmanager
+async def chat_session_for(userId, mode, history, message):
+    """blueprints.chat.chat_session_for, holding the pooled session with its asyncio lock."""
+    mode_key = sync_chat.chat_mode_key(mode)
+    chat_sessions = sync_chat.chat_sessions
+    if not userId or not chat_sessions.enabled:
+        yield await start_chat_session(userId, mode_key, history)
+        return
+    key = (userId, mode_key)
+    pooled, _ = await chat_sessions.acquire_async(key, lambda: start_chat_session(userId, mode_key, history),
+                                                  sync_chat.client_turns(history))
+    async with pooled.alock:
+        try:
+            yield pooled.session
+        except BaseException:
+            chat_sessions.release(key, pooled, ok=False)
+            raise
+        chat_sessions.release(key, pooled, turn=message)
+
+async def stream_chat_message(userId, mode, history, message):
+    async with chat_session_for(userId, mode, history, message) as session:
+        async for chunk in await session.send_message_async(message, stream=True):
+            try:
+                text = chunk.text
+            except ValueError: # chunk without text parts (e.g. only finish/safety info)
+                continue
+            if text:
+                yield text
+
+def stream_chat_response(userId, mode, history, sanitized):
+    @stream_with_context
+    async def generate():
+        parser = ReplyStreamParser()
+        try:
+            async for chunk in stream_chat_message(userId, mode, history, sanitized):
+                for event, value in parser.feed(chunk):
+                    yield sse_event(event, value)
+        except Exception:
+            current_app.logger.error(f"Gemini API Error: {traceback.format_exc()}")
+            yield sse_event('error', {'error': 'Failed to reach Gemini service.'})
+            return
+        final_response = build_chat_response(parser.text)
+        try:
+            log_chat_to_firestore(sanitized, final_response, mode, userId)
+        except Exception as e:
+            current_app.logger.error(f"Firestore logging failed: {e}")
+        yield sse_event('done', final_response)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/api/chat', methods=['POST'])
+async def chat():
+    if not sync_chat.chat_models.get():
+        return jsonify({'error': 'Gemini API not configured on server.'}), 500
+
+    payload = await request.get_json() or {}
+    user_message = (payload.get('message') or '').strip()
+    mode = (payload.get('mode') or 'Veg')
+    history = payload.get('history') or [] # Expecting [{role, content}]
+    userId = payload.get('userId')
+
+    if not user_message:
+        return jsonify({'error': 'Empty message'}), 400
+
+    sanitized = sanitize_chat_message(user_message)
+
+    if wants_stream(payload, request.headers.get('Accept', '')):
+        return stream_chat_response(userId, mode, history, sanitized)
+
+    try:
+        async with chat_session_for(userId, mode, history, sanitized) as session:
+            resp = await session.send_message_async(sanitized)
+        text_out = resp.text
+    except Exception:
+        current_app.logger.error(f"Gemini API Error: {traceback.format_exc()}")
+        return jsonify({'error': 'Failed to reach Gemini service.'}), 502
+
+    final_response = build_chat_response(text_out)
+
+    try:
+        log_chat_to_firestore(sanitized, final_response, mode, userId)
+    except Exception as e:
+        current_app.logger.error(f"Firestore logging failed: {e}")
+
+    return jsonify(final_response)
@@ -0,0 +1,74 @@
+import aiosmtplib
+from quart import Blueprint, current_app, jsonify, request
+
+import services
+from blueprints.ngo import (
+    LOCATION_REQUIRED, MAPS_NOT_CONFIGURED, NGO_SEARCH_KEYWORD, NGO_SEARCH_RADIUS_M, SMTP_HOST, SMTP_PORT, SMTP_SSL,
+    email_credentials, make_ngo_cache, notify_failure, prepare_notification, search_location, sent_reply,
+    simplify_places
+)
+
+# --- NGO Blueprint (async) ---
+# /api/get-ngos and /api/notify-ngo for the ASGI server (asgi.py): Places
+# searches go through the async Maps client, and donation emails join the
+# same delivery queue as the sync route (or, with MAIL_QUEUE_SIZE=0, are sent
+# with aiosmtplib), so neither holds a thread while it waits. Validation,
+# the tile cache and the responses come from blueprints/ngo.py. The job status
+# route is served by the sync blueprint.
+
+bp = Blueprint('async_ngo', __name__)
+
+async def fetch_ngos(lat, lng, radius):
+    """blueprints.ngo.fetch_ngos over the async Maps client."""
+    return simplify_places(await services.maps_async.get().places_nearby(
+        location=(lat, lng),
+        radius=radius,
+        keyword=NGO_SEARCH_KEYWORD
+    ))
+
+ngo_cache = services.LazyService('NGO cache (async)', lambda: make_ngo_cache(fetch_ngos, services.maps_async))
+
+@bp.route('/api/ngos/status', methods=['GET'])
+async def ngos_status():
+    cache = ngo_cache.get()
+    return jsonify(cache.stats() if cache else {'enabled': False})
+
+@bp.route('/api/get-ngos', methods=['GET'])
+async def get_ngos():
+    if not services.maps_async.get():
+        return jsonify(MAPS_NOT_CONFIGURED), 500
+    try:
+        location = search_location(request.args)
+        if location is None:
+            return jsonify(LOCATION_REQUIRED), 400
+
+        cache = ngo_cache.get()
+        if cache:
+            ngos_list = await cache.nearby_async(*location)
+        else:
+            ngos_list = await fetch_ngos(*location, NGO_SEARCH_RADIUS_M)
+
+        return jsonify(ngos_list)
+    except Exception as e:
+        current_app.logger.error(f"Google Maps Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/notify-ngo', methods=['POST'])
+async def notify_ngo():
+    try:
+        ngo_name, msg, reply = prepare_notification(await request.get_json())
+        if reply:
+            body, status, headers = reply
+            return jsonify(body), status, headers
+
+        sender_email, sender_password = email_credentials()
+        await aiosmtplib.send(
+            msg, hostname=SMTP_HOST, port=SMTP_PORT, use_tls=SMTP_SSL, start_tls=False,
+            username=sender_email, password=sender_password
+        )
+        return jsonify(sent_reply(ngo_name))
+
+    except Exception as e:
+        body, status, log_message = notify_failure(e)
+        current_app.logger.error(log_message)
+        return jsonify(body), status
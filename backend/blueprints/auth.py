@@ -0,0 +1,124 @@
+import os
+
+from flask import Blueprint, current_app, jsonify, request
+
+import services
+from user_cache import UserCache
+
+# --- Auth Blueprint ---
+# Signup and login against the Firestore 'users' collection.
+
+bp = Blueprint('auth', __name__)
+
+def fetch_user(email):
+    """The user's Firestore record (email is the document ID), or None."""
+    user_doc = services.firebase.get().collection('users').document(email).get()
+    return user_doc.to_dict() if user_doc.exists else None
+
+# Login reads users through this cache (see user_cache.py); USER_CACHE_TTL_SECONDS=0 disables it
+users = UserCache(
+    fetch_user,
+    ttl_seconds=float(os.getenv('USER_CACHE_TTL_SECONDS', '60')),
+    negative_ttl_seconds=float(os.getenv('USER_CACHE_NEGATIVE_TTL_SECONDS', '5')),
+    max_users=int(os.getenv('USER_CACHE_SIZE', '10000'))
+)
+
+# --- Auth Helpers ---
+# Validation and responses shared with blueprints/async_auth.py, which only
+# awaits the Firestore calls instead.
+NO_DATABASE = {"error": "Database not initialized"}
+SERVER_ERROR = {"error": "An internal server error occurred"}
+
+def read_credentials(data):
+    """(email, password, None), or (None, None, error body for a 400) if either is missing."""
+    email = data.get('email')
+    password = data.get('password')
+    if not email or not password:
+        return None, None, {"error": "Email and password are required"}
+    return email, password, None
+
+def new_user_record(data):
+    """(the signup's user record, None), or (None, error body for a 400)."""
+    email, password, error = read_credentials(data)
+    if error:
+        return None, error
+    return {
+        'email': email,
+        'password': password, # In a real app, you MUST hash this!
+        'role': data.get('role', 'user') # e.g., 'user', 'ngo'
+    }, None
+
+def signup_reply(record, created):
+    """(body, status) once create() has run; created is False if the email was already taken."""
+    if not created:
+        users.invalidate(record['email'])
+        return {"error": "User with this email already exists"}, 400
+    users.put(record['email'], record)
+    # Return the new user data (without password)
+    return {"status": "success", "email": record['email'], "role": record['role']}, 201
+
+def login_reply(user_data, password):
+    """(body, status) for a login against the stored user (None if there is none)."""
+    # Check password (this is unsafe, but fine for a demo)
+    if user_data is None or user_data.get('password') != password:
+        return {"error": "Invalid email or password"}, 401
+    # Send back user info (but not the password)
+    return {
+        "status": "success",
+        "email": user_data.get('email'),
+        "role": user_data.get('role')
+    }, 200
+
+@bp.route('/api/auth/status', methods=['GET'])
+def auth_status():
+    return jsonify({'user_cache': users.stats()})
+
+# --- [NEW] USER AUTH ENDPOINTS ---
+
+@bp.route('/api/signup', methods=['POST'])
+def signup():
+    db = services.firebase.get()
+    if not db:
+        return jsonify(NO_DATABASE), 500
+        
+    record, error = new_user_record(request.get_json())
+    if error:
+        return jsonify(error), 400
+
+    try:
+        # Create new user
+        # We use the email as the document ID for easy lookup, so create()
+        # fails if the user already exists: one round trip, no query
+        created = True
+        try:
+            db.collection('users').document(record['email']).create({**record, 'created_at': services.server_timestamp()})
+        except Exception as e:
+            if not services.is_already_exists(e):
+                raise
+            created = False
+        body, status = signup_reply(record, created)
+        return jsonify(body), status
+        
+    except Exception as e:
+        current_app.logger.error(f"Signup Error: {e}")
+        return jsonify(SERVER_ERROR), 500
+
+@bp.route('/api/login', methods=['POST'])
+def login():
+    db = services.firebase.get()
+    if not db:
+        return jsonify(NO_DATABASE), 500
+        
+    email, password, error = read_credentials(request.get_json())
+    if error:
+        return jsonify(error), 400
+
+    try:
+        # Find the user by their email (which is the document ID)
+        body, status = login_reply(users.get(email), password)
+        return jsonify(body), status
+            
+    except Exception as e:
+        current_app.logger.error(f"Login Error: {e}")
+        return jsonify(SERVER_ERROR), 500
+    
@@ -0,0 +1,326 @@
+import html
+import json
+import os
+import re
+import traceback
+from contextlib import contextmanager
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+import services
+from chat_sessions import ChatSessionPool
+from chat_history import ChatHistoryCache
+from chat_stream import ReplyStreamParser
+
+# --- Chat Blueprint ---
+# /api/chat and its status route. Gemini and Firestore are reached through
+# services.py, so neither SDK is imported until the first chat message.
+
+bp = Blueprint('chat', __name__)
+
+# --- Firebase Logger ---
+def log_chat_to_firestore(user_message, bot_response, mode, userId=None): # <-- Add userId
+    log_sink = services.log_sink.get()
+    if not log_sink:
+        print("Log sink not configured. Skipping log.")
+        return
+    try:
+        log_data = {
+            'userMessage': user_message,
+            'botResponse': bot_response.get('text', ''),
+            'structuredResponse': bot_response.get('structured', {}),
+            'mode': mode,
+            'timestamp': services.server_timestamp(),
+            'userId': userId  # <-- ADD THIS LINE
+        }
+        queued = log_sink.submit('chat_logs', log_data)
+        if queued and services.firebase.get() and userId:
+            chat_history.append(userId, user_message, log_data['botResponse'])
+    except Exception as e:
+        print(f"Error logging to Firestore: {e}")
+
+
+# --- CHAT Helpers ---
+# The system prompt and per-mode instructions are built once and given to Gemini
+# as each chat model's system_instruction, instead of being resent as a fake
+# first user turn (plus a canned "Understood!" reply) on every call.
+# --- [THIS IS THE NEW, SMARTER PROMPT] ---
+CHAT_SYSTEM_PROMPT = (
+    "You are Anna, a helpful, professional assistant that suggests recipes from leftovers and provides food-safety advice. "
+    "Be concise, friendly, and human-like. Respect the dietary mode strictly. "
+    
+    "YOUR CAPABILITIES & CONTEXT RULES: "
+    "1.  **Recipe Generation:** If the user's *latest* message is a list of ingredients (e.g., 'I have rice and tomatoes') AND the conversation history shows they just selected a 'recipe' flow, provide one concise recipe."
+    "2.  **Food Safety:** If the user's *latest* message is a food item (e.g., 'milk', 'rice') AND the *previous* message from you (the bot) was a question like 'What food would you like safety tips for?', you MUST provide food safety tips for that item."
+    
+    "CONTEXT IS KEY: "
+    "Always prioritize the most recent context. If you just asked a question (like 'What food?'), the user's *next* message is the answer to that question. Do NOT confuse an answer ('Rice') with a new request for a recipe ('Rice')."
+
+    "NAVIGATION COMMANDS (APP FEATURES):"
+    "If the user's *latest* message is 'Predict Spoilage', respond *only* with: ```json\n{\"replyText\": \"Okay, opening the spoilage predictor...\", \"command\": \"navigate\", \"payload\": \"/user-dashboard/predict\"}\n```"
+    "If the user's *latest* message is 'Find nearby NGOs', respond *only* with: ```json\n{\"replyText\": \"Okay, opening the NGO locator...\", \"command\": \"navigate\", \"payload\": \"/user-dashboard/ngo-connect\"}\n```"
+    
+    "RESPONSE FORMAT: "
+    "You MUST respond in a valid JSON object enclosed in triple backticks (```json ... ```). "
+    "The JSON object is your ONLY response. Do not add text outside the JSON block. "
+    
+    "JSON SCHEMA: "
+    "{ "
+    "  \"replyText\": \"(Your friendly, human-readable reply. 1-3 sentences)\", "
+    "  \"recipes\": [ "
+    "    { "
+    "      \"title\": \"(Recipe Title)\", "
+    "      \"ingredients\": [\"(Ingredient 1)\", \"(Ingredient 2)\"], "
+    "      \"steps\": [\"(Step 1)\", \"(Step 2)\", \"(Step 3)\"], "
+    "      \"estimatedTime\": \"(e.g., 15 minutes)\", "
+    "      \"servings\": 2 "
+    "    } "
+    "  ], "
+    "  \"safetyTips\": [\"(Tip 1)\", \"(Tip 2)\"], "
+    "  \"command\": null "
+    "} "
+
+    "RULES FOR JSON: "
+    "1.  **replyText**: ALWAYS include a friendly message. "
+    "2.  **recipes**: If you give a recipe, you MUST provide a full `recipes` array. A recipe object *must* include `title`, `ingredients` (as an array), and `steps` (as an array). Do NOT provide an empty `steps` array. "
+    "3.  **safetyTips**: If you give safety tips, you MUST provide a full `safetyTips` array. "
+    "4.  **Empty Arrays**: If you are not giving a recipe, the `recipes` array MUST be empty (`[]`). If not giving tips, `safetyTips` MUST be empty (`[]`). "
+    
+    "FALLBACK: "
+    "If the user asks an off-topic question (e.g., 'What is the capital of France?'), "
+    "politely decline. Your JSON response for this should be: "
+    "```json\n{\"replyText\": \"I'm a food expert, so I can't help with that, but I'd be happy to give you a recipe!\", \"recipes\": [], \"safetyTips\": [], \"command\": null}\n```"
+)
+# --- [END OF NEW PROMPT] ---
+
+CHAT_MODE_INSTRUCTIONS = {
+    'veg': 'Only suggest vegetarian recipes. No meat or fish. Avoid non-veg ingredients.',
+    'non-veg': 'You may suggest meat, fish, and egg recipes as appropriate.',
+    'jain': 'Strictly avoid onion, garlic, eggs, and meat. Suggest alternatives when mentioned.',
+    '': '' # any other mode
+}
+CHAT_CLIENT_HISTORY_LIMIT = 6 # messages taken from the client's history when seeding a session
+
+def build_chat_models():
+    """One Gemini model per mode, each with its system instruction; {} if Gemini isn't configured."""
+    make_chat_model = services.gemini.get()
+    if make_chat_model is None:
+        return {}
+    return {
+        mode_key: make_chat_model(CHAT_SYSTEM_PROMPT + ' ' + instructions)
+        for mode_key, instructions in CHAT_MODE_INSTRUCTIONS.items()
+    }
+
+chat_models = services.LazyService('chat models', build_chat_models)
+
+# One live session per (userId, mode); CHAT_SESSION_POOL_SIZE=0 turns pooling off
+chat_sessions = ChatSessionPool(
+    max_sessions=int(os.getenv('CHAT_SESSION_POOL_SIZE', '1000')),
+    idle_seconds=float(os.getenv('CHAT_SESSION_IDLE_SECONDS', '1800'))
+)
+
+def chat_mode_key(mode):
+    mode = (mode or '').lower()
+    return mode if mode in CHAT_MODE_INSTRUCTIONS else ''
+
+def start_chat_session(userId, mode_key, history):
+    """New Gemini session seeded with the user's stored history plus the client's recent messages."""
+    return new_chat_session(mode_key, get_chat_history(userId), history)
+
+def new_chat_session(mode_key, gemini_history, history):
+    for h in (history or [])[-CHAT_CLIENT_HISTORY_LIMIT:]:
+        role = 'user' if h.get('role') == 'user' else 'model'
+        gemini_history.append({'role': role, 'parts': [h.get('content', '')]})
+    return chat_models.get()[mode_key].start_chat(history=gemini_history)
+
+def client_turns(history):
+    """The user messages of the client's recent history, sanitized as the route does, oldest first."""
+    return [sanitize_chat_message((h.get('content') or '').strip())
+            for h in (history or [])[-CHAT_CLIENT_HISTORY_LIMIT:] if h.get('role') == 'user']
+
+@contextmanager
+def chat_session_for(userId, mode, history, message):
+    """
+    Yields the user's pooled session, creating one on first use, and holds it
+    until the block exits. If the client's history isn't the conversation the
+    pooled session holds (e.g. a new chat), the session is reseeded from it.
+    Anonymous requests get a one-off session, as before.
+    """
+    mode_key = chat_mode_key(mode)
+    if not userId or not chat_sessions.enabled:
+        yield start_chat_session(userId, mode_key, history)
+        return
+    key = (userId, mode_key)
+    pooled, _ = chat_sessions.acquire(key, lambda: start_chat_session(userId, mode_key, history), client_turns(history))
+    with pooled.lock:
+        try:
+            yield pooled.session
+        except BaseException: # includes GeneratorExit when a stream is abandoned halfway
+            chat_sessions.release(key, pooled, ok=False)
+            raise
+        chat_sessions.release(key, pooled, turn=message)
+
+def send_chat_message(userId, mode, history, message):
+    with chat_session_for(userId, mode, history, message) as session:
+        return session.send_message(message)
+
+def stream_chat_message(userId, mode, history, message):
+    """Yields the reply text chunk by chunk as Gemini streams it."""
+    with chat_session_for(userId, mode, history, message) as session:
+        for chunk in session.send_message(message, stream=True):
+            try:
+                text = chunk.text
+            except ValueError: # chunk without text parts (e.g. only finish/safety info)
+                continue
+            if text:
+                yield text
+
+def build_chat_response(text_out):
+    """Pulls the ```json block out of the model's reply and builds the {text, structured} response."""
+    structured = None
+    try:
+        m = re.search(r'```json\s*([\s\S]*?)```', text_out, re.IGNORECASE)
+        if m:
+            structured = json.loads(m.group(1))
+        if not structured:
+            m2 = re.search(r'(\{[\s\S]*\})', text_out)
+            if m2:
+                structured = json.loads(m2.group(1))
+    except Exception:
+        structured = None # Failed to parse
+
+    final_response = {'text': text_out}
+    if structured:
+        final_response['structured'] = structured
+        # Use the cleaner text from the JSON if available
+        if 'replyText' in structured and structured['replyText']:
+             final_response['text'] = structured['replyText']
+    else:
+        # If Gemini FAILED to provide JSON, we send a fallback
+        final_response['structured'] = { "replyText": "I'm having a little trouble thinking clearly. Please try rephrasing your request." }
+    return final_response
+
+def sanitize_chat_message(user_message):
+    sanitized = re.sub(r"[\x00-\x1f\x7f]+", ' ', user_message)
+    sanitized = html.unescape(sanitized).strip()
+    if len(sanitized) > 4000:
+        sanitized = sanitized[:4000]
+    return sanitized
+
+def wants_stream(payload, accept):
+    """Streaming mode: {"stream": true} or Accept: text/event-stream"""
+    return payload.get('stream') is True or 'text/event-stream' in accept
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_chat_response(userId, mode, history, sanitized):
+    """
+    /api/chat streaming mode. Sends server-sent events as the reply arrives:
+    replyText (text deltas), recipe and safetyTip (each array element once it is
+    complete), then done with the same {text, structured} body the normal mode
+    returns, or error.
+    """
+    def generate():
+        parser = ReplyStreamParser()
+        try:
+            for chunk in stream_chat_message(userId, mode, history, sanitized):
+                for event, value in parser.feed(chunk):
+                    yield sse_event(event, value)
+        except Exception:
+            current_app.logger.error(f"Gemini API Error: {traceback.format_exc()}")
+            yield sse_event('error', {'error': 'Failed to reach Gemini service.'})
+            return
+        final_response = build_chat_response(parser.text)
+        try:
+            log_chat_to_firestore(sanitized, final_response, mode, userId)
+        except Exception as e:
+            current_app.logger.error(f"Firestore logging failed: {e}")
+        yield sse_event('done', final_response)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def fetch_chat_history(userId, limit=5):
+    """Queries Firestore for the last 'limit' turns of a user, as (userMessage, botResponse) oldest first."""
+    from firebase_admin import firestore
+    docs = services.firebase.get().collection('chat_logs') \
+        .where('userId', '==', userId) \
+        .order_by('timestamp', direction=firestore.Query.DESCENDING) \
+        .limit(limit) \
+        .stream()
+    turns = []
+    for doc in docs:
+        data = doc.to_dict()
+        turns.append((data.get('userMessage'), data.get('botResponse', 'I do not recall.')))
+    # The query is newest-to-oldest, so we must reverse it
+    turns.reverse()
+    return turns
+
+# Write-through cache in front of fetch_chat_history; CHAT_HISTORY_CACHE_USERS=0 disables it
+chat_history = ChatHistoryCache(fetch_chat_history, max_users=int(os.getenv('CHAT_HISTORY_CACHE_USERS', '10000')))
+
+def get_chat_history(userId, limit=5):
+    """Returns the last 'limit' turns for a user as Gemini history messages."""
+    if not services.firebase.get() or not userId:
+        return []
+
+    try:
+        turns = chat_history.get(userId, limit)
+    except Exception as e:
+        print(f"Error fetching history: {e}")
+        return []
+
+    history = []
+    for user_message, bot_response in turns:
+        history.append({'role': 'user', 'parts': [user_message]})
+        history.append({'role': 'model', 'parts': [bot_response]})
+    return history
+    
+
+@bp.route('/api/chat/status', methods=['GET'])
+def chat_status():
+    return jsonify({'sessions': chat_sessions.stats(), 'history_cache': chat_history.stats()})
+
+
+# --- ADVANCED CHATBOT Endpoint (Final Version) ---
+@bp.route('/api/chat', methods=['POST'])
+def chat():
+    if not chat_models.get():
+        return jsonify({'error': 'Gemini API not configured on server.'}), 500
+
+    payload = request.get_json() or {}
+    user_message = (payload.get('message') or '').strip()
+    mode = (payload.get('mode') or 'Veg')
+    history = payload.get('history') or [] # Expecting [{role, content}]
+    userId = payload.get('userId')         # <-- NEW: Get the userId
+
+    if not user_message:
+        return jsonify({'error': 'Empty message'}), 400
+
+    sanitized = sanitize_chat_message(user_message)
+
+    if wants_stream(payload, request.headers.get('Accept', '')):
+        return stream_chat_response(userId, mode, history, sanitized)
+
+    text_out = None
+
+    try:
+        resp = send_chat_message(userId, mode, history, sanitized)
+        text_out = resp.text
+
+    except Exception:
+        current_app.logger.error(f"Gemini API Error: {traceback.format_exc()}")
+        return jsonify({'error': 'Failed to reach Gemini service.'}), 502
+
+    final_response = build_chat_response(text_out)
+
+    # --- Log to Firebase (Fire-and-Forget) ---
+    try:
+        log_chat_to_firestore(sanitized, final_response, mode, userId) # <-- CHANGED: Pass userId
+    except Exception as e:
+        current_app.logger.error(f"Firestore logging failed: {e}")
+
+    return jsonify(final_response)
+
+
@@ -0,0 +1,228 @@
+import os
+import traceback
+from email.mime.text import MIMEText
+
+from flask import Blueprint, current_app, jsonify, request
+
+import services
+from mail_queue import MailQueue, SmtpConnection
+from ngo_cache import NgoTileCache
+
+# --- NGO Blueprint ---
+# NGO search (Google Maps, cached per geohash tile) and donation emails.
+
+bp = Blueprint('ngo', __name__)
+
+# --- NGO Helpers ---
+# The validation, cache and response shapes here are shared with
+# blueprints/async_ngo.py, which only swaps in the awaitable clients.
+NGO_SEARCH_RADIUS_M = 5000 # 5km radius
+NGO_SEARCH_KEYWORD = 'NGO OR food bank OR food donation'
+MAPS_NOT_CONFIGURED = {"error": "Google Maps service is not configured"}
+LOCATION_REQUIRED = {"error": "Latitude and longitude are required"}
+
+def simplify_places(places_result):
+    """A places_nearby result, cut down to the fields the frontend uses."""
+    ngos_list = []
+    for place in places_result.get('results', []):
+        place_id = place['place_id']
+        # We need to make a second call to get the phone number and email
+        # This is slow, so we'll just get the basics for the demo
+        # In a real app, you'd fetch details
+        ngos_list.append({
+            "id": place_id,
+            "name": place.get('name'),
+            "address": place.get('vicinity', 'Address not available'),
+            "location": place['geometry']['location']
+        })
+    return ngos_list
+
+def fetch_ngos(lat, lng, radius):
+    """One places_nearby call, simplified to the fields the frontend uses."""
+    return simplify_places(services.maps.get().places_nearby(
+        location=(lat, lng),
+        radius=radius,
+        keyword=NGO_SEARCH_KEYWORD
+    ))
+
+def search_location(args):
+    """(lat, lng) from the query string, or None if either is zero. A missing or non-numeric one raises."""
+    # e.g. /api/get-ngos?lat=19.2&lng=72.8
+    lat = float(args.get('lat'))
+    lng = float(args.get('lng'))
+    return (lat, lng) if lat and lng else None
+
+# Results are cached per geohash tile (see ngo_cache.py) and persisted in
+# NGO_CACHE_PATH ('' keeps them in memory only). NGO_CACHE_TTL_SECONDS=0 disables the cache.
+NGO_CACHE_TTL_SECONDS = float(os.getenv('NGO_CACHE_TTL_SECONDS', '86400'))
+
+def make_ngo_cache(fetch=fetch_ngos, maps=services.maps):
+    """The tile cache over fetch, or None if the cache is off or maps (a LazyService) isn't configured."""
+    if not maps.get() or NGO_CACHE_TTL_SECONDS <= 0:
+        return None
+    try:
+        return NgoTileCache(
+            fetch,
+            radius_m=NGO_SEARCH_RADIUS_M,
+            precision=int(os.getenv('NGO_CACHE_PRECISION', '6')),
+            ttl_seconds=NGO_CACHE_TTL_SECONDS,
+            path=os.getenv('NGO_CACHE_PATH', os.path.join('cache', 'ngo_tiles.sqlite3')) or None
+        )
+    except Exception as e:
+        print(f"❌ Error opening NGO cache, querying Maps directly: {e}")
+        return None
+
+ngo_cache = services.LazyService('NGO cache', make_ngo_cache)
+
+@bp.route('/api/ngos/status', methods=['GET'])
+def ngos_status():
+    cache = ngo_cache.get()
+    return jsonify(cache.stats() if cache else {'enabled': False})
+
+@bp.route('/api/get-ngos', methods=['GET'])
+def get_ngos():
+    if not services.maps.get(): 
+        return jsonify(MAPS_NOT_CONFIGURED), 500
+    try:
+        location = search_location(request.args)
+        if location is None:
+            return jsonify(LOCATION_REQUIRED), 400
+
+        # Search for NGOs nearby
+        cache = ngo_cache.get()
+        if cache:
+            ngos_list = cache.nearby(*location)
+        else:
+            ngos_list = fetch_ngos(*location, NGO_SEARCH_RADIUS_M)
+
+        return jsonify(ngos_list)
+    except Exception as e:
+        current_app.logger.error(f"Google Maps Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+# --- Donation Emails ---
+# SMTP_HOST / SMTP_PORT / SMTP_SSL point the mailer somewhere other than Gmail
+# (e.g. the local stand-in in stubs/smtp.py); SMTP_SSL=0 means plain SMTP.
+SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '465'))
+SMTP_SSL = os.getenv('SMTP_SSL', '1') != '0'
+# Emails are queued and sent over one kept-alive connection (see mail_queue.py).
+# MAIL_QUEUE_SIZE=0 sends each one inside the request instead, as before.
+MAIL_QUEUE_SIZE = int(os.getenv('MAIL_QUEUE_SIZE', '1000'))
+
+def email_credentials():
+    """(sender, password), or (None, None) if email isn't configured."""
+    return os.getenv("EMAIL_SENDER"), os.getenv("EMAIL_APP_PASSWORD")
+
+def build_donation_email(data, sender_email):
+    """The alert for a donation request; raises KeyError if a field is missing."""
+    # --- [THIS IS THE FIX] ---
+    # The frontend is sending 'donorContact', 'foodDetails', 'pickupAddress'
+    ngo_name = data['ngo_name']
+    donor_contact = data['donorContact']     # Use camelCase
+    food_details = data['foodDetails']       # Use camelCase
+    pickup_address = data['pickupAddress']   # Use camelCase
+    # --- [END OF FIX] ---
+
+    recipient_email = sender_email
+    subject = f"New Food Donation Alert from Anna Sampada for {ngo_name}!"
+    body = f"""
+        Hello {ngo_name},
+        A donor has offered a food donation via the Anna Sampada app.
+        
+        --- DONATION DETAILS ---
+        Food: {food_details}
+        Pickup Address: {pickup_address}
+        Donor Contact (Phone/Email): {donor_contact}
+        
+        Please coordinate pickup directly with the donor.
+        Thank you,
+        The Anna Sampada Team
+        """
+    
+    msg = MIMEText(body)
+    msg['Subject'] = subject
+    msg['From'] = sender_email
+    msg['To'] = recipient_email 
+    return ngo_name, msg
+
+def smtp_connection():
+    sender_email, sender_password = email_credentials()
+    return SmtpConnection(SMTP_HOST, SMTP_PORT, SMTP_SSL, sender_email, sender_password)
+
+def make_mail_queue():
+    sender_email, sender_password = email_credentials()
+    if not sender_email or not sender_password or MAIL_QUEUE_SIZE <= 0:
+        return None
+    return MailQueue(
+        smtp_connection(),
+        max_queue=MAIL_QUEUE_SIZE,
+        max_attempts=int(os.getenv('MAIL_MAX_ATTEMPTS', '5')),
+        backoff=float(os.getenv('MAIL_RETRY_SECONDS', '1.0'))
+    )
+
+mail_queue = services.LazyService('mail queue', make_mail_queue)
+
+def queued_reply(ngo_name, job_id):
+    """(body, status, headers) for a notification handed to the queue."""
+    if job_id is None:
+        return {"error": "Too many notifications waiting to be sent. Please retry shortly."}, 503, {'Retry-After': '5'}
+    return {"status": "queued", "jobId": job_id, "message": f"Notification to {ngo_name} queued for delivery (demo)"}, 202, {}
+
+def prepare_notification(data):
+    """
+    (ngo_name, msg, reply) for a donation request. reply is (body, status, headers) if the request
+    is answered here: email isn't configured, or msg went to the queue. None: the caller sends msg.
+    Raises KeyError if a field is missing.
+    """
+    sender_email, sender_password = email_credentials()
+    ngo_name, msg = build_donation_email(data, sender_email)
+    if not sender_email or not sender_password: 
+        return ngo_name, msg, ({"error": "Email service not configured on server."}, 500, {})
+    queue = mail_queue.get()
+    if queue:
+        return ngo_name, msg, queued_reply(ngo_name, queue.submit(msg, label=ngo_name))
+    return ngo_name, msg, None
+
+def sent_reply(ngo_name):
+    return {"status": "success", "message": f"Notification successfully sent to {ngo_name} (demo)"}
+
+def notify_failure(e):
+    """(body, status, log message) for an exception raised while handling a notification."""
+    if isinstance(e, KeyError):
+        return {"error": f"Missing key in request: {str(e)}"}, 400, f"KeyError in notify_ngo: {str(e)}"
+    return {"error": str(e)}, 500, f"Email Error: {traceback.format_exc()}"
+
+@bp.route('/api/notify-ngo', methods=['POST'])
+def notify_ngo():
+    try:
+        ngo_name, msg, reply = prepare_notification(request.get_json())
+        if reply:
+            body, status, headers = reply
+            return jsonify(body), status, headers
+
+        connection = smtp_connection()
+        try:
+            connection.send(msg)
+        finally:
+            connection.close()
+        return jsonify(sent_reply(ngo_name))
+        
+    except Exception as e:
+        body, status, log_message = notify_failure(e)
+        current_app.logger.error(log_message)
+        return jsonify(body), status
+
+@bp.route('/api/notify-ngo/<job_id>', methods=['GET'])
+def notify_ngo_job(job_id):
+    queue = mail_queue.get()
+    job = queue.job(job_id) if queue else None
+    if job is None:
+        return jsonify({"error": "Unknown notification job"}), 404
+    return jsonify(job)
+
+@bp.route('/api/mail/status', methods=['GET'])
+def mail_status():
+    queue = mail_queue.get()
+    return jsonify({'enabled': True, **queue.stats()} if queue else {'enabled': False})
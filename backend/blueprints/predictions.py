@@ -0,0 +1,1127 @@
+import json
+import os
+
+import numpy as np
+from flask import Blueprint, current_app, jsonify, request
+
+import services
+from services import INFERENCE_ONLY
+from encoders import RiceFeatureEncoder, PaneerFeatureEncoder
+from model_registry import ModelRegistry, ModelWarming
+from prediction_cache import PredictionCache, SplitQuantizer
+from lookup_tables import load_lookup_table
+from micro_batcher import MicroBatcher
+from stage_metrics import NULL_TIMER, StageMetrics
+from tree_compiler import CompiledEnsemble, load_compiled_model
+
+# --- Predictions Blueprint ---
+# The five predict routes, /api/predict_batch, and the model/cache status
+# routes. pandas and joblib are imported on first use (when a model is loaded
+# or a request needs a DataFrame), not at import time.
+
+bp = Blueprint('predictions', __name__)
+
+# --- LOAD ALL ML MODELS ---
+# Nothing is unpickled at import time. Each food's artifacts sit behind a loader in
+# the model registry and are loaded on first use (MODEL_LOADING=lazy, the default),
+# by a thread pool right after boot (MODEL_LOADING=background), or up front
+# (MODEL_LOADING=eager). sklearn artifacts are memory-mapped; the XGBoost models
+# pickle their booster as one opaque blob, so mmap_mode doesn't apply to them.
+MODEL_LOADING = os.getenv('MODEL_LOADING', 'lazy').lower()
+# PREDICTION_MODE=table answers rice and milk from precompiled lookup tables
+# (see lookup_tables.py) instead of walking the trees. PREDICTION_MODE=compiled
+# serves all five models from their flattened node arrays (see tree_compiler.py)
+# instead of the sklearn/XGBoost estimators.
+PREDICTION_MODE = os.getenv('PREDICTION_MODE', 'model').lower()
+models = ModelRegistry()
+
+def load_compiled(food, model_path):
+    """The food's compiled ensemble under PREDICTION_MODE=compiled; None otherwise, or if it is missing or stale."""
+    if INFERENCE_ONLY or PREDICTION_MODE != 'compiled':
+        return None
+    return load_compiled_model(food, model_path)
+
+def load_artifact(path, mmap_mode=None):
+    """Unpickles a model artifact, or loads its portable export under SERVER_PROFILE=inference."""
+    if INFERENCE_ONLY:
+        import portable_models
+        return portable_models.load_portable(path)
+    import joblib
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+def records_frame(records, columns=None):
+    """Request records as a DataFrame for the sklearn transformers; the portable ones take the records as they are."""
+    if INFERENCE_ONLY:
+        return records
+    import pandas as pd
+    return pd.DataFrame(records, columns=columns)
+
+def model_input(model, X, columns):
+    """A compiled ensemble takes the feature array; a pickled XGBoost model checks feature names, so give it a DataFrame."""
+    if isinstance(model, CompiledEnsemble):
+        return X
+    import pandas as pd
+    return pd.DataFrame(X, columns=columns)
+
+# --- Rice Model ---
+rice_model_path = os.path.join('ML', 'rice', 'rice_model.joblib')
+def load_rice_models():
+    rice_model = load_compiled('rice', rice_model_path) or load_artifact(rice_model_path, mmap_mode='r')
+    return {
+        'model': rice_model,
+        'quantizer': SplitQuantizer.from_model(rice_model),
+        'table': load_lookup_table('rice', rice_model_path) if PREDICTION_MODE == 'table' else None
+    }
+
+# --- Milk Model & Scaler ---
+milk_model_path = os.path.join('ML', 'milk', 'xgboost_milk_spoilage_model.joblib')
+milk_scaler_path = os.path.join('ML', 'milk', 'scaler_milk_spoilage.joblib')
+def load_milk_models():
+    milk_model = load_compiled('milk', milk_model_path) or load_artifact(milk_model_path)
+    return {
+        'model': milk_model,
+        'scaler': load_artifact(milk_scaler_path, mmap_mode='r'),
+        'quantizer': SplitQuantizer.from_model(milk_model),
+        'table': load_lookup_table('milk', milk_model_path) if PREDICTION_MODE == 'table' else None
+    }
+
+# --- Load Paneer Model and Config ---
+paneer_model_dir = os.path.join('ML', 'paneer') 
+paneer_config_filepath = os.path.join(paneer_model_dir, 'paneer_model_config.json') 
+def load_paneer_models():
+    with open(paneer_config_filepath, 'r') as f:
+        paneer_config = json.load(f)
+    model_filepath = os.path.join(paneer_model_dir, paneer_config['model_file'])
+    columns_filepath = os.path.join(paneer_model_dir, paneer_config['columns_file'])
+    with open(columns_filepath, 'r') as f: 
+        paneer_model_columns = json.load(f)
+    paneer_model = load_compiled('paneer', model_filepath) or load_artifact(model_filepath, mmap_mode='r')
+    return {
+        'model': paneer_model,
+        'columns': paneer_model_columns,
+        'encoder': PaneerFeatureEncoder(paneer_model_columns, paneer_smell_map, paneer_texture_map),
+        'quantizer': SplitQuantizer.from_model(paneer_model)
+    }
+
+# --- Roti Model ---
+roti_model_path = os.path.join('ML', 'roti', 'roti_spoiler_pipeline.joblib') 
+def load_roti_models():
+    roti_pipeline = load_artifact(roti_model_path, mmap_mode='r')
+    roti_classifier = load_compiled('roti', roti_model_path) or roti_pipeline[-1]
+    return {
+        'transformer': roti_pipeline[:-1], # the pipeline's preprocessing steps
+        'classifier': roti_classifier,
+        'quantizer': SplitQuantizer.from_model(roti_classifier)
+    }
+
+# --- Dal Model & Components ---
+dal_model_path = os.path.join('ML', 'dal', 'dal_spoilage_final_model.joblib')
+dal_preprocessor_path = os.path.join('ML', 'dal', 'dal_spoilage_preprocessor.joblib')
+dal_le_path = os.path.join('ML', 'dal', 'dal_spoilage_label_encoder.joblib')
+def load_dal_models():
+    dal_model = load_compiled('dal', dal_model_path) or load_artifact(dal_model_path)
+    return {
+        'model': dal_model,
+        'preprocessor': load_artifact(dal_preprocessor_path, mmap_mode='r'),
+        'le': load_artifact(dal_le_path, mmap_mode='r'),
+        'quantizer': SplitQuantizer.from_model(dal_model)
+    }
+
+models.register('rice', load_rice_models)
+models.register('milk', load_milk_models)
+models.register('paneer', load_paneer_models)
+models.register('roti', load_roti_models)
+models.register('dal', load_dal_models)
+
+# Exact-result cache in front of each predict route (see prediction_cache.py).
+# PREDICTION_CACHE_SIZE=0 turns it off.
+prediction_cache = PredictionCache(
+    models,
+    max_entries=int(os.getenv('PREDICTION_CACHE_SIZE', 4096)),
+    ttl_seconds=float(os.getenv('PREDICTION_CACHE_TTL_SECONDS', 3600))
+)
+
+# Opt-in micro-batching of the model calls of concurrent single-item requests
+# (see micro_batcher.py): cache misses that arrive within MICRO_BATCH_WINDOW_MS
+# of each other, up to MICRO_BATCH_MAX_ITEMS, share one predict_proba call.
+# The default, 0, calls the model once per request.
+MICRO_BATCH_WINDOW_MS = float(os.getenv('MICRO_BATCH_WINDOW_MS', 0))
+MICRO_BATCH_MAX_ITEMS = int(os.getenv('MICRO_BATCH_MAX_ITEMS', 32))
+
+def micro_batcher(food, predict_proba):
+    """A batcher whose call is predict_proba(artifacts, X), with the food's artifacts as loaded when the batch runs."""
+    return MicroBatcher(lambda X: predict_proba(models.get(food), X),
+                        window_ms=MICRO_BATCH_WINDOW_MS, max_items=MICRO_BATCH_MAX_ITEMS)
+
+micro_batchers = {
+    'rice': micro_batcher('rice', lambda rice, X: rice['model'].predict_proba(X)),
+    'milk': micro_batcher('milk', lambda milk, X: milk['model'].predict_proba(model_input(milk['model'], X, MILK_MODEL_FEATURES))),
+    'paneer': micro_batcher('paneer', lambda paneer, X: paneer['model'].predict_proba(X)),
+    'dal': micro_batcher('dal', lambda dal, X: dal['model'].predict_proba(X)),
+    'roti': micro_batcher('roti', lambda roti, X: roti['classifier'].predict_proba(X))
+}
+
+
+# Per-stage timings and rule/cache/model counts of each predict route (see
+# stage_metrics.py), served on GET /metrics. STAGE_METRICS=0 turns them off.
+stage_metrics = StageMetrics(enabled=os.getenv('STAGE_METRICS', '1') != '0')
+
+def respond(timer, outcome, body, *rest):
+    """jsonify(body) as the route's last stage; `rest` is the optional status code and headers."""
+    response = jsonify(body)
+    timer.mark('respond')
+    timer.done(outcome)
+    return (response, *rest) if rest else response
+
+
+# --- HELPER FUNCTIONS (PREPROCESSING & LOGGING) ---
+
+# --- Prediction Logger ---
+def log_predictions_batch(entries):
+    """Queues (raw_item, result) pairs for the 'predictions' collection."""
+    log_sink = services.log_sink.get()
+    if not log_sink:
+        return
+    for item, result in entries:
+        log_data = dict(item)
+        log_data['prediction'] = result
+        log_data['food_type'] = str(item.get('food', '')).capitalize()
+        log_data['timestamp'] = services.server_timestamp()
+        log_sink.submit('predictions', log_data)
+
+    
+
+# --- RICE Helpers ---
+rice_smell_map = { 'Normal': 0, 'Stale/Slightly Off': 1, 'Sour/Fermented': 2, 'Foul/Musty': 3 }
+rice_appearance_map = { 'Normal/Glossy': 0, 'Dull/Dry': 1, 'Slimy/Discolored': 2, 'Visible Mold': 3 }
+RICE_MODEL_FEATURES = [
+    'hours_since_cooking', 'initial_hours_at_room_temp', 'smell_encoded', 'appearance_encoded',
+    'storage_location_Refrigerator', 'storage_location_Room Temperature',
+    'cooling_method_Cooled in shallow container', 'cooling_method_Left to cool in deep pot',
+    'cooling_method_Not Applicable'
+]
+rice_result_map = {
+    0.0: {'status': 'Fresh', 'message': 'Fresh - Safe to consume', 'is_safe': True},
+    1.0: {'status': 'Stale', 'message': 'Stale - Safe but reduced quality', 'is_safe': True},
+    2.0: {'status': 'Unsafe', 'message': 'Potentially Unsafe - Risk of toxins', 'is_safe': False},
+    3.0: {'status': 'Spoiled', 'message': 'Spoiled - Do not consume', 'is_safe': False},
+    4.0: {'status': 'Molded', 'message': 'Extremely Spoiled - Do not consume', 'is_safe': False}
+}
+rice_encoder = RiceFeatureEncoder(RICE_MODEL_FEATURES, rice_smell_map, rice_appearance_map)
+RICE_HOURS_CAP = 168
+RICE_SEVERE_SMELL = ['Sour/Fermented', 'Foul/Musty']
+
+def preprocess_and_validate_rice(data, timer=NULL_TIMER):
+    try:
+        hours_since_cooking = float(data['hours_since_cooking'])
+        initial_hours = float(data['initial_hours_at_room_temp'])
+    except ValueError:
+        return None, "Error: Hour inputs must be numbers."
+    except KeyError:
+        return None, "Error: Missing required fields for rice."
+    if hours_since_cooking < 0 or initial_hours < 0:
+        return None, "Error: Hours cannot be negative."
+    if hours_since_cooking > RICE_HOURS_CAP:
+        return rice_result_map[4.0], None 
+    if initial_hours > hours_since_cooking:
+        return None, "Error: 'Hours at Room Temp' cannot be greater than 'Total Hours Since Cooking'."
+    storage = data.get('storage_location')
+    cooling = data.get('cooling_method')
+    smell = data.get('observed_smell')
+    appearance = data.get('observed_appearance')
+    if appearance == 'Visible Mold': return rice_result_map[4.0], None
+    if appearance == 'Slimy/Discolored': return rice_result_map[3.0], None
+    if smell in RICE_SEVERE_SMELL: return rice_result_map[3.0], None
+    timer.mark('validate')
+    features = rice_encoder.encode(hours_since_cooking, initial_hours, smell, appearance, storage, cooling)
+    timer.mark('frame')
+    return features, None
+
+# --- MILK Helpers ---
+milk_smell_order = ['Normal/Fresh', 'Sour', 'Bitter/Unpleasant', 'Rancid/Soapy']
+milk_consistency_order = ['Normal/Smooth', 'Thicker than usual', 'Small Lumps', 'Thick Curds']
+MILK_MODEL_FEATURES = [ 
+    'days_since_open_or_purchase', 'was_boiled', 'cumulative_hours_at_room_temp',
+    'observed_smell', 'observed_consistency', 'milk_type_Raw/Loose',
+    'milk_type_UHT (Carton)', 'storage_location_Room Temperature'
+]
+MILK_SCALED_COLS = [ 
+    'days_since_open_or_purchase', 'cumulative_hours_at_room_temp',
+    'observed_smell', 'observed_consistency'
+]
+milk_result_map = {
+    0: {'status': 'Fresh', 'message': '✅ Fresh - Safe to consume', 'is_safe': True},
+    2: {'status': 'Spoiled', 'message': '🚫 Spoiled - Do not consume', 'is_safe': False}
+}
+MILK_SEVERE_SMELL = ['Rancid/Soapy']
+MILK_SEVERE_CONSISTENCY = ['Thick Curds']
+MILK_DAYS_CAP = 14
+MILK_VALID_TYPES = ['Pasteurized (Pouch/Bottle)', 'UHT (Carton)', 'Raw/Loose']
+MILK_VALID_STORAGE = ['Refrigerator', 'Room Temperature']
+MILK_REQUIRED_FIELDS = [
+    'milk_type', 'days_since_open_or_purchase', 'was_boiled', 'storage_location',
+    'cumulative_hours_at_room_temp', 'observed_smell', 'observed_consistency'
+]
+
+def preprocess_and_validate_milk(data, as_frame=True, timer=NULL_TIMER):
+    required_fields = MILK_REQUIRED_FIELDS
+    if not all(field in data for field in required_fields):
+        missing = [field for field in required_fields if field not in data]
+        return None, f"Error: Missing required fields for milk: {', '.join(missing)}"
+    try:
+        days = float(data['days_since_open_or_purchase'])
+        room_temp_hours = float(data['cumulative_hours_at_room_temp'])
+        if isinstance(data['was_boiled'], str):
+            was_boiled_input = data['was_boiled'].lower() == 'true' or data['was_boiled'].lower() == 'yes'
+        else:
+            was_boiled_input = bool(data['was_boiled'])
+    except (ValueError, TypeError):
+        return None, "Error: Numeric inputs (days, hours) must be valid numbers."
+    TOTAL_HOURS_IN_CAP = MILK_DAYS_CAP * 24 
+    if days < 0 or room_temp_hours < 0:
+         return None, "Error: Days and hours cannot be negative for milk."
+    if days > MILK_DAYS_CAP:
+        return milk_result_map[2], None 
+    if room_temp_hours > (days * 24) + 1: 
+        return None, "Error: 'Cumulative Hours at Room Temp' cannot be greater than total 'Days Since Purchase'."
+    if room_temp_hours > TOTAL_HOURS_IN_CAP:
+        return milk_result_map[2], None
+    milk_type = data.get('milk_type')
+    storage = data.get('storage_location')
+    smell = data.get('observed_smell')
+    consistency = data.get('observed_consistency')
+    valid_milk_types = MILK_VALID_TYPES
+    valid_storage = MILK_VALID_STORAGE
+    if milk_type not in valid_milk_types: return None, f"Error: Invalid milk_type '{milk_type}'."
+    if storage not in valid_storage: return None, f"Error: Invalid storage_location '{storage}'."
+    if smell not in milk_smell_order: return None, f"Error: Invalid observed_smell '{smell}'."
+    if consistency not in milk_consistency_order: return None, f"Error: Invalid observed_consistency '{consistency}'."
+    if smell in MILK_SEVERE_SMELL or consistency in MILK_SEVERE_CONSISTENCY:
+        return milk_result_map[2], None 
+    try:
+        smell_encoded = float(milk_smell_order.index(smell))
+        consistency_encoded = float(milk_consistency_order.index(consistency))
+    except ValueError:
+         return None, "Error: Could not encode milk smell or consistency."
+    timer.mark('validate')
+    if not as_frame:
+        # Lookup-table / compiled mode: skip pandas entirely and return one scaled float64 row
+        row = milk_feature_row(days, room_temp_hours, was_boiled_input, milk_type, storage, smell, consistency)
+        timer.mark('frame')
+        if models.get('milk') is None: return None, "Error: Milk Scaler is not loaded."
+        row = scale_milk_rows(np.asarray([row], dtype=np.float64))[0]
+        timer.mark('scale')
+        return row, None
+    was_boiled_encoded = 1 if was_boiled_input else 0
+    milk_type_Raw_Loose = 1.0 if milk_type == 'Raw/Loose' else 0.0
+    milk_type_UHT_Carton = 1.0 if milk_type == 'UHT (Carton)' else 0.0
+    storage_location_Room_Temperature = 1.0 if storage == 'Room Temperature' else 0.0
+    data_for_df = {
+        'days_since_open_or_purchase': [days],
+        'was_boiled': [was_boiled_encoded],
+        'cumulative_hours_at_room_temp': [room_temp_hours],
+        'observed_smell': [smell_encoded],
+        'observed_consistency': [consistency_encoded],
+        'milk_type_Raw/Loose': [milk_type_Raw_Loose],
+        'milk_type_UHT (Carton)': [milk_type_UHT_Carton],
+        'storage_location_Room Temperature': [storage_location_Room_Temperature]
+    }
+    try:
+        import pandas as pd
+        features_df = pd.DataFrame(columns=MILK_MODEL_FEATURES)
+        features_df = pd.concat([features_df, pd.DataFrame(data_for_df)], ignore_index=True)
+        features_df = features_df.fillna(0.0)
+        features_df = features_df[MILK_MODEL_FEATURES] 
+    except Exception as e:
+         return None, f"Error creating milk feature DataFrame: {str(e)}"
+    timer.mark('frame')
+    milk = models.get('milk')
+    milk_scaler = milk['scaler'] if milk else None
+    if milk_scaler is None: return None, "Error: Milk Scaler is not loaded."
+    try:
+        features_df[MILK_SCALED_COLS] = milk_scaler.transform(features_df[MILK_SCALED_COLS])
+    except Exception as e:
+        return None, f"Error applying milk scaling: {str(e)}"
+    timer.mark('scale')
+    return features_df, None 
+
+def milk_feature_row(days, room_temp_hours, was_boiled, milk_type, storage, smell, consistency):
+    """Unscaled milk features as a list in MILK_MODEL_FEATURES order (inputs already validated).
+    A NaN days/hours value becomes 0, as the DataFrame path's fillna(0.0) does."""
+    return [
+        days if days == days else 0.0, 1 if was_boiled else 0, room_temp_hours if room_temp_hours == room_temp_hours else 0.0,
+        float(milk_smell_order.index(smell)), float(milk_consistency_order.index(consistency)),
+        1.0 if milk_type == 'Raw/Loose' else 0.0, 1.0 if milk_type == 'UHT (Carton)' else 0.0,
+        1.0 if storage == 'Room Temperature' else 0.0
+    ]
+
+def scale_milk_rows(X):
+    """Applies milk_scaler to the MILK_SCALED_COLS of an (n, 8) float64 array, same arithmetic as transform()."""
+    milk_scaler = models.get('milk', wait=True)['scaler']
+    cols = [MILK_MODEL_FEATURES.index(c) for c in MILK_SCALED_COLS]
+    X = X.copy()
+    X[:, cols] = (X[:, cols] - milk_scaler.mean_) / milk_scaler.scale_
+    return X
+
+# --- PANEER Helpers ---
+PANEER_DAYS_CAP = 14
+PANEER_REQUIRED_FIELDS = ['days_since_purchase_or_cooked', 'is_cooked', 'paneer_type', 'storage_location', 'observed_smell', 'texture_surface']
+paneer_smell_map = {'Normal/Sweetish': 0, 'Sour/Acidic': 1, 'Foul/Ammoniacal': 2, 'Soapy/Rancid': 3}
+paneer_texture_map = {'Normal/Firm': 0, 'Hard/Rubbery': 1, 'Slimy/Sticky': 2}
+paneer_status_map = { 0: "Fresh", 1: "Good (Use Soon)", 2: "Stale (Use with Caution)", 3: "Spoiled (Do Not Eat)" }
+
+# --- DAL Helpers ---
+DAL_HOURS_CAP = 120 # 5 days
+def check_logical_spoilage_dal(time_hrs, storage, acidity, consistency, smell):
+    if storage == 'Room Temperature' and time_hrs > 24:
+        return True, "Stored at room temperature for over 24 hours."
+    if time_hrs > DAL_HOURS_CAP:
+        return True, "Time since preparation exceeds the absolute safe limit of 120 hours."
+    if storage == 'Room Temperature' and time_hrs >= 8 and acidity in ['High', 'Moderate']:
+        return True, "Stored at room temperature for 8+ hours with high acidity."
+    if smell in ['Very Sour', 'Musty', 'Foul']:
+        return True, f"Reported {smell} smell, a strong spoilage indicator."
+    if consistency == 'Slimy':
+        return True, "Reported slimy consistency, a clear sign of microbial growth."
+    return False, None
+
+def check_logical_spoilage_dal_batch(time_hrs, storage, acidity, consistency, smell):
+    """Vectorized check_logical_spoilage_dal over equal-length arrays. Returns (spoiled_mask, reasons)."""
+    time_hrs = np.asarray(time_hrs, dtype=float)
+    storage, acidity, consistency, smell = (np.asarray(a, dtype=object) for a in (storage, acidity, consistency, smell))
+    room_temp = storage == 'Room Temperature'
+    # Same rules, same priority order as the scalar version
+    rules = [
+        (room_temp & (time_hrs > 24), "Stored at room temperature for over 24 hours."),
+        (time_hrs > DAL_HOURS_CAP, "Time since preparation exceeds the absolute safe limit of 120 hours."),
+        (room_temp & (time_hrs >= 8) & _isin(acidity, ['High', 'Moderate']), "Stored at room temperature for 8+ hours with high acidity."),
+        (_isin(smell, ['Very Sour', 'Musty', 'Foul']), None),
+        (consistency == 'Slimy', "Reported slimy consistency, a clear sign of microbial growth."),
+    ]
+    spoiled = np.zeros(len(time_hrs), dtype=bool)
+    reasons = np.full(len(time_hrs), None, dtype=object)
+    for mask, reason in rules:
+        hit = mask & ~spoiled
+        for i in np.flatnonzero(hit):
+            reasons[i] = reason if reason is not None else f"Reported {smell[i]} smell, a strong spoilage indicator."
+        spoiled |= hit
+    return spoiled, reasons
+
+def _isin(values, options):
+    """Elementwise membership for object arrays (np.isin can't sort mixed None/str)."""
+    mask = np.zeros(len(values), dtype=bool)
+    for option in options:
+        mask |= values == option
+    return mask
+
+
+# --- BATCH Helpers ---
+# Each <food>_batch function takes a list of raw JSON items and returns one result
+# dict per item, in the same order. Rule short-circuits run as array masks, and
+# whatever is left goes to the model in a single predict_proba call. If given a
+# float array `confidence` (one slot per item), they also write the winning
+# class's probability into it for every item the model answered.
+BATCH_MAX_ITEMS = 5000
+DAL_REQUIRED_FIELDS = ['Time_since_preparation_hours', 'Storage_place', 'Acidity_source', 'Consistency', 'Container_type', 'Smell', 'Oil_separation']
+ROTI_REQUIRED_FIELDS = ['time_since_cooking_hr', 'storage_location', 'storage_container', 'fat_content', 'ambient_season', 'observed_texture', 'observed_appearance']
+ROTI_HOURS_RANGE = 72 # the roti model was trained on 0-72 hours since cooking
+
+def _batch_error(message):
+    return {'error': message, 'is_safe': False, 'status': 'Error'}
+
+def _parse_floats(items, fields, error_message):
+    """Returns (values[n, len(fields)], valid_mask, errors) for the numeric fields of each item."""
+    values = np.zeros((len(items), len(fields)), dtype=float)
+    valid = np.zeros(len(items), dtype=bool)
+    errors = {}
+    for i, data in enumerate(items):
+        try:
+            values[i] = [float(data[f]) for f in fields]
+            valid[i] = True
+        except KeyError:
+            errors[i] = None # caller fills in its own "missing" message
+        except (ValueError, TypeError):
+            errors[i] = error_message
+    return values, valid, errors
+
+def _column(items, field):
+    return np.array([data.get(field) for data in items], dtype=object)
+
+def predict_rice_batch(items, confidence=None):
+    results = [None] * len(items)
+    values, valid, errors = _parse_floats(items, ['hours_since_cooking', 'initial_hours_at_room_temp'], "Error: Hour inputs must be numbers.")
+    for i, message in errors.items():
+        results[i] = _batch_error(message or "Error: Missing required fields for rice.")
+    hours, initial = values[:, 0], values[:, 1]
+    smell, appearance = _column(items, 'observed_smell'), _column(items, 'observed_appearance')
+
+    # Same checks, same order as preprocess_and_validate_rice
+    pending = valid.copy()
+    def take(mask, result):
+        nonlocal pending
+        hit = pending & mask
+        for i in np.flatnonzero(hit):
+            results[i] = result
+        pending &= ~hit
+    take((hours < 0) | (initial < 0), _batch_error("Error: Hours cannot be negative."))
+    take(hours > RICE_HOURS_CAP, rice_result_map[4.0])
+    take(initial > hours, _batch_error("Error: 'Hours at Room Temp' cannot be greater than 'Total Hours Since Cooking'."))
+    take(appearance == 'Visible Mold', rice_result_map[4.0])
+    take(appearance == 'Slimy/Discolored', rice_result_map[3.0])
+    take(_isin(smell, RICE_SEVERE_SMELL), rice_result_map[3.0])
+
+    idx = np.flatnonzero(pending)
+    if len(idx):
+        rice = models.get('rice')
+        if rice is None:
+            for i in idx: results[i] = _batch_error('Rice Model is not loaded.')
+            return results
+        rice_model = rice['model']
+        X = rice_encoder.encode_batch(
+            hours[idx], initial[idx], smell[idx], appearance[idx],
+            _column(items, 'storage_location')[idx], _column(items, 'cooling_method')[idx]
+        )
+        proba = rice_model.predict_proba(X)
+        codes = rice_model.classes_[proba.argmax(axis=1)]
+        if confidence is not None:
+            confidence[idx] = proba.max(axis=1)
+        for i, code in zip(idx, codes):
+            results[i] = rice_result_map.get(float(code), {'status': 'Error', 'message': '🚫 Unknown prediction', 'is_safe': False})
+    return results
+
+def predict_milk_batch(items, confidence=None):
+    results = [None] * len(items)
+    missing = {}
+    for i, data in enumerate(items):
+        absent = [field for field in MILK_REQUIRED_FIELDS if field not in data]
+        if absent:
+            missing[i] = f"Error: Missing required fields for milk: {', '.join(absent)}"
+    values, valid, errors = _parse_floats(items, ['days_since_open_or_purchase', 'cumulative_hours_at_room_temp'], "Error: Numeric inputs (days, hours) must be valid numbers.")
+    errors.update(missing)
+    for i, message in errors.items():
+        results[i] = _batch_error(message)
+        valid[i] = False
+    days, room_hours = values[:, 0], values[:, 1]
+    milk_type, storage = _column(items, 'milk_type'), _column(items, 'storage_location')
+    smell, consistency = _column(items, 'observed_smell'), _column(items, 'observed_consistency')
+    was_boiled = np.zeros(len(items), dtype=bool)
+    for i, data in enumerate(items):
+        raw = data.get('was_boiled')
+        was_boiled[i] = raw.lower() in ('true', 'yes') if isinstance(raw, str) else bool(raw)
+
+    # Same checks, same order as preprocess_and_validate_milk
+    pending = valid.copy()
+    def take(mask, result):
+        nonlocal pending
+        hit = pending & mask
+        for i in np.flatnonzero(hit):
+            results[i] = result(i) if callable(result) else result
+        pending &= ~hit
+    take((days < 0) | (room_hours < 0), _batch_error("Error: Days and hours cannot be negative for milk."))
+    take(days > MILK_DAYS_CAP, milk_result_map[2])
+    take(room_hours > (days * 24) + 1, _batch_error("Error: 'Cumulative Hours at Room Temp' cannot be greater than total 'Days Since Purchase'."))
+    take(room_hours > MILK_DAYS_CAP * 24, milk_result_map[2])
+    take(~_isin(milk_type, MILK_VALID_TYPES), lambda i: _batch_error(f"Error: Invalid milk_type '{milk_type[i]}'."))
+    take(~_isin(storage, MILK_VALID_STORAGE), lambda i: _batch_error(f"Error: Invalid storage_location '{storage[i]}'."))
+    take(~_isin(smell, milk_smell_order), lambda i: _batch_error(f"Error: Invalid observed_smell '{smell[i]}'."))
+    take(~_isin(consistency, milk_consistency_order), lambda i: _batch_error(f"Error: Invalid observed_consistency '{consistency[i]}'."))
+    take(_isin(smell, MILK_SEVERE_SMELL) | _isin(consistency, MILK_SEVERE_CONSISTENCY), milk_result_map[2])
+
+    idx = np.flatnonzero(pending)
+    if len(idx):
+        milk = models.get('milk')
+        if milk is None:
+            for i in idx: results[i] = _batch_error('Milk Model/Scaler not loaded.')
+            return results
+        milk_model = milk['model']
+        rows = [milk_feature_row(days[i], room_hours[i], was_boiled[i], milk_type[i], storage[i], smell[i], consistency[i]) for i in idx]
+        X = scale_milk_rows(np.asarray(rows, dtype=np.float64))
+        proba = milk_model.predict_proba(model_input(milk_model, X, MILK_MODEL_FEATURES))
+        codes = milk_model.classes_[proba.argmax(axis=1)]
+        if confidence is not None:
+            confidence[idx] = proba.max(axis=1)
+        for i, code in zip(idx, codes):
+            code = int(code)
+            if code == 1 and was_boiled[i]:
+                results[i] = {'status': 'Starting', 'message': '⚠️ Starting to Spoil - Consume soon only after re-boiling thoroughly.', 'is_safe': None}
+            elif code == 1:
+                results[i] = {'status': 'Unsafe', 'message': '❌ Potentially Unsafe - Discard. Do not consume raw or unboiled milk.', 'is_safe': False}
+            else:
+                results[i] = milk_result_map.get(code, {'status': 'Error', 'message': '🚫 Unknown prediction index', 'is_safe': False})
+    return results
+
+def predict_paneer_batch(items, confidence=None):
+    results = [None] * len(items)
+    for i, data in enumerate(items):
+        absent = [field for field in PANEER_REQUIRED_FIELDS if field not in data]
+        if absent:
+            results[i] = _batch_error(f"Missing required paneer fields: {', '.join(absent)}")
+    values, valid, errors = _parse_floats(items, ['days_since_purchase_or_cooked'], "Error: 'Days' must be a valid number for paneer.")
+    for i, message in errors.items():
+        valid[i] = False
+        if results[i] is None:
+            results[i] = _batch_error(message)
+    for i in range(len(items)):
+        if results[i] is not None:
+            valid[i] = False
+    days = values[:, 0]
+
+    pending = valid.copy()
+    for i in np.flatnonzero(pending & (days < 0)):
+        results[i] = _batch_error("Error: 'Days' cannot be negative.")
+    pending &= ~(days < 0)
+    for i in np.flatnonzero(pending & (days > PANEER_DAYS_CAP)):
+        results[i] = {
+            'status': "Spoiled (Do Not Eat)",
+            'message': f"Paneer is unsafe after {PANEER_DAYS_CAP} days. Do not consume.",
+            'is_safe': False, 'prediction_code': 3, 'confidence': "100.00%"
+        }
+    pending &= ~(days > PANEER_DAYS_CAP)
+
+    idx = np.flatnonzero(pending)
+    if len(idx):
+        paneer = models.get('paneer')
+        if paneer is None or not paneer['columns']:
+            for i in idx: results[i] = _batch_error('Paneer model or columns list not loaded properly.')
+            return results
+        paneer_model = paneer['model']
+        X = paneer['encoder'].encode_batch(days[idx], [items[i].get('observed_smell') for i in idx],
+                                           [items[i].get('texture_surface') for i in idx])
+        proba = paneer_model.predict_proba(X)
+        codes = paneer_model.classes_[proba.argmax(axis=1)]
+        if confidence is not None:
+            confidence[idx] = proba.max(axis=1)
+        for i, code, p in zip(idx, codes, proba):
+            pct = max(p) * 100
+            status = paneer_status_map.get(int(code), "Unknown")
+            results[i] = {
+                'status': status, 'message': f"Prediction: {status}. Confidence: {pct:.2f}%", 'is_safe': bool(int(code) < 3),
+                'prediction_code': int(code), 'confidence': f"{pct:.2f}%"
+            }
+    return results
+
+def predict_dal_batch(items, confidence=None):
+    results = [None] * len(items)
+    values, valid, errors = _parse_floats(items, ['Time_since_preparation_hours'], "Error: Dal hours must be a number.")
+    # The preprocessor and the model take a missing oil separation, as the single route does: null or blank -> NaN
+    oil = np.full(len(items), np.nan)
+    for i, data in enumerate(items):
+        value = data.get('Oil_separation')
+        if value is None or value == '':
+            continue
+        try:
+            oil[i] = float(value)
+        except (ValueError, TypeError):
+            errors[i] = "Error: Dal oil separation must be a number."
+    for i, data in enumerate(items):
+        absent = [field for field in DAL_REQUIRED_FIELDS if field not in data]
+        if absent:
+            errors[i] = f"Missing required dal fields: {', '.join(absent)}"
+    for i, message in errors.items():
+        results[i] = _batch_error(message)
+        valid[i] = False
+    time_hrs = values[:, 0]
+
+    spoiled, reasons = check_logical_spoilage_dal_batch(
+        time_hrs, _column(items, 'Storage_place'), _column(items, 'Acidity_source'),
+        _column(items, 'Consistency'), _column(items, 'Smell')
+    )
+    for i in np.flatnonzero(valid & spoiled):
+        results[i] = {'status': 'Spoiled', 'message': f'Spoiled (Food Safety Rule): {reasons[i]}', 'is_safe': False}
+
+    idx = np.flatnonzero(valid & ~spoiled)
+    if len(idx):
+        dal = models.get('dal')
+        if dal is None:
+            for i in idx: results[i] = _batch_error('Dal Model components not loaded.')
+            return results
+        dal_model, dal_preprocessor, dal_le = dal['model'], dal['preprocessor'], dal['le']
+        records = [{**items[i], 'Time_since_preparation_hours': time_hrs[i], 'Oil_separation': oil[i]} for i in idx]
+        proba = dal_model.predict_proba(dal_preprocessor.transform(records_frame(records, columns=DAL_REQUIRED_FIELDS)))
+        codes = (proba[:, 1] > 0.5).astype(int) # XGBClassifier.predict's binary threshold
+        labels = dal_le.inverse_transform(codes)
+        if confidence is not None:
+            confidence[idx] = proba[np.arange(len(idx)), codes]
+        for i, code, label, p in zip(idx, codes, labels, proba):
+            pct = p[code] * 100
+            if label == 'Spoiled':
+                results[i] = {'status': 'Spoiled', 'message': f'ML Result: Spoiled. (Confidence: {pct:.2f}%)', 'is_safe': False}
+            else:
+                results[i] = {'status': 'Fresh', 'message': f'ML Result: Fresh. (Confidence: {pct:.2f}%)', 'is_safe': True}
+    return results
+
+def predict_roti_batch(items, confidence=None):
+    results = [None] * len(items)
+    values, valid, errors = _parse_floats(items, ['time_since_cooking_hr'], "Error: 'time_since_cooking_hr' must be a number.")
+    for i, data in enumerate(items):
+        absent = [field for field in ROTI_REQUIRED_FIELDS if field not in data]
+        if absent:
+            errors[i] = f"Missing required roti fields: {', '.join(absent)}"
+    for i, message in errors.items():
+        results[i] = _batch_error(message)
+        valid[i] = False
+
+    idx = np.flatnonzero(valid)
+    if len(idx):
+        roti = models.get('roti')
+        if roti is None:
+            for i in idx: results[i] = _batch_error('Roti Model is not loaded.')
+            return results
+        roti_classifier = roti['classifier']
+        records = [{**items[i], 'time_since_cooking_hr': values[i, 0]} for i in idx]
+        proba = roti_classifier.predict_proba(roti['transformer'].transform(records_frame(records, columns=ROTI_REQUIRED_FIELDS)))
+        codes = roti_classifier.classes_[proba.argmax(axis=1)]
+        if confidence is not None:
+            confidence[idx] = proba.max(axis=1)
+        for i, code, p in zip(idx, codes, proba):
+            if code == 1:
+                results[i] = {'status': 'Spoiled', 'message': f'Spoiled - Unsafe to consume. (Confidence: {p[1]*100:.2f}%)', 'is_safe': False}
+            else:
+                results[i] = {'status': 'Fresh', 'message': f'Fresh - Safe to consume. (Confidence: {p[0]*100:.2f}%)', 'is_safe': True}
+    return results
+
+BATCH_PREDICTORS = {
+    'rice': predict_rice_batch,
+    'milk': predict_milk_batch,
+    'paneer': predict_paneer_batch,
+    'dal': predict_dal_batch,
+    'roti': predict_roti_batch
+}
+    
+
+# --- DEFINE API ENDPOINTS ---
+
+# Any route that asks the registry for a model that is still loading gets a 503
+# with "warming" instead of a 500, so clients (and load balancers) can retry.
+@bp.app_errorhandler(ModelWarming)
+def model_warming(e):
+    return jsonify({'error': str(e), 'status': 'warming', 'is_safe': False}), 503, {'Retry-After': '1'}
+
+@bp.route('/api/models/status', methods=['GET'])
+def models_status():
+    return jsonify({
+        'loading_mode': MODEL_LOADING, 'models': models.status(),
+        'micro_batching': {food: {'window_ms': batcher.window_ms, 'max_items': batcher.max_items, **batcher.stats()}
+                           for food, batcher in micro_batchers.items() if batcher.enabled}
+    })
+
+@bp.route('/api/cache/status', methods=['GET'])
+def cache_status():
+    return jsonify({'enabled': prediction_cache.enabled, 'foods': prediction_cache.stats()})
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    return stage_metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+# --- RICE Endpoint ---
+@bp.route('/api/predict', methods=['POST'])
+def predict_rice():
+    rice = models.get('rice')
+    if rice is None: return jsonify({'error': 'Rice Model is not loaded.'}), 500
+    rice_model = rice['model']
+    timer = stage_metrics.timer('rice')
+    try:
+        data = request.json
+        timer.mark('parse')
+        if not data: return respond(timer, 'error', {'error': 'No input data provided for rice'}, 400)
+        processed_input, error = preprocess_and_validate_rice(data, timer)
+        if error: return respond(timer, 'error', {'error': error, 'is_safe': False, 'status': 'Error'}, 400)
+        if isinstance(processed_input, dict):
+            timer.mark('validate')
+            return respond(timer, 'rule', processed_input)
+        outcome = 'cache'
+        if rice['table'] is not None:
+            # A row the table can't bucket (e.g. a NaN feature) goes to the model below
+            label = rice['table'].lookup(processed_input[0])
+            result = None if label is None else rice_result_map.get(float(label), {'status': 'Error', 'message': '🚫 Unknown prediction', 'is_safe': False})
+            cache_key = None
+            if result is not None:
+                outcome = 'model'
+                timer.mark('predict')
+        else:
+            cache_key = rice['quantizer'].key(processed_input[0])
+            result = prediction_cache.get('rice', cache_key)
+            timer.mark('cache')
+        if result is None:
+            prediction_proba = micro_batchers['rice'].submit(processed_input[0])
+            prediction_index = rice_model.classes_[prediction_proba.argmax()]
+            result = rice_result_map.get(float(prediction_index), {'status': 'Error', 'message': '🚫 Unknown prediction', 'is_safe': False})
+            prediction_cache.put('rice', cache_key, result)
+            outcome = 'model'
+            timer.mark('predict')
+        log_sink = services.log_sink.get()
+        if log_sink:
+            try:
+                log_data = data.copy() # The raw user input
+                log_data['prediction'] = result # The model's answer
+                log_data['food_type'] = 'Rice'
+                log_data['timestamp'] = services.server_timestamp()
+                
+                log_sink.submit('predictions', log_data)
+            except Exception as e:
+                current_app.logger.error(f"ML Log Error: {e}") # Log error but don't fail
+        timer.mark('log')
+        return respond(timer, outcome, result)
+    except Exception as e:
+        current_app.logger.error(f"Rice Prediction error: {str(e)}")
+        return respond(timer, 'error', {'error': 'An unexpected error occurred.'}, 500)
+
+# --- MILK Endpoint ---
+@bp.route('/api/predict_milk', methods=['POST'])
+def predict_milk():
+    milk = models.get('milk')
+    if milk is None: return jsonify({'error': 'Milk Model/Scaler not loaded.'}), 500
+    milk_model = milk['model']
+    timer = stage_metrics.timer('milk')
+    try:
+        data = request.json
+        timer.mark('parse')
+        if not data: return respond(timer, 'error', {'error': 'No input data provided for milk'}, 400)
+        was_boiled_input_raw = data.get('was_boiled')
+        if isinstance(was_boiled_input_raw, str):
+            was_boiled_original = was_boiled_input_raw.lower() == 'true' or was_boiled_input_raw.lower() == 'yes'
+        else:
+            was_boiled_original = bool(was_boiled_input_raw)
+        milk_table = milk['table']
+        # The lookup table and the compiled ensemble both take the scaled row as an array
+        as_frame = milk_table is None and not isinstance(milk_model, CompiledEnsemble)
+        processed_input, error = preprocess_and_validate_milk(data, as_frame=as_frame, timer=timer)
+        if error: return respond(timer, 'error', {'error': error, 'is_safe': False, 'status': 'Error'}, 400)
+        if isinstance(processed_input, dict):
+            timer.mark('validate')
+            return respond(timer, 'rule', processed_input)
+        outcome = 'cache'
+        if milk_table is not None:
+            result, cache_key = None, None
+        else:
+            # was_boiled is one of the model's columns, so it is part of the key too
+            cache_key = milk['quantizer'].key(np.asarray(processed_input, dtype=float).ravel())
+            result = prediction_cache.get('milk', cache_key)
+            timer.mark('cache')
+        if result is None:
+            # A row the table can't bucket (e.g. a NaN feature) goes to the model
+            prediction_index = milk_table.lookup(processed_input) if milk_table is not None else None
+            if prediction_index is None:
+                prediction_proba = micro_batchers['milk'].submit(np.asarray(processed_input, dtype=np.float64).ravel())
+                prediction_index = milk_model.classes_[prediction_proba.argmax()]
+            prediction_index = int(prediction_index)
+            if prediction_index == 1:
+                if was_boiled_original:
+                    result = {'status': 'Starting', 'message': '⚠️ Starting to Spoil - Consume soon only after re-boiling thoroughly.', 'is_safe': None}
+                else:
+                    result = {'status': 'Unsafe', 'message': '❌ Potentially Unsafe - Discard. Do not consume raw or unboiled milk.', 'is_safe': False}
+            else:
+                result = milk_result_map.get(prediction_index, {'status': 'Error', 'message': '🚫 Unknown prediction index', 'is_safe': False})
+            prediction_cache.put('milk', cache_key, result)
+            outcome = 'model'
+            timer.mark('predict')
+        
+        log_sink = services.log_sink.get()
+        if log_sink:
+            try:
+                log_data = data.copy() # The raw user input
+                log_data['prediction'] = result # The model's answer
+                log_data['food_type'] = 'Milk'
+                log_data['timestamp'] = services.server_timestamp()
+                
+                log_sink.submit('predictions', log_data)
+            except Exception as e:
+                current_app.logger.error(f"ML Log Error: {e}") # Log error but don't fail
+        timer.mark('log')
+
+        return respond(timer, outcome, result)
+    except Exception as e:
+        current_app.logger.error(f"Milk Prediction error: {str(e)}")
+        return respond(timer, 'error', {'error': 'An unexpected error occurred.'}, 500)
+
+# --- PANEER Endpoint ---
+@bp.route('/api/predict/paneer', methods=['POST'])
+def predict_paneer():
+    paneer = models.get('paneer')
+    if paneer is None or not paneer['columns']: 
+        return jsonify({'error': 'Paneer model or columns list not loaded properly.'}), 500
+    paneer_model = paneer['model']
+    timer = stage_metrics.timer('paneer')
+    try:
+        data = request.get_json()
+        timer.mark('parse')
+        if not data:
+            return respond(timer, 'error', {'error': 'No input data provided for paneer'}, 400)
+        required_paneer_fields = PANEER_REQUIRED_FIELDS
+        if not all(field in data for field in required_paneer_fields):
+            missing = [field for field in required_paneer_fields if field not in data]
+            return respond(timer, 'error', {'error': f"Missing required paneer fields: {', '.join(missing)}"}, 400)
+        try:
+            days = float(data['days_since_purchase_or_cooked'])
+        except (ValueError, TypeError):
+            return respond(timer, 'error', {'error': "Error: 'Days' must be a valid number for paneer."}, 400)
+        if days < 0:
+            return respond(timer, 'error', {'error': "Error: 'Days' cannot be negative."}, 400)
+        timer.mark('validate')
+        if days > PANEER_DAYS_CAP:
+            return respond(timer, 'rule', {
+                'status': "Spoiled (Do Not Eat)",
+                'message': f"Paneer is unsafe after {PANEER_DAYS_CAP} days. Do not consume.",
+                'is_safe': False, 'prediction_code': 3, 'confidence': "100.00%" 
+            }, 200)
+        features = paneer['encoder'].encode(days, data.get('observed_smell'), data.get('texture_surface'))
+        timer.mark('frame')
+        cache_key = paneer['quantizer'].key(features[0])
+        result = prediction_cache.get('paneer', cache_key)
+        timer.mark('cache')
+        outcome = 'cache'
+        if result is None:
+            # One forest pass: predict() is classes_[argmax(predict_proba)] anyway
+            prediction_proba = micro_batchers['paneer'].submit(features[0])
+            prediction_code = paneer_model.classes_[prediction_proba.argmax()]
+            confidence = max(prediction_proba) * 100
+            status = paneer_status_map.get(int(prediction_code), "Unknown")
+            message = f"Prediction: {status}. Confidence: {confidence:.2f}%"
+            is_safe = bool(int(prediction_code) < 3) 
+            result = {
+                'status': status, 'message': message, 'is_safe': is_safe,
+                'prediction_code': int(prediction_code), 'confidence': f"{confidence:.2f}%"
+            }
+            prediction_cache.put('paneer', cache_key, result)
+            outcome = 'model'
+            timer.mark('predict')
+        return respond(timer, outcome, result)
+    except Exception as e:
+        current_app.logger.error(f"Paneer Prediction error: {str(e)}") 
+        return respond(timer, 'error', {'error': f'An error occurred during paneer prediction: {str(e)}'}, 500)
+
+# --- DAL Endpoint ---
+@bp.route('/api/predict_dal', methods=['POST'])
+def predict_dal():
+    dal = models.get('dal')
+    if dal is None:
+        return jsonify({'error': 'Dal Model components not loaded.'}), 500
+    dal_preprocessor, dal_le = dal['preprocessor'], dal['le']
+    timer = stage_metrics.timer('dal')
+    try:
+        data = request.json
+        timer.mark('parse')
+        if not data:
+            return respond(timer, 'error', {'error': 'No input data provided for dal'}, 400)
+        is_logically_spoiled, reason = check_logical_spoilage_dal(
+            time_hrs=float(data['Time_since_preparation_hours']),
+            storage=data['Storage_place'],
+            acidity=data['Acidity_source'],
+            consistency=data['Consistency'],
+            smell=data['Smell']
+        )
+        timer.mark('validate')
+        if is_logically_spoiled:
+            return respond(timer, 'rule', {
+                'status': 'Spoiled', 
+                'message': f'Spoiled (Food Safety Rule): {reason}', 
+                'is_safe': False
+            })
+        frame = records_frame([data])
+        timer.mark('frame')
+        processed_input = dal_preprocessor.transform(frame)
+        timer.mark('scale')
+        cache_key = dal['quantizer'].key(processed_input[0])
+        result = prediction_cache.get('dal', cache_key)
+        timer.mark('cache')
+        outcome = 'cache'
+        if result is None:
+            # One model pass: predict() is the same proba[1] > 0.5 threshold
+            prediction_proba = micro_batchers['dal'].submit(processed_input[0])
+            prediction_code = int(prediction_proba[1] > 0.5)
+            result_label = dal_le.inverse_transform([prediction_code])[0] 
+            is_spoiled = (result_label == 'Spoiled')
+            confidence = prediction_proba[prediction_code] * 100 
+            if is_spoiled:
+                result = {'status': 'Spoiled', 'message': f'ML Result: Spoiled. (Confidence: {confidence:.2f}%)', 'is_safe': False}
+            else:
+                result = {'status': 'Fresh', 'message': f'ML Result: Fresh. (Confidence: {confidence:.2f}%)', 'is_safe': True}
+            prediction_cache.put('dal', cache_key, result)
+            outcome = 'model'
+            timer.mark('predict')
+
+        log_sink = services.log_sink.get()
+        if log_sink:
+            try:
+                log_data = data.copy() # The raw user input
+                log_data['prediction'] = result # The model's answer
+                log_data['food_type'] = 'Dal'
+                log_data['timestamp'] = services.server_timestamp()
+                
+                log_sink.submit('predictions', log_data)
+            except Exception as e:
+                current_app.logger.error(f"ML Log Error: {e}") # Log error but don't fail
+        timer.mark('log')
+            
+        return respond(timer, outcome, result)
+    except Exception as e:
+        current_app.logger.error(f"Dal Prediction error: {str(e)}")
+        return respond(timer, 'error', {'error': f'An unexpected error occurred: {str(e)}'}, 500)
+
+# --- ROTI Endpoint ---
+@bp.route('/api/predict_roti', methods=['POST'])
+def predict_roti():
+    roti = models.get('roti')
+    if roti is None:
+        return jsonify({'error': 'Roti Model is not loaded.'}), 500
+    roti_transformer, roti_classifier = roti['transformer'], roti['classifier']
+    timer = stage_metrics.timer('roti')
+    try:
+        data = request.json
+        timer.mark('parse')
+        if not data:
+            return respond(timer, 'error', {'error': 'No input data provided for roti'}, 400)
+        # Run the pipeline's transformers once, so the classifier input can be keyed
+        frame = records_frame([data])
+        timer.mark('frame')
+        roti_features = roti_transformer.transform(frame)
+        timer.mark('scale')
+        cache_key = roti['quantizer'].key(roti_features[0])
+        result = prediction_cache.get('roti', cache_key)
+        timer.mark('cache')
+        outcome = 'cache'
+        if result is None:
+            probability = micro_batchers['roti'].submit(roti_features[0])
+            prediction = roti_classifier.classes_[probability.argmax()]
+            is_spoiled = (prediction == 1) 
+            confidence = probability[1] if is_spoiled else probability[0]
+            if is_spoiled:
+                result = {'status': 'Spoiled', 'message': f'Spoiled - Unsafe to consume. (Confidence: {confidence*100:.2f}%)', 'is_safe': False}
+            else:
+                result = {'status': 'Fresh', 'message': f'Fresh - Safe to consume. (Confidence: {confidence*100:.2f}%)', 'is_safe': True}
+            prediction_cache.put('roti', cache_key, result)
+            outcome = 'model'
+            timer.mark('predict')
+        return respond(timer, outcome, result)
+    except Exception as e:
+        current_app.logger.error(f"Roti Prediction error: {str(e)}")
+        return respond(timer, 'error', {'error': f'An unexpected error occurred: {str(e)}'}, 500)
+
+
+
+# --- BATCH Endpoint ---
+# Accepts a JSON array (or {"items": [...]}) of items, each tagged with "food".
+# Foods can be mixed; every food group is scored with one model call.
+@bp.route('/api/predict_batch', methods=['POST'])
+def predict_batch():
+    timer = stage_metrics.timer('batch')
+    try:
+        payload = request.get_json(silent=True)
+        timer.mark('parse')
+        items = payload.get('items') if isinstance(payload, dict) else payload
+        if not isinstance(items, list) or not items:
+            return respond(timer, 'error', {'error': 'Expected a non-empty JSON array of items.'}, 400)
+        if len(items) > BATCH_MAX_ITEMS:
+            return respond(timer, 'error', {'error': f'Batch too large: at most {BATCH_MAX_ITEMS} items per request.'}, 413)
+
+        results = [None] * len(items)
+        groups = {}
+        for i, item in enumerate(items):
+            food = str(item.get('food', '')).strip().lower() if isinstance(item, dict) else ''
+            if food not in BATCH_PREDICTORS:
+                results[i] = _batch_error(f"Unknown or missing 'food' (expected one of: {', '.join(BATCH_PREDICTORS)}).")
+                continue
+            groups.setdefault(food, []).append(i)
+
+        for food, indices in groups.items():
+            try:
+                group_results = BATCH_PREDICTORS[food]([items[i] for i in indices])
+            except ModelWarming as e:
+                group_results = [{'error': str(e), 'is_safe': False, 'status': 'warming'}] * len(indices)
+            except Exception as e:
+                current_app.logger.error(f"Batch {food} prediction error: {str(e)}")
+                group_results = [_batch_error(f'An unexpected error occurred during {food} prediction.')] * len(indices)
+            for i, result in zip(indices, group_results):
+                results[i] = result
+        timer.mark('predict')
+
+        response = []
+        log_entries = []
+        for i, (item, result) in enumerate(zip(items, results)):
+            food = item.get('food') if isinstance(item, dict) else None
+            response.append({'index': i, 'food': food, **result})
+            if 'error' not in result:
+                log_entries.append((item, result))
+        log_predictions_batch(log_entries)
+        timer.mark('log')
+        return respond(timer, 'model', {'results': response, 'count': len(response), 'errors': sum(1 for r in results if 'error' in r)})
+    except Exception as e:
+        current_app.logger.error(f"Batch Prediction error: {str(e)}")
+        return respond(timer, 'error', {'error': 'An unexpected error occurred.'}, 500)
+
+
+# --- FORECAST Endpoint ---
+# Takes one item, tagged with "food" as in /api/predict_batch, and answers it at
+# every step from its current age up to the food's cap, with every other field
+# as sent. The steps go through the food's batch predictor as one batch, so the
+# rules run as masks over the time axis and the model is called once for the
+# whole curve.
+FORECAST_AXES = { # food -> (time field, unit, last step)
+    'rice': ('hours_since_cooking', 'hours', RICE_HOURS_CAP),
+    'milk': ('days_since_open_or_purchase', 'days', MILK_DAYS_CAP),
+    'paneer': ('days_since_purchase_or_cooked', 'days', PANEER_DAYS_CAP),
+    'dal': ('Time_since_preparation_hours', 'hours', DAL_HOURS_CAP),
+    'roti': ('time_since_cooking_hr', 'hours', ROTI_HOURS_RANGE)
+}
+
+@bp.route('/api/forecast', methods=['POST'])
+def forecast():
+    timer = stage_metrics.timer('forecast')
+    try:
+        data = request.get_json(silent=True)
+        timer.mark('parse')
+        if not isinstance(data, dict) or not data:
+            return respond(timer, 'error', {'error': 'No input data provided for forecast'}, 400)
+        food = str(data.get('food', '')).strip().lower()
+        if food not in FORECAST_AXES:
+            return respond(timer, 'error', {'error': f"Unknown or missing 'food' (expected one of: {', '.join(FORECAST_AXES)})."}, 400)
+        field, unit, cap = FORECAST_AXES[food]
+        try:
+            start = float(data[field])
+        except KeyError:
+            return respond(timer, 'error', {'error': f"Missing required field for {food} forecast: {field}"}, 400)
+        except (ValueError, TypeError):
+            return respond(timer, 'error', {'error': f"Error: '{field}' must be a number."}, 400)
+        if not np.isfinite(start) or start < 0:
+            return respond(timer, 'error', {'error': f"Error: '{field}' must be a non-negative number."}, 400)
+        timer.mark('validate')
+
+        # One step per whole unit; an item already past the cap gets just its current step
+        steps = start + np.arange(int(max(cap - start, 0)) + 1)
+        items = [{**data, field: t} for t in steps.tolist()]
+        timer.mark('frame')
+        confidence = np.full(len(items), np.nan)
+        results = BATCH_PREDICTORS[food](items, confidence=confidence)
+        timer.mark('predict')
+        if 'error' in results[0]:
+            return respond(timer, 'error', results[0], 400)
+
+        curve = []
+        first_unsafe = None
+        for t, result, p in zip(steps.tolist(), results, confidence.tolist()):
+            ruled = p != p # NaN: answered by a rule, not the model
+            curve.append({
+                unit: t, 'status': result['status'], 'is_safe': result['is_safe'],
+                'confidence': 100.0 if ruled else round(p * 100, 2), 'source': 'rule' if ruled else 'model'
+            })
+            if first_unsafe is None and result['is_safe'] is False:
+                first_unsafe = t
+        return respond(timer, 'model', {
+            'food': food, 'unit': unit, 'steps': curve, 'count': len(curve),
+            'first_unsafe': first_unsafe,
+            'safe_for': None if first_unsafe is None else first_unsafe - start
+        })
+    except ModelWarming:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Forecast error: {str(e)}")
+        return respond(timer, 'error', {'error': 'An unexpected error occurred.'}, 500)
+
+
+# Eager / background warm-up, now that the helpers the loaders use exist
+if MODEL_LOADING == 'eager':
+    for name in models.names():
+        models.get(name, wait=True)
+elif MODEL_LOADING == 'background':
+    models.warm()
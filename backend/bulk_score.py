@@ -0,0 +1,194 @@
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+# --- Bulk Scoring ---
+# Re-scores a CSV export in the schema of the food's bundled
+# ML/<food>/*_spoilage_dataset.csv, offline, with the same validation and
+# food-safety rules as the predict routes. Each chunk goes through the food's
+# predict_<food>_batch: rules as masks, then one model call for the rest.
+# The input is read --chunk-rows rows at a time, and at most two chunks per
+# worker are in flight. Results are written in input order as they finish, so
+# memory stays bounded however large the file is.
+# The output is the input's columns plus status, is_safe, confidence (%),
+# source (rule, model or error), message and error. It is written as CSV, or
+# as Parquet (needs pyarrow) for a .parquet path or with --format parquet.
+# Settings such as PREDICTION_MODE come from the environment, as for the server.
+#
+#   python bulk_score.py rice audit.csv scored.csv [--chunk-rows 50000] [--workers 4]
+#   python bulk_score.py dal audit.csv scored.parquet
+
+FOODS = ('rice', 'milk', 'paneer', 'dal', 'roti')
+RESULT_COLUMNS = ['status', 'is_safe', 'confidence', 'source', 'message', 'error']
+# The dal dataset's wording differs from the categories the dal model was trained on; its values are
+# translated to the nearest category (and the oil separation bands to a fraction) before scoring.
+# Values that are already in the model's vocabulary pass through unchanged.
+DATASET_VOCABULARY = {
+    'dal': {
+        'Storage_place': {'Refrigerated (≈4°C)': 'Refrigerator', 'Room temperature (≈25°C)': 'Room Temperature',
+                          'Covered in container': 'Room Temperature', 'Insulated container': 'Room Temperature',
+                          'Open air / uncovered': 'Room Temperature', 'Warm environment (≈35°C)': 'Room Temperature'},
+        'Acidity_source': {'High (pH~4.5)': 'High', 'Moderate (pH~5.5)': 'Moderate', 'Low (pH~6.5)': 'Low/Normal', 'None': 'Low/Normal'},
+        'Consistency': {'Normal (smooth)': 'Normal', 'Thickened': 'Slightly Thickened', 'Watery separation': 'Watery',
+                        'Mushy': 'Slimy', 'Clotted/curdled': 'Slimy'},
+        'Container_type': {'Glass jar sealed': 'Ceramic/Glass', 'Metal container': 'Steel/Metal', 'Thermal flask': 'Steel/Metal',
+                           'Plastic box with lid': 'Plastic', 'Open bowl': 'Ceramic/Glass'},
+        'Smell': {'Fresh/normal': 'Normal', 'Slight off-smell': 'Slightly Sour', 'Sour fermentation smell': 'Very Sour',
+                  'Rancid smell': 'Foul', 'Strong off-odor': 'Foul'},
+        'Oil_separation': {'None': 0.0, '<5%': 0.03, 'Oil film present': 0.05, '5-15%': 0.1, '>15%': 0.2},
+    }
+}
+# Blank cells in these columns are sent as null rather than left out: the model scores a missing value
+NULLABLE_FIELDS = {'dal': ('Oil_separation',)}
+
+
+def chunk_items(food, chunk):
+    """The chunk's rows as request items: vocabulary translated, blank cells left out (so they count as missing)
+    or, in NULLABLE_FIELDS, sent as None."""
+    frame = chunk
+    vocabulary = DATASET_VOCABULARY.get(food, {})
+    if vocabulary:
+        frame = chunk.copy()
+        for column, mapping in vocabulary.items():
+            if column in frame:
+                mapped = frame[column].map(mapping)
+                frame[column] = mapped.where(mapped.notna(), frame[column])
+    nullable = NULLABLE_FIELDS.get(food, ())
+    return [{key: value if value == value else None for key, value in record.items() # NaN != NaN
+             if value == value or key in nullable}
+            for record in frame.to_dict('records')]
+
+
+def score_chunk(food, chunk):
+    """The chunk (a DataFrame) with RESULT_COLUMNS appended."""
+    import pandas as pd
+    from blueprints import predictions
+    items = chunk_items(food, chunk)
+    confidence = np.full(len(items), np.nan)
+    results = predictions.BATCH_PREDICTORS[food](items, confidence=confidence)
+    errors = np.array(['error' in result for result in results], dtype=bool)
+    ruled = np.isnan(confidence) & ~errors
+    scored = chunk.copy()
+    scored['status'] = [result.get('status') for result in results]
+    # Nullable: milk's 'Starting' is neither safe nor unsafe
+    scored['is_safe'] = pd.array([result.get('is_safe') for result in results], dtype='boolean')
+    scored['confidence'] = np.where(ruled, 100.0, np.round(confidence * 100, 2))
+    scored['source'] = np.where(errors, 'error', np.where(ruled, 'rule', 'model'))
+    scored['message'] = [result.get('message') for result in results]
+    scored['error'] = [result.get('error') for result in results]
+    return scored
+
+
+def _load_worker(food):
+    from blueprints import predictions
+    predictions.models.get(food, wait=True)
+
+
+class CsvOutput:
+    def __init__(self, path):
+        self.path = path
+        self._header = True
+
+    def write(self, frame):
+        frame.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        pass
+
+
+class ParquetOutput:
+    """One row group per chunk. The schema is fixed by the first chunk, with integer inputs widened to
+    float64, since a later chunk with a blank cell is read as floats."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("❌ Parquet output needs pyarrow (pip install pyarrow), or write to a .csv path")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self._writer = None
+        self._schema = None
+
+    def write(self, frame):
+        pa = self.pa
+        if self._schema is None:
+            schema = pa.Schema.from_pandas(frame, preserve_index=False)
+            fields = []
+            for field in schema:
+                if field.name in RESULT_COLUMNS:
+                    kind = {'is_safe': pa.bool_(), 'confidence': pa.float64()}.get(field.name, pa.string())
+                    fields.append(pa.field(field.name, kind))
+                elif pa.types.is_integer(field.type):
+                    fields.append(pa.field(field.name, pa.float64()))
+                else:
+                    fields.append(field)
+            self._schema = pa.schema(fields)
+            self._writer = self.pq.ParquetWriter(self.path, self._schema)
+        self._writer.write_table(pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def scored_chunks(food, reader, workers):
+    """Scores the reader's chunks in order, on `workers` processes (0 or 1: in this one)."""
+    if workers <= 1:
+        _load_worker(food)
+        for chunk in reader:
+            yield score_chunk(food, chunk)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_worker, initargs=(food,)) as pool:
+        pending = deque()
+        for chunk in reader:
+            pending.append(pool.submit(score_chunk, food, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Score a spoilage CSV export with the served models, offline.')
+    parser.add_argument('food', choices=FOODS)
+    parser.add_argument('input', help="CSV in the schema of the food's ML/<food>/*_spoilage_dataset.csv")
+    parser.add_argument('output', help='.csv or .parquet')
+    parser.add_argument('--format', choices=['csv', 'parquet'], help='default: from the output extension')
+    parser.add_argument('--chunk-rows', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=1, help='processes scoring chunks (default: 1, this one)')
+    args = parser.parse_args()
+
+    import pandas as pd
+    output_format = args.format or ('parquet' if os.path.splitext(args.output)[1].lower() in ('.parquet', '.pq') else 'csv')
+    output = ParquetOutput(args.output) if output_format == 'parquet' else CsvOutput(args.output)
+    # Only blank cells are missing: 'None' is a category in the dal data
+    reader = pd.read_csv(args.input, chunksize=args.chunk_rows, keep_default_na=False, na_values=[''])
+    start = time.perf_counter()
+    rows = 0
+    sources = {'rule': 0, 'model': 0, 'error': 0}
+    try:
+        for scored in scored_chunks(args.food, reader, args.workers):
+            output.write(scored)
+            rows += len(scored)
+            for source, count in scored['source'].value_counts().items():
+                sources[source] += int(count)
+            elapsed = time.perf_counter() - start
+            print(f"... {rows:,} rows, {rows / elapsed:,.0f} rows/s", file=sys.stderr)
+    finally:
+        output.close()
+    elapsed = time.perf_counter() - start
+    print(f"✅ {args.food}: {rows:,} rows in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s) -> {args.output}")
+    print(f"--- answered by rule: {sources['rule']:,}, model: {sources['model']:,}, errors: {sources['error']:,} ---")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict, deque
+
+# --- Chat History Cache ---
+# Write-through cache of each user's last few chat turns. The chat route
+# appends a turn when it logs one, and reads come from the cache; Firestore is
+# only queried the first time a user is seen (per process, or after the user
+# was evicted). Users are kept in LRU order up to max_users, and each user's
+# turns are a ring buffer of turns_per_user entries.
+
+
+class _UserHistory:
+    def __init__(self, turns_per_user):
+        self.turns = deque(maxlen=turns_per_user) # (user_message, bot_response), oldest first
+        self.hydrated = False # True once the stored history has been merged in
+
+
+class ChatHistoryCache:
+    def __init__(self, fetch, max_users=10000, turns_per_user=5):
+        """fetch(userId, limit) returns the stored turns, oldest first."""
+        self.fetch = fetch
+        self.max_users = max_users
+        self.turns_per_user = turns_per_user
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'appends': 0}
+
+    @property
+    def enabled(self):
+        return self.max_users > 0
+
+    def get(self, userId, limit=None):
+        """Returns the user's last `limit` turns, oldest first."""
+        limit = self.turns_per_user if limit is None else limit
+        if not self.enabled or limit > self.turns_per_user:
+            return self.fetch(userId, limit)
+        turns = self._cached(userId, limit)
+        if turns is not None:
+            return turns
+        return self._hydrate(userId, self.fetch(userId, self.turns_per_user), limit)
+
+    async def get_async(self, userId, fetch, limit=None):
+        """get() for the async chat route, with fetch(userId, limit) a coroutine function."""
+        limit = self.turns_per_user if limit is None else limit
+        if not self.enabled or limit > self.turns_per_user:
+            return await fetch(userId, limit)
+        turns = self._cached(userId, limit)
+        if turns is not None:
+            return turns
+        return self._hydrate(userId, await fetch(userId, self.turns_per_user), limit)
+
+    def _cached(self, userId, limit):
+        with self._lock:
+            entry = self._users.get(userId)
+            if entry is not None and entry.hydrated:
+                self._users.move_to_end(userId)
+                self._stats['hits'] += 1
+                return list(entry.turns)[-limit:] if limit else []
+            self._stats['misses'] += 1
+            return None
+
+    def _hydrate(self, userId, stored, limit):
+        with self._lock:
+            entry = self._entry(userId)
+            if not entry.hydrated:
+                # Turns appended before hydration may or may not have reached
+                # the store yet (the log sink writes in the background). Those
+                # already stored are the oldest of them, so drop that overlap.
+                local = list(entry.turns)
+                overlap = next((k for k in range(min(len(local), len(stored)), 0, -1)
+                                if stored[-k:] == local[:k]), 0)
+                entry.turns.clear()
+                entry.turns.extend(stored + local[overlap:])
+                entry.hydrated = True
+            return list(entry.turns)[-limit:] if limit else []
+
+    def append(self, userId, user_message, bot_response):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entry(userId).turns.append((user_message, bot_response))
+            self._stats['appends'] += 1
+
+    def _entry(self, userId):
+        # Called with the lock held
+        entry = self._users.get(userId)
+        if entry is None:
+            entry = self._users[userId] = _UserHistory(self.turns_per_user)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self._stats['evictions'] += 1
+        self._users.move_to_end(userId)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'users': len(self._users),
+                'capacity': self.max_users,
+                'hit_ratio': round(self._stats['hits'] / lookups, 4) if lookups else None
+            }
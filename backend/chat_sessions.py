@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+# --- Chat Session Pool ---
+# Keeps one live Gemini chat session per (userId, mode), so a follow-up message
+# is sent on the session that already holds the conversation instead of
+# re-seeding a new one from Firestore history every time. Least recently used
+# sessions are evicted past max_sessions, and sessions idle for idle_seconds
+# are dropped on the next lookup. acquire_async is the same for the async
+# chat route, whose session is created by a coroutine and held with alock.
+# Each session also records the user messages it has been sent. A request
+# whose history doesn't end with those messages (a new conversation, or one
+# from another tab) gets a freshly seeded session instead. Only user turns are
+# compared: the client keeps the parsed reply, not the text Gemini returned.
+
+
+class _PooledSession:
+    def __init__(self, session, turns=()):
+        self.session = session
+        self.turns = list(turns) # user messages in the seed and sent since, oldest first
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock() # one in-flight message per session
+        self.alock = asyncio.Lock() # the same, for the async chat route
+
+    def continues(self, turns):
+        """Whether a client history with these user messages is this session's conversation."""
+        if not turns:
+            return not self.turns
+        return self.turns[-len(turns):] == list(turns)
+
+
+class ChatSessionPool:
+    def __init__(self, max_sessions=1000, idle_seconds=1800.0, max_history=16):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.max_history = max_history # messages kept per session (user + model turns)
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'resets': 0}
+
+    @property
+    def enabled(self):
+        return self.max_sessions > 0
+
+    def acquire(self, key, create, turns=()):
+        """
+        Returns (pooled, created) for `key`, calling create() for a new session if
+        there is no live one, or if the live one doesn't continue the client's
+        conversation. turns: the user messages of the client's history, oldest
+        first. The caller holds pooled.lock while sending, and calls release()
+        afterwards.
+        """
+        pooled = self._lookup(key, turns)
+        if pooled is not None:
+            return pooled, False
+        # create() may query Firestore, so build the session outside the pool lock
+        return self._insert(key, _PooledSession(create(), turns)), True
+
+    async def acquire_async(self, key, create, turns=()):
+        """acquire() with an async create(); the caller holds pooled.alock while sending."""
+        pooled = self._lookup(key, turns)
+        if pooled is not None:
+            return pooled, False
+        return self._insert(key, _PooledSession(await create(), turns)), True
+
+    def _lookup(self, key, turns):
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            pooled = self._sessions.get(key)
+            if pooled is not None and not pooled.continues(turns):
+                del self._sessions[key]
+                self._stats['resets'] += 1
+                pooled = None
+            if pooled is not None:
+                self._sessions.move_to_end(key)
+                self._stats['hits'] += 1
+                pooled.last_used = now
+                return pooled
+            self._stats['misses'] += 1
+            return None
+
+    def _insert(self, key, pooled):
+        with self._lock:
+            self._sessions[key] = pooled
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._stats['evictions'] += 1
+        return pooled
+
+    def release(self, key, pooled, ok=True, turn=None):
+        """Records the sent user message (turn) and trims the session's history, or drops it if the send failed."""
+        if not ok:
+            with self._lock:
+                if self._sessions.get(key) is pooled:
+                    del self._sessions[key]
+            return
+        if turn is not None:
+            pooled.turns = (pooled.turns + [turn])[-self.max_history:]
+        history = pooled.session.history
+        if len(history) > self.max_history:
+            # Cut back to half the limit rather than sliding by one turn, so the
+            # prompt prefix stays the same for several turns between trims (that
+            # prefix is what Gemini can cache). Keep whole user/model pairs.
+            keep = (self.max_history // 2) & ~1
+            pooled.session.history = history[len(history) - keep:]
+        pooled.last_used = time.monotonic()
+
+    def _evict_idle(self, now):
+        # Called with the lock held. OrderedDict is in last-used order, oldest first.
+        while self._sessions:
+            key, pooled = next(iter(self._sessions.items()))
+            if now - pooled.last_used < self.idle_seconds:
+                break
+            del self._sessions[key]
+            self._stats['expired'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def stats(self):
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'size': len(self._sessions),
+                'capacity': self.max_sessions,
+                'hit_ratio': round(self._stats['hits'] / lookups, 4) if lookups else None
+            }
@@ -0,0 +1,140 @@
+import json
+
+# --- Streaming reply parser ---
+# Gemini streams the chat reply as arbitrary text chunks of a ```json fenced
+# object. ReplyStreamParser scans the chunks as they arrive, without waiting
+# for the object to close, and reports:
+#   ('replyText', delta)   new characters of the top-level "replyText" string
+#   ('recipe', obj)        each element of "recipes" once it is complete
+#   ('safetyTip', value)   each element of "safetyTips" once it is complete
+# Anything it can't follow is left for the normal full-text parse at the end.
+
+STREAMED_ARRAYS = {'recipes': 'recipe', 'safetyTips': 'safetyTip'}
+
+
+class _Frame:
+    def __init__(self, kind):
+        self.kind = kind # '{' or '['
+        self.key = None # last key seen (objects)
+        self.expect_key = kind == '{'
+        self.elem_start = None # start of the current element (arrays)
+
+
+class ReplyStreamParser:
+    def __init__(self):
+        self.text = ''
+        self._pos = 0
+        self._started = False # seen the opening '{'
+        self._done = False # top-level object closed
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._string_is_key = False
+        self._reply_start = None # start of the replyText string value, while inside it
+        self._reply_sent = ''
+
+    def feed(self, chunk):
+        """Adds a chunk of model output; returns the list of (event, value) it completes."""
+        self.text += chunk
+        events = []
+        if not self._started:
+            start = self._find_object_start()
+            if start is None:
+                return events
+            self._started = True
+            self._pos = start
+        text = self.text
+        while self._pos < len(text) and not self._done:
+            i = self._pos
+            c = text[i]
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._end_string(i, events)
+                continue
+            frame = self._stack[-1] if self._stack else None
+            if c.isspace():
+                continue
+            if frame is not None and frame.kind == '[' and frame.elem_start is None and c not in ',]':
+                frame.elem_start = i
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                self._string_is_key = frame is not None and frame.kind == '{' and frame.expect_key
+                if (not self._string_is_key and len(self._stack) == 1 and frame.key == 'replyText'):
+                    self._reply_start = i
+            elif c in '{[':
+                self._stack.append(_Frame(c))
+            elif c in '}]':
+                if not self._stack:
+                    self._done = True
+                    break
+                if c == ']':
+                    self._end_element(frame, i, events)
+                self._stack.pop()
+                if not self._stack:
+                    self._done = True
+            elif c == ':':
+                if frame is not None and frame.kind == '{':
+                    frame.expect_key = False
+            elif c == ',':
+                if frame is None:
+                    continue
+                if frame.kind == '{':
+                    frame.expect_key = True
+                else:
+                    self._end_element(frame, i, events)
+        if self._reply_start is not None:
+            self._emit_reply(events, final=False)
+        return events
+
+    def _find_object_start(self):
+        fence = self.text.lower().find('```json')
+        brace = self.text.find('{', fence if fence != -1 else 0)
+        return brace if brace != -1 else None
+
+    def _end_string(self, end, events):
+        frame = self._stack[-1] if self._stack else None
+        if self._string_is_key:
+            try:
+                frame.key = json.loads(self.text[self._string_start:end + 1])
+            except ValueError:
+                frame.key = None
+            return
+        if self._reply_start is not None:
+            self._emit_reply(events, final=True)
+            self._reply_start = None
+
+    def _end_element(self, frame, end, events):
+        if frame is None or frame.kind != '[' or frame.elem_start is None:
+            return
+        parent = self._stack[-2] if len(self._stack) >= 2 else None
+        event = STREAMED_ARRAYS.get(parent.key) if parent is not None and len(self._stack) == 2 else None
+        raw = self.text[frame.elem_start:end].strip()
+        frame.elem_start = None
+        if event and raw:
+            try:
+                events.append((event, json.loads(raw)))
+            except ValueError:
+                pass
+
+    def _emit_reply(self, events, final):
+        raw = self.text[self._reply_start + 1:self._pos - 1 if final else self._pos]
+        # A chunk can end halfway through an escape sequence (e.g. '\\u00'); back off up to 5 chars
+        for trim in range(1 if final else 6):
+            try:
+                decoded = json.loads('"' + raw[:len(raw) - trim] + '"')
+                break
+            except ValueError:
+                continue
+        else:
+            return
+        if len(decoded) > len(self._reply_sent) and decoded.startswith(self._reply_sent):
+            events.append(('replyText', decoded[len(self._reply_sent):]))
+            self._reply_sent = decoded
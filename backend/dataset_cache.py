@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+
+from lookup_tables import file_sha256
+
+# --- Dataset Cache ---
+# Training and the verify commands load the ML/<food> CSVs again on every run.
+# read_dataset() parses a CSV once and stores a typed, columnar copy in
+# DATASET_CACHE_DIR (default backend/cache/datasets). Text columns are stored
+# as categoricals: an integer code per row plus the sorted category list, so
+# get_dummies still orders the one-hot columns as before. Later runs
+# memory-map that copy instead of parsing the CSV again.
+# A copy records its source's size, mtime and SHA-256. While the size and
+# mtime match, the copy is used as it is. Otherwise the CSV is hashed again:
+# if only the mtime changed, the copy is kept, and if the content changed it
+# is rebuilt.
+# The copy is a directory holding meta.json and the columns. The columns are
+# one Feather file when pyarrow is installed, or else one .npy file per
+# column. save_frame()/load_frame() write and read that same layout, and are
+# also used for design matrices (e.g. ML/paneer/paneer_preprocessed).
+# Only blank cells are read as missing, since 'None' is a category in the dal
+# data. DATASET_CACHE_DIR= (empty) turns the cache off.
+#
+#   python dataset_cache.py build  [csv ...]   # cache every ML/*/*.csv (or the given ones)
+#   python dataset_cache.py verify [csv ...]   # cached copy vs a fresh parse of the CSV
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.getenv('DATASET_CACHE_DIR', os.path.join('cache', 'datasets'))
+CACHE_DIR = CACHE_DIR and os.path.join(BACKEND_DIR, CACHE_DIR) # relative to backend/, wherever training runs from
+CACHE_VERSION = 1
+META_FILE = 'meta.json'
+FEATHER_FILE = 'columns.feather'
+
+
+def have_pyarrow():
+    import importlib.util
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def read_csv(path):
+    """The CSV as pandas parses it, except that only blank cells are missing."""
+    import pandas as pd
+    return pd.read_csv(path, keep_default_na=False, na_values=[''])
+
+
+def typed_frame(frame):
+    """The frame with its text columns as categoricals (categories sorted, missing cells coded -1)."""
+    for column in frame.columns:
+        if frame[column].dtype == object:
+            frame[column] = frame[column].astype('category')
+    return frame
+
+
+def read_meta(path):
+    try:
+        with open(os.path.join(path, META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_meta(path, meta):
+    tmp = os.path.join(path, f"{META_FILE}.tmp-{os.getpid()}")
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(path, META_FILE))
+
+
+def save_frame(frame, path, format=None, meta=None):
+    """Writes the frame to the directory `path`, replacing what was there. format is 'feather' or 'npy'
+    (default: feather if pyarrow is installed). meta: extra keys for meta.json."""
+    import pandas as pd
+    format = format or ('feather' if have_pyarrow() else 'npy')
+    frame = typed_frame(frame.reset_index(drop=True).copy())
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    columns = []
+    for i, column in enumerate(frame.columns):
+        values = frame[column]
+        entry = {'name': column, 'dtype': str(values.dtype)}
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            entry['dtype'] = 'category'
+            entry['categories'] = values.cat.categories.tolist()
+            values = values.cat.codes
+        if format == 'npy':
+            np.save(os.path.join(tmp, f'{i}.npy'), values.to_numpy(), allow_pickle=False)
+        columns.append(entry)
+    if format == 'feather':
+        import pyarrow.feather
+        pyarrow.feather.write_feather(frame, os.path.join(tmp, FEATHER_FILE), compression='uncompressed')
+    write_meta(tmp, {'version': CACHE_VERSION, 'format': format, 'rows': len(frame), 'columns': columns, **(meta or {})})
+    if os.path.isdir(path):
+        old = f"{path}.old-{os.getpid()}"
+        os.rename(path, old)
+        os.rename(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        os.rename(tmp, path)
+
+
+def load_frame(path):
+    """The frame saved at `path`, memory-mapped copy-on-write: writing to it never changes the files."""
+    import pandas as pd
+    meta = read_meta(path)
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        raise FileNotFoundError(f"No saved frame at {path}")
+    if meta['format'] == 'feather':
+        import pyarrow.feather
+        return pyarrow.feather.read_table(os.path.join(path, FEATHER_FILE), memory_map=True).to_pandas()
+    data = {}
+    for i, entry in enumerate(meta['columns']):
+        values = np.load(os.path.join(path, f'{i}.npy'), mmap_mode='c' if meta['rows'] else None).view(np.ndarray)
+        if entry['dtype'] == 'category':
+            values = pd.Categorical.from_codes(values, entry['categories'])
+        data[entry['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def cache_path(source, cache_dir=None):
+    source = os.path.abspath(source)
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', os.path.splitext(os.path.basename(source))[0]).strip('_')
+    return os.path.join(CACHE_DIR if cache_dir is None else cache_dir,
+                        f"{name}-{hashlib.sha1(source.encode()).hexdigest()[:8]}")
+
+
+def cached_copy(source, cache_dir=None):
+    """(path of the source's up-to-date cached copy, whether it had to be built)."""
+    source = os.path.abspath(source)
+    path = cache_path(source, cache_dir)
+    stat = os.stat(source)
+    meta = read_meta(path)
+    if meta is not None and meta.get('version') == CACHE_VERSION and meta.get('source') == source:
+        if meta['source_size'] == stat.st_size and meta['source_mtime_ns'] == stat.st_mtime_ns:
+            return path, False
+        digest = file_sha256(source)
+        if meta['source_sha256'] == digest: # touched, not changed
+            meta['source_size'], meta['source_mtime_ns'] = stat.st_size, stat.st_mtime_ns
+            write_meta(path, meta)
+            return path, False
+    else:
+        digest = file_sha256(source)
+    save_frame(read_csv(source), path, meta={
+        'source': source, 'source_sha256': digest, 'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns
+    })
+    return path, True
+
+
+def read_dataset(source, cache_dir=None):
+    """The CSV at `source` as a DataFrame with categorical text columns, from its cached copy."""
+    if not (CACHE_DIR if cache_dir is None else cache_dir):
+        return typed_frame(read_csv(source))
+    return load_frame(cached_copy(source, cache_dir)[0])
+
+
+def frames_equal(cached, parsed):
+    """Same columns, dtypes (text as categoricals) and values."""
+    import pandas as pd
+    try:
+        pd.testing.assert_frame_equal(cached, typed_frame(parsed), check_categorical=True)
+    except AssertionError:
+        return False
+    return True
+
+
+def main():
+    import argparse
+    import glob
+    import time
+    parser = argparse.ArgumentParser(description='Build or verify the columnar copies of the training CSVs.')
+    parser.add_argument('command', choices=['build', 'verify'])
+    parser.add_argument('sources', nargs='*', help='CSV files (default: every ML/*/*.csv)')
+    args = parser.parse_args()
+
+    if not CACHE_DIR:
+        raise SystemExit("❌ DATASET_CACHE_DIR is empty, so the dataset cache is off")
+    sources = args.sources or sorted(glob.glob(os.path.join(BACKEND_DIR, 'ML', '*', '*.csv')))
+    failed = False
+    print(f"--- {len(sources)} CSVs, {'Feather' if have_pyarrow() else '.npy'} columns in {CACHE_DIR} ---")
+    for source in sources:
+        label = os.path.relpath(source, BACKEND_DIR)
+        start = time.perf_counter()
+        path, built = cached_copy(source)
+        frame = load_frame(path)
+        elapsed = time.perf_counter() - start
+        if args.command == 'build':
+            categorical = sum(1 for dtype in frame.dtypes if dtype == 'category')
+            print(f"✅ {label}: {len(frame):,} rows x {frame.shape[1]} columns ({categorical} categorical), "
+                  f"{'built' if built else 'up to date'} ({elapsed * 1000:.1f} ms)")
+            continue
+        start = time.perf_counter()
+        parsed = read_csv(source)
+        parse_ms = (time.perf_counter() - start) * 1000
+        ok = frames_equal(frame, parsed)
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {label}: {len(frame):,} rows {'match' if ok else 'DIFFER from'} the CSV "
+              f"(cached load {elapsed * 1000:.1f} ms, CSV parse {parse_ms:.1f} ms)")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
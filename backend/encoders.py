@@ -0,0 +1,231 @@
+import itertools
+import numpy as np
+
+# --- RICE Encoder ---
+# Compiled once from RICE_MODEL_FEATURES so every request goes straight from the
+# validated JSON fields to a float64 row, with no DataFrame in between.
+
+class RiceFeatureEncoder:
+    def __init__(self, feature_names, smell_map, appearance_map):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.smell_map = dict(smell_map)
+        self.appearance_map = dict(appearance_map)
+        index = {name: i for i, name in enumerate(self.feature_names)}
+        self._hours_idx = index['hours_since_cooking']
+        self._initial_idx = index['initial_hours_at_room_temp']
+        self._smell_idx = index['smell_encoded']
+        self._appearance_idx = index['appearance_encoded']
+        # One-hot slots, keyed on the raw category value the user sends
+        self._storage_idx = {
+            name[len('storage_location_'):]: i for name, i in index.items() if name.startswith('storage_location_')
+        }
+        self._cooling_idx = {
+            name[len('cooling_method_'):]: i for name, i in index.items() if name.startswith('cooling_method_')
+        }
+
+    def new_row(self):
+        return np.zeros((1, self.n_features), dtype=np.float64)
+
+    def encode(self, hours_since_cooking, initial_hours, smell, appearance, storage, cooling, out=None):
+        """Returns a (1, n_features) float64 row laid out in RICE_MODEL_FEATURES order."""
+        row = self.new_row() if out is None else out
+        if out is not None:
+            row.fill(0.0)
+        vec = row[0]
+        # NaN -> 0, like the DataFrame path's fillna(0)
+        vec[self._hours_idx] = hours_since_cooking if hours_since_cooking == hours_since_cooking else 0.0
+        vec[self._initial_idx] = initial_hours if initial_hours == initial_hours else 0.0
+        vec[self._smell_idx] = self.smell_map.get(smell, 0)
+        vec[self._appearance_idx] = self.appearance_map.get(appearance, 0)
+        storage_idx = self._storage_idx.get(storage)
+        if storage_idx is not None:
+            vec[storage_idx] = 1.0
+        cooling_idx = self._cooling_idx.get(cooling)
+        if cooling_idx is not None:
+            vec[cooling_idx] = 1.0
+        return row
+
+    def encode_batch(self, hours_since_cooking, initial_hours, smells, appearances, storages, coolings):
+        """Vectorized encode() for a whole batch; returns an (n, n_features) float64 matrix."""
+        n = len(hours_since_cooking)
+        X = np.zeros((n, self.n_features), dtype=np.float64)
+        X[:, self._hours_idx] = np.nan_to_num(np.asarray(hours_since_cooking, dtype=np.float64), nan=0.0, posinf=np.inf, neginf=-np.inf)
+        X[:, self._initial_idx] = np.nan_to_num(np.asarray(initial_hours, dtype=np.float64), nan=0.0, posinf=np.inf, neginf=-np.inf)
+        X[:, self._smell_idx] = [self.smell_map.get(s, 0) for s in smells]
+        X[:, self._appearance_idx] = [self.appearance_map.get(a, 0) for a in appearances]
+        rows = np.arange(n)
+        for lookup, values in ((self._storage_idx, storages), (self._cooling_idx, coolings)):
+            cols = np.array([lookup.get(v, -1) for v in values], dtype=np.intp)
+            hit = cols >= 0
+            X[rows[hit], cols[hit]] = 1.0
+        return X
+
+
+# --- PANEER Encoder ---
+# Compiled once from paneer_model_columns.json. The route has always built its
+# one-hot columns with a one-row get_dummies(drop_first=True), which drops
+# every category (a single row has only one level to drop), so those columns
+# reach the model as 0. The encoder keeps that behaviour: only days, smell and
+# texture are set.
+
+class PaneerFeatureEncoder:
+    def __init__(self, feature_names, smell_map, texture_map):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.smell_map = dict(smell_map)
+        self.texture_map = dict(texture_map)
+        index = {name: i for i, name in enumerate(self.feature_names)}
+        self._days_idx = index['days_since_purchase_or_cooked']
+        self._smell_idx = index['observed_smell']
+        self._texture_idx = index['texture_surface']
+
+    def new_row(self):
+        return np.zeros((1, self.n_features), dtype=np.float64)
+
+    def encode(self, days, smell, texture, out=None):
+        """Returns a (1, n_features) float64 row laid out in paneer_model_columns order."""
+        row = self.new_row() if out is None else out
+        if out is not None:
+            row.fill(0.0)
+        vec = row[0]
+        vec[self._days_idx] = days if days == days else 0.0 # NaN -> 0, like to_numeric(...).fillna(0)
+        vec[self._smell_idx] = self.smell_map.get(smell, 0)
+        vec[self._texture_idx] = self.texture_map.get(texture, 0)
+        return row
+
+    def encode_batch(self, days, smells, textures):
+        """Vectorized encode() for a whole batch; returns an (n, n_features) float64 matrix."""
+        X = np.zeros((len(days), self.n_features), dtype=np.float64)
+        X[:, self._days_idx] = np.nan_to_num(np.asarray(days, dtype=np.float64), nan=0.0, posinf=np.inf, neginf=-np.inf)
+        X[:, self._smell_idx] = [self.smell_map.get(s, 0) for s in smells]
+        X[:, self._texture_idx] = [self.texture_map.get(t, 0) for t in textures]
+        return X
+
+
+# --- Parity check against the original pandas path ---
+
+def _rice_features_pandas(encoder, hours_since_cooking, initial_hours, smell, appearance, storage, cooling):
+    """The DataFrame construction preprocess_and_validate_rice used before the encoder."""
+    import pandas as pd
+    data_for_df = {
+        'hours_since_cooking': [hours_since_cooking],
+        'initial_hours_at_room_temp': [initial_hours],
+        'smell_encoded': [encoder.smell_map.get(smell, 0)],
+        'appearance_encoded': [encoder.appearance_map.get(appearance, 0)],
+        'storage_location_Refrigerator': [1 if storage == 'Refrigerator' else 0],
+        'storage_location_Room Temperature': [1 if storage == 'Room Temperature' else 0],
+        'cooling_method_Cooled in shallow container': [1 if cooling == 'Cooled in shallow container' else 0],
+        'cooling_method_Left to cool in deep pot': [1 if cooling == 'Left to cool in deep pot' else 0],
+        'cooling_method_Not Applicable': [1 if cooling == 'Not Applicable' else 0]
+    }
+    features_df = pd.DataFrame(columns=encoder.feature_names)
+    features_df = pd.concat([features_df, pd.DataFrame(data_for_df)], ignore_index=True)
+    features_df = features_df.fillna(0)
+    return features_df[encoder.feature_names]
+
+
+def verify_rice_encoder(encoder, model=None, hours=((0.0, 0.0), (2.5, 1.0), (24.0, 6.0), (168.0, 168.0),
+                                                      (float('nan'), 1.0), (2.5, float('nan')))):
+    """
+    Runs every smell / appearance / storage / cooling combination (plus unknown
+    values) through both paths and checks the float64 rows are bit-identical.
+    Returns (checked, mismatches).
+    """
+    smells = list(encoder.smell_map) + [None]
+    appearances = list(encoder.appearance_map) + [None]
+    storages = list(encoder._storage_idx) + [None]
+    coolings = list(encoder._cooling_idx) + [None]
+    combos = list(itertools.product(hours, smells, appearances, storages, coolings))
+    checked, mismatches, fast_rows = 0, [], []
+    for (h, ih), smell, appearance, storage, cooling in combos:
+        fast = encoder.encode(h, ih, smell, appearance, storage, cooling)
+        legacy_df = _rice_features_pandas(encoder, h, ih, smell, appearance, storage, cooling)
+        legacy = np.asarray(legacy_df, dtype=np.float64)
+        same = fast.dtype == legacy.dtype and fast.shape == legacy.shape and fast.tobytes() == legacy.tobytes()
+        if same and model is not None:
+            same = np.array_equal(model.predict_proba(fast), model.predict_proba(legacy_df))
+        if not same:
+            mismatches.append((h, ih, smell, appearance, storage, cooling))
+        fast_rows.append(fast)
+        checked += 1
+    # The batch encoder must agree with the single-row one as well
+    columns = list(zip(*[(h, ih, smell, appearance, storage, cooling) for (h, ih), smell, appearance, storage, cooling in combos]))
+    batch = encoder.encode_batch(*columns)
+    for i in np.flatnonzero(np.any(batch != np.vstack(fast_rows), axis=1)):
+        (h, ih), smell, appearance, storage, cooling = combos[i]
+        mismatches.append(('batch', h, ih, smell, appearance, storage, cooling))
+    return checked, mismatches
+
+def _paneer_features_pandas(feature_names, smell_map, texture_map, data):
+    """The DataFrame construction predict_paneer used before the encoder."""
+    import pandas as pd
+    input_df = pd.DataFrame([data])
+    input_df['observed_smell'] = input_df['observed_smell'].map(smell_map).astype('Int64').astype(float)
+    input_df['texture_surface'] = input_df['texture_surface'].map(texture_map).astype('Int64').astype(float)
+    input_df['days_since_purchase_or_cooked'] = pd.to_numeric(input_df['days_since_purchase_or_cooked'], errors='coerce').fillna(0).astype(float)
+    categorical = [c for c in ['is_cooked', 'paneer_type', 'storage_location', 'storage_container_raw'] if c in input_df.columns]
+    for col in categorical:
+        input_df[col] = input_df[col].astype('category')
+    input_df = pd.get_dummies(input_df, columns=categorical, drop_first=True)
+    final_input_df = pd.DataFrame(columns=feature_names)
+    final_input_df = pd.concat([final_input_df, input_df], ignore_index=True)
+    final_input_df = final_input_df.fillna(0.0).astype(float)
+    return final_input_df[feature_names]
+
+
+# Dataset values, plus what the form sends ('Submerged in water (in fridge)') and an absent field
+PANEER_CATEGORIES = {
+    'is_cooked': ['Cooked (in a dish)', 'Raw (in a block)'],
+    'paneer_type': ['Packaged/Branded', 'Loose/Local'],
+    'storage_location': ['Refrigerator', 'Room Temperature'],
+    'storage_container_raw': ['Not Applicable', 'Original packaging', 'Airtight container', 'Submerged in water',
+                              'Submerged in water (in fridge)', None]
+}
+
+
+def verify_paneer_encoder(encoder, model=None, days=(0.0, 0.5, 1.0, 2.0, 3.5, 7.0, 10.0, 14.0, float('nan'))):
+    """
+    Runs every category / smell / texture combination (plus unknown values)
+    through both paths and checks the rows are bit-identical, and that
+    classes_[argmax(predict_proba)] matches predict. Returns (checked, mismatches).
+    """
+    smells = list(encoder.smell_map) + ['Unknown']
+    textures = list(encoder.texture_map) + ['Unknown']
+    checked, mismatches, payloads, fast_rows = 0, [], [], []
+    for d, smell, texture, cooked, ptype, storage, container in itertools.product(
+            days, smells, textures, *PANEER_CATEGORIES.values()):
+        data = {'days_since_purchase_or_cooked': d, 'is_cooked': cooked, 'paneer_type': ptype,
+                'storage_location': storage, 'observed_smell': smell, 'texture_surface': texture}
+        if container is not None:
+            data['storage_container_raw'] = container
+        fast = encoder.encode(d, smell, texture)
+        legacy = np.asarray(_paneer_features_pandas(encoder.feature_names, encoder.smell_map, encoder.texture_map, data), dtype=np.float64)
+        if fast.shape != legacy.shape or fast.tobytes() != legacy.tobytes():
+            mismatches.append(data)
+        payloads.append(data)
+        fast_rows.append(fast)
+        checked += 1
+    X = np.vstack(fast_rows)
+    batch = encoder.encode_batch([p['days_since_purchase_or_cooked'] for p in payloads],
+                                 [p['observed_smell'] for p in payloads], [p['texture_surface'] for p in payloads])
+    for i in np.flatnonzero(np.any(batch != X, axis=1)):
+        mismatches.append(('batch', payloads[i]))
+    if model is not None:
+        single_pass = model.classes_[model.predict_proba(X).argmax(axis=1)]
+        for i in np.flatnonzero(single_pass != model.predict(X)):
+            mismatches.append(('predict', payloads[i]))
+    return checked, mismatches
+
+if __name__ == '__main__':
+    # Run from backend/: python encoders.py
+    from blueprints.predictions import rice_encoder, models
+    checked, mismatches = verify_rice_encoder(rice_encoder, model=models.get('rice', wait=True)['model'])
+    print(f"--- Rice encoder parity: {checked - len(mismatches)}/{checked} combinations identical ---")
+    paneer = models.get('paneer', wait=True)
+    paneer_checked, paneer_mismatches = verify_paneer_encoder(paneer['encoder'], model=paneer['model'])
+    print(f"--- Paneer encoder parity: {paneer_checked - len(paneer_mismatches)}/{paneer_checked} combinations identical ---")
+    mismatches += paneer_mismatches
+    for m in mismatches[:20]:
+        print(f"❌ Mismatch: {m}")
+    raise SystemExit(1 if mismatches else 0)
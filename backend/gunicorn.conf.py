@@ -0,0 +1,78 @@
+import gc
+import os
+
+# --- Production Server (pre-fork) ---
+# gunicorn -c gunicorn.conf.py app:app   (from backend/)
+#
+# The master process imports app.py and loads every model once, then forks the
+# workers, which share those pages copy-on-write instead of each unpickling its
+# own copy. Two things would otherwise unshare them again: the cyclic GC writing
+# to every tracked object's header, and the allocator reusing holes between
+# long-lived objects. So the GC is switched off in the master until the models
+# are in, then everything loaded so far is frozen (gc.freeze) and the GC turned
+# back on before the fork, so the workers' collections only visit their own objects.
+# PRELOAD_MODELS=0 goes back to every worker loading its own models after the fork.
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+preload_app = os.getenv('PRELOAD_MODELS', '1') != '0'
+GC_FREEZE = os.getenv('GC_FREEZE', '1') != '0'
+
+# Every model is loaded before serving: in the master when preloading, else in each worker as it boots.
+os.environ.setdefault('MODEL_LOADING', 'eager')
+
+# Each worker gets its share of the cores for XGBoost / OpenMP / BLAS, so N workers
+# don't each start a pool sized for the whole machine. The env vars have to be set
+# before numpy and xgboost are imported, which is why they live here and not in app.py.
+MODEL_THREADS = int(os.getenv('MODEL_THREADS', max(1, (os.cpu_count() or 1) // (workers * threads))))
+for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(var, str(MODEL_THREADS))
+
+if preload_app and GC_FREEZE:
+    gc.disable()
+
+
+def limit_model_threads(n_jobs):
+    """Sets n_jobs on every loaded estimator that has one (XGBoost passes it to the booster as nthread)."""
+    import sys
+    predictions = sys.modules.get('blueprints.predictions')
+    if predictions is None:
+        return 0
+    limited = 0
+    for name in predictions.models.names():
+        artifacts = predictions.models.get(name) or {}
+        for artifact in artifacts.values():
+            params = artifact.get_params(deep=False) if hasattr(artifact, 'get_params') else {}
+            if 'n_jobs' in params and params['n_jobs'] != n_jobs:
+                artifact.set_params(n_jobs=n_jobs)
+                limited += 1
+    return limited
+
+
+def when_ready(server):
+    # Runs in the master once app.py (and with it every model) is loaded, before any fork
+    if not preload_app:
+        return
+    limited = limit_model_threads(MODEL_THREADS)
+    if GC_FREEZE:
+        gc.collect()
+        gc.freeze()
+        gc.enable() # the workers inherit this; their collections skip the frozen objects
+        server.log.info(f"--- Models preloaded; {gc.get_freeze_count()} objects frozen, {limited} estimators set to {MODEL_THREADS} thread(s) ---")
+    else:
+        server.log.info(f"--- Models preloaded; {limited} estimators set to {MODEL_THREADS} thread(s) ---")
+
+
+def post_fork(server, worker):
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(MODEL_THREADS)
+    except ImportError:
+        pass # no threadpoolctl (e.g. the inference profile); the env vars above still apply
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        limit_model_threads(MODEL_THREADS)
@@ -0,0 +1,160 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+# --- Background Log Sink ---
+# Request handlers drop log documents into a bounded queue and return straight
+# away. A single writer thread drains the queue and hands documents to a writer
+# in groups: when batch_size documents are waiting, or flush_interval seconds
+# after the first one arrived, whichever comes first. If the queue is full the
+# document is dropped and counted rather than slowing the request down.
+
+FIRESTORE_BATCH_LIMIT = 500 # max writes per Firestore WriteBatch commit
+
+
+class FirestoreBatchWriter:
+    """Writes (collection, doc) pairs with Firestore WriteBatch commits of up to 500 docs."""
+    def __init__(self, db):
+        self.db = db
+
+    def write(self, docs):
+        for start in range(0, len(docs), FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for collection, data in docs[start:start + FIRESTORE_BATCH_LIMIT]:
+                batch.set(self.db.collection(collection).document(), data)
+            batch.commit()
+
+
+class Sentinel:
+    """Stands in for firestore.SERVER_TIMESTAMP when the Firebase SDK isn't imported (SERVER_PROFILE=inference)."""
+    def __repr__(self):
+        return 'Sentinel: Value used to set a document field to the server timestamp.'
+
+
+def _jsonable(value):
+    # firestore.SERVER_TIMESTAMP is a Sentinel object; stamp local time instead
+    if type(value).__name__ == 'Sentinel':
+        return datetime.now(timezone.utc).isoformat()
+    return str(value)
+
+
+class JsonlWriter:
+    """Offline stand-in: appends one JSON line per doc, tagged with its collection."""
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, docs):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for collection, data in docs:
+                f.write(json.dumps({'collection': collection, **data}, default=_jsonable) + '\n')
+
+
+class MemoryWriter:
+    """Offline stand-in that keeps every written (collection, doc) pair in a list."""
+    def __init__(self, delay=0.0):
+        self.delay = delay # simulated round-trip per commit
+        self.docs = []
+        self.commits = 0
+
+    def write(self, docs):
+        if self.delay:
+            time.sleep(self.delay)
+        self.docs.extend(docs)
+        self.commits += 1
+
+
+class LogSink:
+    def __init__(self, writer, max_queue=10000, batch_size=FIRESTORE_BATCH_LIMIT, flush_interval=1.0):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'commits': 0}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='log-sink', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, collection, data):
+        """Queues one document. Never blocks; returns False if it had to be dropped."""
+        if self._closed:
+            self._count('dropped')
+            return False
+        try:
+            self._queue.put_nowait((collection, data))
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('enqueued')
+        return True
+
+    def flush(self, timeout=10.0):
+        """Blocks until everything queued so far has been handed to the writer."""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        """Flushes what's queued and stops the writer thread. Safe to call twice."""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize()
+        stats['capacity'] = self._queue.maxsize
+        return stats
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False # flush_interval elapsed
+            if isinstance(item, tuple):
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(pending) < self.batch_size:
+                    continue
+            # Size trigger, time trigger, explicit flush, or shutdown: write what we have
+            if pending:
+                self._write(pending)
+                pending = []
+            deadline = None
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
+
+    def _write(self, docs):
+        try:
+            self.writer.write(docs)
+            self._count('written', len(docs))
+            self._count('commits')
+        except Exception as e:
+            self._count('failed', len(docs))
+            print(f"Error writing {len(docs)} log documents: {e}")
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from prediction_cache import SplitQuantizer
+
+# --- Lookup Tables ---
+# The rice and milk models only see a handful of features, and every split in
+# their trees is a threshold on one of them. Cut each feature at those
+# thresholds and the whole input space becomes a small grid of cells. Every
+# input in a cell gets the same prediction. Compiling runs the model once per
+# cell and stores the predicted class index in a uint8 array, memory-mapped
+# at serving time.
+# Serving is then: bucket each feature (same SplitQuantizer the cache uses),
+# index the array. No tree traversal, and exact for any real-valued input,
+# not just whole hours.
+#
+#   python lookup_tables.py compile [rice milk]   # writes ML/<food>/<food>_lookup.npy + .json
+#   python lookup_tables.py verify  [rice milk]   # table vs live model on the whole-hour grid,
+#                                                 # and the routes' model fallback for NaN inputs
+
+TABLE_FOODS = ('rice', 'milk')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bucket_representatives(quantizer):
+    """One value per bucket of every column, checked to land back in that bucket."""
+    reps = []
+    for column, thresholds in enumerate(quantizer.thresholds):
+        if not thresholds:
+            reps.append([0.0])
+            continue
+        values = [thresholds[0] - 1.0]
+        values += [(lo + hi) / 2.0 for lo, hi in zip(thresholds, thresholds[1:])]
+        values.append(thresholds[-1] + 1.0)
+        for b, v in enumerate(values):
+            if quantizer.bucket(column, v) != b:
+                raise ValueError(f"Column {column}: split points {thresholds[max(0, b - 1)]} and "
+                                 f"{thresholds[min(b, len(thresholds) - 1)]} are too close to separate in float32.")
+        reps.append(values)
+    return reps
+
+
+class LookupTable:
+    def __init__(self, table, quantizer, classes, model_sha256, feature_names):
+        self.table = table
+        self.quantizer = quantizer
+        self.classes = list(classes)
+        self.model_sha256 = model_sha256
+        self.feature_names = list(feature_names)
+
+    @classmethod
+    def compile(cls, model, feature_names, model_path, predict=None, chunk_size=200000):
+        """
+        Runs `predict` (default: model.predict on a DataFrame with feature_names)
+        over one representative row per cell and stores the class index per cell.
+        """
+        import pandas as pd
+        quantizer = SplitQuantizer.from_model(model)
+        reps = [np.asarray(r, dtype=np.float64) for r in bucket_representatives(quantizer)]
+        shape = tuple(len(r) for r in reps)
+        classes = list(model.classes_)
+        if len(classes) > 255:
+            raise ValueError("Lookup tables store class indices as uint8.")
+        predict = predict or (lambda X: model.predict(pd.DataFrame(X, columns=feature_names)))
+        table = np.empty(shape, dtype=np.uint8)
+        flat = table.reshape(-1)
+        for start in range(0, flat.size, chunk_size):
+            cells = np.arange(start, min(start + chunk_size, flat.size))
+            index = np.unravel_index(cells, shape)
+            X = np.column_stack([r[i] for r, i in zip(reps, index)])
+            flat[cells] = np.searchsorted(model.classes_, predict(X))
+        return cls(table, quantizer, classes, file_sha256(model_path), feature_names)
+
+    def save(self, prefix):
+        np.save(prefix + '.npy', self.table)
+        meta = {
+            'feature_names': self.feature_names,
+            'thresholds': self.quantizer.thresholds,
+            'go_left_on_equal': self.quantizer.go_left_on_equal,
+            'classes': [c.item() if hasattr(c, 'item') else c for c in self.classes],
+            'model_sha256': self.model_sha256,
+            'shape': list(self.table.shape)
+        }
+        with open(prefix + '.json', 'w') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, prefix):
+        with open(prefix + '.json', 'r') as f:
+            meta = json.load(f)
+        table = np.load(prefix + '.npy', mmap_mode='r')
+        quantizer = SplitQuantizer(meta['thresholds'], go_left_on_equal=meta['go_left_on_equal'])
+        return cls(table, quantizer, meta['classes'], meta['model_sha256'], meta['feature_names'])
+
+    def lookup(self, row):
+        """Predicted class label for one model input row (None if the row can't be bucketed)."""
+        key = self.quantizer.key(row)
+        return None if key is None else self.classes[self.table[key]]
+
+    def lookup_batch(self, X):
+        """Vectorized lookup() for an (n, n_features) matrix; returns class labels."""
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        side = 'left' if self.quantizer.go_left_on_equal else 'right'
+        index = tuple(
+            np.searchsorted(np.asarray(t, dtype=np.float64), X[:, j], side=side) if t else np.zeros(len(X), dtype=np.intp)
+            for j, t in enumerate(self.quantizer.thresholds)
+        )
+        return np.asarray(self.classes)[self.table[index]]
+
+
+def table_prefix(food):
+    return os.path.join('ML', food, f'{food}_lookup')
+
+
+def load_lookup_table(food, model_path):
+    """Loads a compiled table, or returns None (with a warning) if it is missing or stale."""
+    prefix = table_prefix(food)
+    if not os.path.exists(prefix + '.npy'):
+        print(f"Warning: no lookup table for {food}. Run 'python lookup_tables.py compile {food}'. Serving from the model.")
+        return None
+    table = LookupTable.load(prefix)
+    if table.model_sha256 != file_sha256(model_path):
+        print(f"Warning: {food} lookup table was compiled from a different model file. Serving from the model.")
+        return None
+    return table
+
+
+# --- Whole-hour verification grids ---
+
+def rice_grid(predictions):
+    """Every whole-hour rice input that reaches the model, encoded with the app's encoder."""
+    rows = []
+    smells = [s for s in predictions.rice_smell_map if s not in predictions.RICE_SEVERE_SMELL]
+    appearances = [a for a in predictions.rice_appearance_map if a not in ('Visible Mold', 'Slimy/Discolored')]
+    storages = list(predictions.rice_encoder._storage_idx)
+    coolings = list(predictions.rice_encoder._cooling_idx)
+    for hours in range(predictions.RICE_HOURS_CAP + 1):
+        for initial in range(hours + 1):
+            for smell in smells:
+                for appearance in appearances:
+                    for storage in storages:
+                        for cooling in coolings:
+                            rows.append((hours, initial, smell, appearance, storage, cooling))
+    return predictions.rice_encoder.encode_batch(*zip(*rows))
+
+
+def milk_grid(predictions):
+    """Every whole-hour milk input that reaches the model, scaled like preprocess_and_validate_milk."""
+    import itertools
+    smells = [s for s in predictions.milk_smell_order if s not in predictions.MILK_SEVERE_SMELL]
+    consistencies = [c for c in predictions.milk_consistency_order if c not in predictions.MILK_SEVERE_CONSISTENCY]
+    combos = list(itertools.product([0, 1], predictions.MILK_VALID_TYPES, predictions.MILK_VALID_STORAGE, smells, consistencies))
+    rows = []
+    for days in range(predictions.MILK_DAYS_CAP + 1):
+        for room_hours in range(min(days * 24 + 1, predictions.MILK_DAYS_CAP * 24) + 1):
+            for was_boiled, milk_type, storage, smell, consistency in combos:
+                rows.append(predictions.milk_feature_row(days, room_hours, was_boiled, milk_type, storage, smell, consistency))
+    X = np.asarray(rows, dtype=np.float64)
+    return predictions.scale_milk_rows(X)
+
+
+# Requests with a numeric field the table can't bucket (NaN). The routes must
+# answer these from the model, exactly as they do without a table.
+FALLBACK_REQUESTS = {
+    'rice': ('/api/predict', {'hours_since_cooking': 30, 'initial_hours_at_room_temp': 1, 'storage_location': 'Refrigerator',
+                              'cooling_method': 'Left to cool in deep pot', 'observed_smell': 'Normal',
+                              'observed_appearance': 'Normal/Glossy'}),
+    'milk': ('/api/predict_milk', {'milk_type': 'Pasteurized (Pouch/Bottle)', 'days_since_open_or_purchase': 3, 'was_boiled': True,
+                                   'storage_location': 'Refrigerator', 'cumulative_hours_at_room_temp': 3,
+                                   'observed_smell': 'Normal/Fresh', 'observed_consistency': 'Normal/Smooth'}),
+}
+
+
+def fallback_mismatches(predictions, food, table):
+    """(requests checked, mismatches): each numeric field of the food's request set to NaN in turn,
+    answered with the table installed vs without it."""
+    os.environ.setdefault('LOG_SINK', 'memory')
+    import app
+    client = app.app.test_client()
+    path, body = FALLBACK_REQUESTS[food]
+    entry = predictions.models.get(food, wait=True)
+    served_table = entry['table']
+    checked, mismatches = 0, []
+    try:
+        for field in (key for key, value in body.items() if isinstance(value, (int, float)) and not isinstance(value, bool)):
+            request_body = {**body, field: 'nan'}
+            answers = []
+            for installed in (table, None):
+                entry['table'] = installed
+                response = client.post(path, json=request_body)
+                answers.append((response.status_code, response.get_json()))
+            checked += 1
+            if answers[0] != answers[1]:
+                mismatches.append((field, answers))
+    finally:
+        entry['table'] = served_table
+    return checked, mismatches
+
+
+def main():
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description='Compile or verify the rice/milk lookup tables.')
+    parser.add_argument('command', choices=['compile', 'verify'])
+    parser.add_argument('foods', nargs='*', default=list(TABLE_FOODS))
+    args = parser.parse_args()
+
+    from blueprints import predictions
+    paths = {'rice': predictions.rice_model_path, 'milk': predictions.milk_model_path}
+    features = {'rice': predictions.RICE_MODEL_FEATURES, 'milk': predictions.MILK_MODEL_FEATURES}
+    grids = {'rice': rice_grid, 'milk': milk_grid}
+    failed = False
+    for food in args.foods:
+        model = predictions.models.get(food, wait=True)['model']
+        start = time.perf_counter()
+        if args.command == 'compile':
+            table = LookupTable.compile(model, features[food], paths[food])
+            table.save(table_prefix(food))
+            print(f"✅ {food}: compiled {table.table.size:,} cells {table.table.shape} "
+                  f"in {time.perf_counter() - start:.1f}s -> {table_prefix(food)}.npy")
+            continue
+        table = load_lookup_table(food, paths[food])
+        if table is None:
+            failed = True
+            continue
+        import pandas as pd
+        X = grids[food](predictions)
+        live = model.predict(pd.DataFrame(X, columns=features[food]))
+        served = table.lookup_batch(X)
+        mismatches = int(np.sum(np.asarray(live) != served))
+        # Spot-check the scalar path the routes use as well
+        sample = np.random.default_rng(0).choice(len(X), size=min(2000, len(X)), replace=False)
+        mismatches += sum(table.lookup(X[i]) != served[i] for i in sample)
+        failed |= mismatches > 0
+        print(f"{'✅' if not mismatches else '❌'} {food}: {len(X):,} whole-hour inputs, "
+              f"{mismatches} disagreements with the live model ({time.perf_counter() - start:.1f}s)")
+        checked, fallbacks = fallback_mismatches(predictions, food, table)
+        failed |= bool(fallbacks)
+        print(f"{'✅' if not fallbacks else '❌'} {food}: {checked} NaN-field requests, "
+              f"{len(fallbacks)} answered differently with the table than by the model")
+        for field, answers in fallbacks:
+            print(f"❌ {food} {field}=NaN: table {answers[0]}, model {answers[1]}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
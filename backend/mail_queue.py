@@ -0,0 +1,223 @@
+import atexit
+import heapq
+import itertools
+import random
+import smtplib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# --- Mail Delivery Queue ---
+# /api/notify-ngo queues its email and answers with a job id straight away. A
+# single delivery thread sends the queue over one authenticated SMTP
+# connection that stays open between messages, so the TLS handshake and login
+# happen once per connection rather than once per donation. A failed send
+# closes the connection (the next send reconnects) and the job is retried
+# with exponential backoff; permanent errors (5xx replies) fail it at once.
+# Job states are kept in memory for the last max_jobs jobs, per process.
+
+QUEUED, RETRYING, SENT, FAILED = 'queued', 'retrying', 'sent', 'failed'
+
+
+def is_transient(error):
+    """Whether a send failure is worth retrying: 4xx replies, dropped connections, network errors."""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    return isinstance(error, (smtplib.SMTPException, OSError))
+
+
+class SmtpConnection:
+    """One authenticated SMTP connection, opened on first send and reused; closed after any error."""
+
+    def __init__(self, host, port, use_ssl, username, password, timeout=30.0, noop_after=30.0):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.noop_after = noop_after # check a connection idle this long is still up before using it
+        self.connections = 0
+        self._smtp = None
+        self._last_used = 0.0
+
+    @property
+    def is_open(self):
+        return self._smtp is not None
+
+    def _open(self):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        smtp = smtp_class(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.connections += 1
+
+    def send(self, msg):
+        if self._smtp is not None and time.monotonic() - self._last_used > self.noop_after:
+            try:
+                if self._smtp.noop()[0] != 250:
+                    self.close()
+            except smtplib.SMTPException:
+                self.close()
+        if self._smtp is None:
+            self._open()
+        try:
+            self._smtp.sendmail(msg['From'], msg['To'], msg.as_string())
+        except Exception:
+            self.close()
+            raise
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+
+class _Job:
+    def __init__(self, msg, label):
+        self.id = uuid.uuid4().hex
+        self.msg = msg
+        self.label = label
+        self.state = QUEUED
+        self.attempts = 0
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+
+    def public(self):
+        return {'jobId': self.id, 'label': self.label, 'state': self.state, 'attempts': self.attempts,
+                'error': self.error, 'created_at': self.created_at, 'updated_at': self.updated_at}
+
+
+class MailQueue:
+    def __init__(self, connection, max_queue=1000, max_attempts=5, backoff=1.0, max_backoff=60.0,
+                 idle_seconds=300.0, max_jobs=10000):
+        self.connection = connection
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.backoff = backoff # seconds before the first retry, doubling after each failure
+        self.max_backoff = max_backoff
+        self.idle_seconds = idle_seconds # close the connection after this long without mail
+        self.max_jobs = max_jobs
+        self._cond = threading.Condition()
+        self._due = [] # heap of (due, seq, job): queued jobs and retries waiting out their backoff
+        self._seq = itertools.count()
+        self._jobs = OrderedDict() # job id -> _Job, oldest first
+        self._busy = False
+        self._closed = False
+        self._stats = {'submitted': 0, 'sent': 0, 'failed': 0, 'retries': 0, 'rejected': 0}
+        self._thread = threading.Thread(target=self._run, name='mail-queue', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, msg, label=None):
+        """Queues an email.message.Message; returns its job id, or None if the queue is full."""
+        job = _Job(msg, label)
+        with self._cond:
+            if self._closed or len(self._due) >= self.max_queue:
+                self._stats['rejected'] += 1
+                return None
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.state not in (SENT, FAILED):
+                    break
+                self._jobs.popitem(last=False)
+            heapq.heappush(self._due, (time.monotonic(), next(self._seq), job))
+            self._stats['submitted'] += 1
+            self._cond.notify()
+        return job.id
+
+    def job(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.public() if job else None
+
+    def flush(self, timeout=30.0):
+        """Blocks until every queued job is sent or has failed for good."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._due or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=10.0):
+        """Delivers what's due, then stops the delivery thread. Safe to call twice."""
+        if self._closed:
+            return
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {**self._stats, 'queued': len(self._due), 'capacity': self.max_queue,
+                    'connections': self.connection.connections, 'connected': self.connection.is_open}
+
+    def _next_job(self):
+        # Waits for the next due job; closes the connection once it has been idle long enough
+        with self._cond:
+            idle_since = time.monotonic()
+            while True:
+                if self._closed:
+                    return None
+                now = time.monotonic()
+                if self._due and self._due[0][0] <= now:
+                    self._busy = True
+                    return heapq.heappop(self._due)[2]
+                if self.connection.is_open and now - idle_since >= self.idle_seconds:
+                    self.connection.close()
+                waits = []
+                if self._due:
+                    waits.append(self._due[0][0] - now)
+                if self.connection.is_open:
+                    waits.append(idle_since + self.idle_seconds - now)
+                self._cond.wait(min(waits) if waits else None)
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                self.connection.close()
+                return
+            job.attempts += 1
+            try:
+                self.connection.send(job.msg)
+                error = None
+            except Exception as e:
+                error = e
+            with self._cond:
+                job.updated_at = time.time()
+                if error is None:
+                    job.state, job.error = SENT, None
+                    self._stats['sent'] += 1
+                elif is_transient(error) and job.attempts < self.max_attempts:
+                    job.state, job.error = RETRYING, str(error)
+                    delay = min(self.max_backoff, self.backoff * 2 ** (job.attempts - 1)) * random.uniform(0.8, 1.2)
+                    heapq.heappush(self._due, (time.monotonic() + delay, next(self._seq), job))
+                    self._stats['retries'] += 1
+                else:
+                    job.state, job.error = FAILED, str(error)
+                    self._stats['failed'] += 1
+                    print(f"❌ Error sending email ({job.label}): {error}")
+                if job.state in (SENT, FAILED):
+                    job.msg = None
+                self._busy = False
+                self._cond.notify_all()
@@ -0,0 +1,37 @@
+import httpx
+
+# --- Async Google Maps Client ---
+# The one googlemaps.Client call the NGO routes make (places_nearby), over a
+# pooled httpx.AsyncClient so a Places request doesn't pin a thread while it
+# waits. Returns the same JSON body, and raises on the same API statuses.
+
+PLACES_NEARBY_URL = 'https://maps.googleapis.com/maps/api/place/nearbysearch/json'
+
+
+class MapsApiError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(f"{status}: {message}" if message else status)
+        self.status = status
+
+
+class AsyncMapsClient:
+    def __init__(self, key, timeout=10.0, max_connections=100):
+        self.key = key
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+    async def places_nearby(self, location=None, radius=None, keyword=None, **kwargs):
+        params = {'location': f'{location[0]},{location[1]}', 'radius': radius, 'key': self.key, **kwargs}
+        if keyword:
+            params['keyword'] = keyword
+        response = await self._client.get(PLACES_NEARBY_URL, params=params)
+        response.raise_for_status()
+        body = response.json()
+        if body.get('status') not in ('OK', 'ZERO_RESULTS'):
+            raise MapsApiError(body.get('status'), body.get('error_message'))
+        return body
+
+    async def aclose(self):
+        await self._client.aclose()
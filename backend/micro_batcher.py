@@ -0,0 +1,90 @@
+import threading
+
+import numpy as np
+
+# --- Micro-Batcher ---
+# Coalesces the model calls of concurrent single-item requests. A forest's
+# predict_proba costs about the same for 1 row as for 16 (the per-call
+# overhead dominates), so rows that arrive within window_ms of each other
+# are stacked and scored with one call, and each request gets its own row
+# of the result back.
+# There is no dispatcher thread, so nothing has to be restarted after a
+# gunicorn fork. The first request to arrive opens a batch and becomes its
+# leader. It waits up to window_ms, or less if max_items rows arrive first,
+# then closes the batch and runs the call. The requests that joined the
+# batch wait for the leader to finish. An error in the call is raised in
+# every request of the batch.
+# With window_ms=0, submit() calls predict straight away.
+
+
+class _Batch:
+    __slots__ = ('rows', 'full', 'done', 'result', 'error')
+
+    def __init__(self):
+        self.rows = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    def __init__(self, predict, window_ms=2.0, max_items=32):
+        """predict(X) takes an (n, n_features) float64 matrix and returns n rows of results (e.g. predict_proba)."""
+        self.predict = predict
+        self.window_ms = window_ms
+        self.max_items = max(1, int(max_items))
+        self._lock = threading.Lock()
+        self._open = None
+        self._stats = {'batches': 0, 'items': 0, 'full': 0, 'largest': 0}
+
+    @property
+    def enabled(self):
+        return self.window_ms > 0 and self.max_items > 1
+
+    def submit(self, row):
+        """This row's result: row is one request's features as a 1-D array."""
+        if hasattr(row, 'toarray'): # one row of a scipy sparse matrix
+            row = row.toarray().ravel()
+        if not self.enabled:
+            return self.predict(np.asarray(row, dtype=np.float64)[None, :])[0]
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            slot = len(batch.rows)
+            batch.rows.append(row)
+            if len(batch.rows) >= self.max_items:
+                self._open = None
+                batch.full.set()
+        if leader:
+            self._run(batch)
+        else:
+            batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+        return batch.result[slot]
+
+    def _run(self, batch):
+        full = batch.full.wait(self.window_ms / 1000.0)
+        with self._lock:
+            if self._open is batch:
+                self._open = None
+            n = len(batch.rows)
+            self._stats['batches'] += 1
+            self._stats['items'] += n
+            self._stats['full'] += 1 if full else 0
+            self._stats['largest'] = max(self._stats['largest'], n)
+        try:
+            batch.result = self.predict(np.asarray(batch.rows, dtype=np.float64))
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['mean_size'] = round(stats['items'] / stats['batches'], 2) if stats['batches'] else None
+        return stats
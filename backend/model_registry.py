@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Model Registry ---
+# Holds each food's artifacts behind a loader function so nothing is unpickled
+# at import time. A model is loaded the first time a request asks for it
+# ("lazy"), or all of them are loaded by a thread pool right after boot
+# ("background"). While a load is in flight, other callers get ModelWarming
+# instead of blocking a worker or seeing a 500.
+
+COLD, WARMING, READY, FAILED = 'cold', 'warming', 'ready', 'error'
+
+
+class ModelWarming(Exception):
+    def __init__(self, name):
+        super().__init__(f"The {name} model is still loading. Please retry shortly.")
+        self.name = name
+
+
+class _Entry:
+    def __init__(self, loader):
+        self.loader = loader
+        self.state = COLD
+        self.artifacts = None
+        self.error = None
+        self.load_seconds = None
+        self.generation = 0
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._entries = {}
+        self._executor = None
+
+    def register(self, name, loader):
+        """loader() must return a dict of artifacts, or raise if they can't be loaded."""
+        self._entries[name] = _Entry(loader)
+
+    def names(self):
+        return list(self._entries)
+
+    def get(self, name, wait=False):
+        """
+        Returns the artifacts dict for `name`, loading it on first use.
+        Returns None if loading failed. Raises ModelWarming if another thread is
+        loading it right now (unless wait=True).
+        """
+        entry = self._entries[name]
+        if entry.state == READY:
+            return entry.artifacts
+        if entry.state == FAILED:
+            return None
+        if not entry.lock.acquire(blocking=wait):
+            raise ModelWarming(name)
+        try:
+            if entry.state == COLD:
+                self._load(name, entry)
+            return entry.artifacts if entry.state == READY else None
+        finally:
+            entry.lock.release()
+
+    def _load(self, name, entry):
+        entry.state = WARMING
+        start = time.perf_counter()
+        try:
+            entry.artifacts = entry.loader()
+            entry.error = None
+            entry.state = READY
+            entry.generation += 1
+            print(f"--- {name.capitalize()} model loaded in {time.perf_counter() - start:.2f}s ---")
+        except Exception as e:
+            entry.artifacts = None
+            entry.error = str(e)
+            entry.state = FAILED
+            print(f"Error loading {name.capitalize()} model: {e}")
+        entry.load_seconds = time.perf_counter() - start
+
+    def reload(self, name):
+        """Re-runs the loader for `name` (e.g. after retraining) and bumps its generation."""
+        entry = self._entries[name]
+        with entry.lock:
+            self._load(name, entry)
+        return entry.state == READY
+
+    def warm(self, names=None, max_workers=None, wait=False):
+        """Loads the given (default: all) models in a background thread pool."""
+        names = list(names or self._entries)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(names) or 1, thread_name_prefix='model-warm')
+        futures = [self._executor.submit(self.get, name, True) for name in names]
+        if wait:
+            for f in futures:
+                f.result()
+        self._executor.shutdown(wait=False)
+        return futures
+
+    def generation(self, name):
+        return self._entries[name].generation
+
+    def status(self):
+        return {
+            name: {
+                'status': e.state,
+                'load_seconds': round(e.load_seconds, 4) if e.load_seconds is not None else None,
+                'error': e.error
+            }
+            for name, e in self._entries.items()
+        }
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+# --- NGO Tile Cache ---
+# /api/get-ngos results are cached per geohash tile. A tile is fetched once,
+# with a single places_nearby call from its centre and a radius of the search
+# radius plus the tile's half-diagonal, so the cached results cover the search
+# circle of any point inside that tile. A request is then answered by merging
+# the cached results of its own tile and any cached neighbouring tiles and
+# keeping the places within the search radius (haversine distance). If its
+# own tile isn't cached but a cached neighbour's fetch circle already covers
+# the whole search circle, nothing is fetched.
+# Tiles expire after ttl_seconds and are persisted in SQLite so the cache
+# survives restarts. nearby_async is the same lookup for the async NGO route,
+# fetching missing tiles with an awaitable fetch.
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_M = 6371008.8
+
+
+def geohash_encode(lat, lng, precision):
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            bits = bits * 2 + (lng >= mid)
+            lng_lo, lng_hi = (mid, lng_hi) if lng >= mid else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            bits = bits * 2 + (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def geohash_bbox(geohash):
+    """(lat_lo, lat_hi, lng_lo, lng_hi) of a geohash cell."""
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for c in geohash:
+        value = _BASE32.index(c)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lat_hi, lng_lo, lng_hi
+
+
+def geohash_neighbours(geohash):
+    """The (up to) 8 cells around `geohash`."""
+    lat_lo, lat_hi, lng_lo, lng_hi = geohash_bbox(geohash)
+    lat, lng = (lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2
+    dlat, dlng = lat_hi - lat_lo, lng_hi - lng_lo
+    cells = []
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            if (i or j) and -90.0 < lat + i * dlat < 90.0:
+                n_lng = (lng + j * dlng + 180.0) % 360.0 - 180.0
+                cells.append(geohash_encode(lat + i * dlat, n_lng, len(geohash)))
+    return cells
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class NgoTileCache:
+    def __init__(self, fetch, radius_m=5000, precision=6, ttl_seconds=86400.0, path=None):
+        """
+        fetch(lat, lng, radius_m) returns a list of NGO dicts with a 'location': {'lat', 'lng'}.
+        It may be a coroutine function if the cache is only used through nearby_async.
+        """
+        self.fetch = fetch
+        self.radius_m = radius_m
+        self.precision = precision
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._lock = threading.Lock()
+        self._tiles = {} # geohash -> (fetched_at, results); fetched_at is wall-clock so it survives restarts
+        self._inflight = {} # geohash -> Event, so one fetch per tile at a time
+        self._ainflight = {} # the same for nearby_async, with asyncio Events
+        self._stats = {'requests': 0, 'hits': 0, 'misses': 0, 'fetches': 0, 'expired': 0, 'failed': 0}
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS tiles (geohash TEXT PRIMARY KEY, fetched_at REAL, results TEXT)')
+            self._db.commit()
+            self._load()
+
+    def _load(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            self._db.execute('DELETE FROM tiles WHERE fetched_at < ?', (cutoff,))
+            self._db.commit()
+            for geohash, fetched_at, results in self._db.execute('SELECT geohash, fetched_at, results FROM tiles'):
+                self._tiles[geohash] = (fetched_at, json.loads(results))
+
+    def fetch_radius_m(self, geohash):
+        lat_lo, lat_hi, lng_lo, lng_hi = geohash_bbox(geohash)
+        half_diagonal = max(haversine_m(lat_lo, lng_lo, lat_hi, lng_hi), haversine_m(lat_lo, lng_hi, lat_hi, lng_lo)) / 2
+        return self.radius_m + math.ceil(half_diagonal)
+
+    def _fresh(self, geohash, now):
+        # Called with the lock held
+        entry = self._tiles.get(geohash)
+        if entry is None:
+            return None
+        if now - entry[0] > self.ttl_seconds:
+            del self._tiles[geohash]
+            self._stats['expired'] += 1
+            return None
+        return entry[1]
+
+    def _get_tile(self, geohash):
+        while True:
+            with self._lock:
+                results = self._fresh(geohash, time.time())
+                if results is not None:
+                    return results, True
+                waiting = self._inflight.get(geohash)
+                if waiting is None:
+                    done = self._inflight[geohash] = threading.Event()
+                    break
+            waiting.wait() # another request is fetching this tile
+        try:
+            lat_lo, lat_hi, lng_lo, lng_hi = geohash_bbox(geohash)
+            return self._store(geohash, self.fetch((lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2, self.fetch_radius_m(geohash))), False
+        except Exception:
+            with self._lock:
+                self._stats['failed'] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[geohash]
+            done.set()
+
+    async def _get_tile_async(self, geohash):
+        while True:
+            with self._lock:
+                results = self._fresh(geohash, time.time())
+                if results is not None:
+                    return results, True
+                waiting = self._ainflight.get(geohash)
+                if waiting is None:
+                    done = self._ainflight[geohash] = asyncio.Event()
+                    break
+            await waiting.wait()
+        try:
+            lat_lo, lat_hi, lng_lo, lng_hi = geohash_bbox(geohash)
+            return self._store(geohash, await self.fetch((lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2, self.fetch_radius_m(geohash))), False
+        except Exception:
+            with self._lock:
+                self._stats['failed'] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._ainflight[geohash]
+            done.set()
+
+    def _store(self, geohash, results):
+        fetched_at = time.time()
+        with self._lock:
+            self._tiles[geohash] = (fetched_at, results)
+            self._stats['fetches'] += 1
+            if self._db is not None:
+                self._db.execute('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?)', (geohash, fetched_at, json.dumps(results)))
+                self._db.commit()
+        return results
+
+    def _covering_neighbour(self, lat, lng, neighbours, now):
+        # Called with the lock held. A cached neighbour whose fetch circle
+        # contains our whole search circle can answer for our tile.
+        for neighbour in neighbours:
+            if self._fresh(neighbour, now) is None:
+                continue
+            lat_lo, lat_hi, lng_lo, lng_hi = geohash_bbox(neighbour)
+            if haversine_m(lat, lng, (lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2) + self.radius_m <= self.fetch_radius_m(neighbour):
+                return neighbour
+        return None
+
+    def nearby(self, lat, lng):
+        """NGOs within radius_m of (lat, lng), nearest first."""
+        tile, neighbours, covered = self._plan(lat, lng)
+        results, hit = ([], True) if covered else self._get_tile(tile)
+        return self._merge(lat, lng, neighbours, results, hit)
+
+    async def nearby_async(self, lat, lng):
+        """nearby() with an awaitable fetch."""
+        tile, neighbours, covered = self._plan(lat, lng)
+        results, hit = ([], True) if covered else await self._get_tile_async(tile)
+        return self._merge(lat, lng, neighbours, results, hit)
+
+    def _plan(self, lat, lng):
+        tile = geohash_encode(lat, lng, self.precision)
+        neighbours = geohash_neighbours(tile)
+        with self._lock:
+            now = time.time()
+            covered = self._fresh(tile, now) is None and self._covering_neighbour(lat, lng, neighbours, now)
+        return tile, neighbours, covered
+
+    def _merge(self, lat, lng, neighbours, results, hit):
+        merged = {ngo['id']: ngo for ngo in results}
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['hits' if hit else 'misses'] += 1
+            now = time.time()
+            for neighbour in neighbours:
+                for ngo in self._fresh(neighbour, now) or ():
+                    merged.setdefault(ngo['id'], ngo)
+        found = []
+        for ngo in merged.values():
+            distance = haversine_m(lat, lng, ngo['location']['lat'], ngo['location']['lng'])
+            if distance <= self.radius_m:
+                found.append((distance, ngo))
+        found.sort(key=lambda pair: pair[0])
+        return [ngo for _, ngo in found]
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM tiles')
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            requests = self._stats['requests']
+            return {
+                **self._stats,
+                'tiles': len(self._tiles),
+                'hit_ratio': round(self._stats['hits'] / requests, 4) if requests else None
+            }
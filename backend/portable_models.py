@@ -0,0 +1,401 @@
+import json
+import os
+
+import numpy as np
+
+from lookup_tables import file_sha256
+from tree_compiler import CompiledEnsemble, compiled_path, load_compiled_model
+
+# --- Portable Models ---
+# Everything the predict routes load, exported to plain files that only need
+# numpy to read back. Each pickle in ML/ has an export:
+#   tree ensembles         ML/<food>/<food>_compiled.npz (see tree_compiler.py)
+#   StandardScaler         mean / scale, as JSON
+#   ColumnTransformer      per-block scaler or one-hot parameters, as JSON
+#   LabelEncoder           classes, as JSON
+#   Pipeline               its steps, as JSON, pointing at the files above
+# ML/manifest.json maps every original pickle path to its export, and records
+# the sha256 of each exported file and of the pickle it came from.
+# SERVER_PROFILE=inference (blueprints/predictions.py) loads these instead of unpickling, so
+# pandas, sklearn and xgboost are never imported.
+#
+#   python portable_models.py export   # writes the exports and ML/manifest.json
+#   python portable_models.py verify   # exports vs the pickles on each food's training data
+
+MANIFEST_PATH = os.path.join('ML', 'manifest.json')
+MANIFEST_VERSION = 1
+
+
+def manifest_key(path):
+    """Manifest paths are relative to backend/ and always use '/'."""
+    return os.path.normpath(path).replace(os.sep, '/')
+
+
+def _column_values(X, column):
+    # X is a list of dicts (request records) or anything indexable by column name (a DataFrame)
+    if isinstance(X, list):
+        return [record.get(column) for record in X]
+    return list(X[column])
+
+
+class PortableStandardScaler:
+    def __init__(self, mean, scale, columns=None):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.columns = columns
+
+    def transform(self, X):
+        # Same arithmetic as StandardScaler.transform: subtract the mean, then divide by the scale
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+    def to_dict(self):
+        return {'type': 'standard_scaler', 'columns': self.columns,
+                'mean': self.mean_.tolist(), 'scale': self.scale_.tolist()}
+
+
+class PortableOneHotEncoder:
+    def __init__(self, categories, handle_unknown='error'):
+        self.categories_ = [list(c) for c in categories]
+        self.handle_unknown = handle_unknown
+        self._index = [{value: i for i, value in enumerate(c)} for c in self.categories_]
+        self._offsets = np.cumsum([0] + [len(c) for c in self.categories_])
+
+    def transform_columns(self, columns):
+        """columns: one list of values per input column. Returns a dense 0/1 float64 matrix."""
+        n_rows = len(columns[0]) if columns else 0
+        out = np.zeros((n_rows, int(self._offsets[-1])), dtype=np.float64)
+        for j, (values, index) in enumerate(zip(columns, self._index)):
+            for i, value in enumerate(values):
+                position = index.get(value)
+                if position is None:
+                    if self.handle_unknown != 'ignore':
+                        raise ValueError(f"Found unknown categories ['{value}'] in column {j} during transform")
+                    continue # unknown categories encode as all zeros
+                out[i, self._offsets[j] + position] = 1.0
+        return out
+
+    def to_dict(self, columns):
+        return {'type': 'one_hot', 'columns': columns, 'categories': self.categories_,
+                'handle_unknown': self.handle_unknown}
+
+
+class PortableColumnTransformer:
+    """A ColumnTransformer of scaler / one-hot / passthrough blocks, applied to a DataFrame or a list of dicts."""
+
+    def __init__(self, blocks):
+        self.blocks = blocks # [(kind, columns, transformer or None)], in output order
+        self.feature_names_in_ = [c for _, columns, _ in blocks for c in columns]
+
+    def transform(self, X):
+        if isinstance(X, list):
+            missing = {c for c in self.feature_names_in_ if any(c not in record for record in X)}
+            if missing:
+                raise ValueError(f"columns are missing: {missing}") # same message as sklearn
+        parts = []
+        for kind, columns, transformer in self.blocks:
+            values = [_column_values(X, c) for c in columns]
+            if kind == 'one_hot':
+                parts.append(transformer.transform_columns(values))
+                continue
+            numeric = np.asarray(values, dtype=np.float64).T.reshape(-1, len(columns))
+            parts.append(transformer.transform(numeric) if kind == 'standard_scaler' else numeric)
+        return np.hstack(parts) if parts else np.zeros((0, 0))
+
+    def to_dict(self):
+        blocks = []
+        for kind, columns, transformer in self.blocks:
+            if kind == 'passthrough':
+                blocks.append({'type': 'passthrough', 'columns': columns})
+            elif kind == 'one_hot':
+                blocks.append(transformer.to_dict(columns))
+            else:
+                blocks.append(transformer.to_dict())
+        return {'type': 'column_transformer', 'blocks': blocks}
+
+    @classmethod
+    def from_dict(cls, spec):
+        blocks = []
+        for block in spec['blocks']:
+            if block['type'] == 'standard_scaler':
+                blocks.append(('standard_scaler', block['columns'],
+                               PortableStandardScaler(block['mean'], block['scale'], block['columns'])))
+            elif block['type'] == 'one_hot':
+                blocks.append(('one_hot', block['columns'],
+                               PortableOneHotEncoder(block['categories'], block['handle_unknown'])))
+            else:
+                blocks.append(('passthrough', block['columns'], None))
+        return cls(blocks)
+
+
+class PortableLabelEncoder:
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+
+    def inverse_transform(self, codes):
+        return self.classes_[np.asarray(codes, dtype=np.intp)]
+
+
+class PortablePipeline:
+    """Transformer steps followed by a final estimator, sliced like an sklearn Pipeline."""
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PortablePipeline(self.steps[index])
+        return self.steps[index][1]
+
+    def transform(self, X):
+        for _, step in self.steps:
+            X = step.transform(X)
+        return X
+
+    def predict_proba(self, X):
+        return self.steps[-1][1].predict_proba(self[:-1].transform(X))
+
+    def predict(self, X):
+        return self.steps[-1][1].predict(self[:-1].transform(X))
+
+    @property
+    def classes_(self):
+        return self.steps[-1][1].classes_
+
+
+# --- Export (needs sklearn; runs offline) ---
+
+def _export_scaler(scaler, columns=None):
+    if not (scaler.with_mean and scaler.with_std):
+        raise ValueError("Only StandardScaler(with_mean=True, with_std=True) is supported.")
+    return PortableStandardScaler(scaler.mean_, scaler.scale_, columns)
+
+
+def _export_block(transformer, columns):
+    # A Pipeline block is supported when it wraps exactly one transformer
+    if hasattr(transformer, 'steps'):
+        if len(transformer.steps) != 1:
+            raise ValueError("Only single-step pipelines inside a ColumnTransformer are supported.")
+        transformer = transformer.steps[0][1]
+    name = type(transformer).__name__
+    if name == 'StandardScaler':
+        return ('standard_scaler', columns, _export_scaler(transformer, columns))
+    if name == 'OneHotEncoder':
+        if transformer.drop is not None or getattr(transformer, 'infrequent_categories_', None):
+            raise ValueError("OneHotEncoder with drop or infrequent categories is not supported.")
+        categories = [[v.item() if hasattr(v, 'item') else v for v in c] for c in transformer.categories_]
+        return ('one_hot', columns, PortableOneHotEncoder(categories, transformer.handle_unknown))
+    raise ValueError(f"Unsupported transformer {name}.")
+
+
+def export_column_transformer(ct):
+    names = list(ct.feature_names_in_)
+    blocks = []
+    for _, transformer, columns in ct.transformers_:
+        columns = [names[c] if isinstance(c, (int, np.integer)) else c for c in columns]
+        if transformer == 'drop' or not columns:
+            continue
+        if transformer == 'passthrough':
+            blocks.append(('passthrough', columns, None))
+        else:
+            blocks.append(_export_block(transformer, columns))
+    return PortableColumnTransformer(blocks)
+
+
+def _export_artifact(obj, source_path, food):
+    """Returns (kind, spec dict or None, estimator to compile or None) for one unpickled object."""
+    name = type(obj).__name__
+    if name == 'Pipeline':
+        *transformers, (final_name, final) = obj.steps
+        steps = [[step_name, export_column_transformer(t).to_dict()] for step_name, t in transformers]
+        steps.append([final_name, {'type': 'tree_ensemble', 'file': manifest_key(compiled_path(food))}])
+        return 'pipeline', {'type': 'pipeline', 'steps': steps}, final
+    if name in ('RandomForestClassifier', 'XGBClassifier'):
+        return 'tree_ensemble', None, obj
+    if name == 'StandardScaler':
+        columns = [str(c) for c in getattr(obj, 'feature_names_in_', [])] or None
+        return 'standard_scaler', _export_scaler(obj, columns).to_dict(), None
+    if name == 'ColumnTransformer':
+        return 'column_transformer', export_column_transformer(obj).to_dict(), None
+    if name == 'LabelEncoder':
+        return 'label_encoder', {'type': 'label_encoder', 'classes': [c.item() if hasattr(c, 'item') else c for c in obj.classes_]}, None
+    raise ValueError(f"Don't know how to export {name} ({source_path}).")
+
+
+def export_all(sources):
+    """sources: [(food, pickle path)]. Writes each export and the manifest; returns the manifest."""
+    import joblib
+    manifest = {'version': MANIFEST_VERSION, 'artifacts': {}, 'files': {}}
+    for food, source_path in sources:
+        kind, spec, estimator = _export_artifact(joblib.load(source_path), source_path, food)
+        files = []
+        if spec is not None:
+            spec_path = os.path.splitext(source_path)[0] + '.json'
+            with open(spec_path, 'w') as f:
+                json.dump(spec, f, indent=1)
+            files.append(spec_path)
+        if estimator is not None:
+            # Reuse the compiled ensemble tree_compiler.py already wrote when it is up to date
+            if load_compiled_model(food, source_path) is None:
+                CompiledEnsemble.from_model(estimator, source_path=source_path).save(compiled_path(food))
+            files.append(compiled_path(food))
+        manifest['artifacts'][manifest_key(source_path)] = {
+            'kind': kind, 'file': manifest_key(files[0]), 'source_sha256': file_sha256(source_path)
+        }
+        for path in files:
+            manifest['files'][manifest_key(path)] = file_sha256(path)
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+# --- Loading (numpy only) ---
+
+def load_manifest(path=MANIFEST_PATH):
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"{path} is manifest version {manifest.get('version')}, expected {MANIFEST_VERSION}.")
+    return manifest
+
+
+def _checked_path(manifest, path):
+    expected = manifest['files'].get(path)
+    if expected is None:
+        raise ValueError(f"{path} is not listed in the manifest.")
+    if file_sha256(path) != expected:
+        raise ValueError(f"{path} changed since it was exported. Run 'python portable_models.py export'.")
+    return path
+
+
+def _load_spec(spec, manifest):
+    kind = spec['type']
+    if kind == 'tree_ensemble':
+        return CompiledEnsemble.load(_checked_path(manifest, spec['file']))
+    if kind == 'standard_scaler':
+        return PortableStandardScaler(spec['mean'], spec['scale'], spec['columns'])
+    if kind == 'column_transformer':
+        return PortableColumnTransformer.from_dict(spec)
+    if kind == 'label_encoder':
+        return PortableLabelEncoder(spec['classes'])
+    if kind == 'pipeline':
+        return PortablePipeline([(name, _load_spec(step, manifest)) for name, step in spec['steps']])
+    raise ValueError(f"Unknown portable artifact type '{kind}'.")
+
+
+def load_portable(source_path, manifest=None):
+    """The portable export of a pickle path the predict routes load (e.g. ML/rice/rice_model.joblib)."""
+    manifest = manifest or load_manifest()
+    entry = manifest['artifacts'].get(manifest_key(source_path))
+    if entry is None:
+        raise FileNotFoundError(f"No portable export of {source_path}. Run 'python portable_models.py export'.")
+    path = _checked_path(manifest, entry['file'])
+    if entry['kind'] == 'tree_ensemble':
+        return CompiledEnsemble.load(path)
+    with open(path, 'r') as f:
+        return _load_spec(json.load(f), manifest)
+
+
+# --- Command line ---
+
+def export_sources(predictions):
+    """(food, path) of every pickle the predict routes load."""
+    with open(predictions.paneer_config_filepath, 'r') as f:
+        paneer_model_path = os.path.join(predictions.paneer_model_dir, json.load(f)['model_file'])
+    return [
+        ('rice', predictions.rice_model_path),
+        ('milk', predictions.milk_model_path),
+        ('milk', predictions.milk_scaler_path),
+        ('paneer', paneer_model_path),
+        ('roti', predictions.roti_model_path),
+        ('dal', predictions.dal_model_path),
+        ('dal', predictions.dal_preprocessor_path),
+        ('dal', predictions.dal_le_path)
+    ]
+
+
+def verify(predictions):
+    """Checks every export against its pickle on the foods' training data; returns the number of failures."""
+    import joblib
+    import pandas as pd
+    from tree_compiler import TRAINING_INPUTS
+    manifest = load_manifest()
+    failures = 0
+
+    def report(name, ok, detail):
+        nonlocal failures
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {name}: {detail}")
+
+    for food, source_path in export_sources(predictions):
+        entry = manifest['artifacts'].get(manifest_key(source_path))
+        fresh = entry is not None and entry['source_sha256'] == file_sha256(source_path)
+        if not fresh:
+            report(source_path, False, "missing or exported from a different file")
+            continue
+        original, portable = joblib.load(source_path), load_portable(source_path, manifest)
+        if source_path == predictions.milk_scaler_path:
+            X = np.random.default_rng(0).uniform(0, 14 * 24, size=(5000, len(predictions.MILK_SCALED_COLS)))
+            diff = np.max(np.abs(original.transform(pd.DataFrame(X, columns=predictions.MILK_SCALED_COLS)) - portable.transform(X)))
+            report(source_path, diff == 0, f"5,000 rows, max |diff| {diff:.2e}")
+        elif source_path == predictions.dal_le_path:
+            codes = np.arange(len(original.classes_))
+            ok = list(original.inverse_transform(codes)) == list(portable.inverse_transform(codes))
+            report(source_path, ok, f"classes {portable.classes_.tolist()}")
+        elif source_path in (predictions.dal_preprocessor_path, predictions.roti_model_path):
+            df = training_frame(predictions, food)
+            records = df.to_dict('records')
+            if source_path == predictions.roti_model_path:
+                expected, got = original.predict_proba(df), portable.predict_proba(records)
+                what = 'predict_proba'
+            else:
+                expected, got = original.transform(df), portable.transform(records)
+                expected = expected.toarray() if hasattr(expected, 'toarray') else expected
+                what = 'transform'
+            diff = np.max(np.abs(np.asarray(expected, dtype=np.float64) - got))
+            report(source_path, diff == 0, f"{len(records):,} training records, {what} max |diff| {diff:.2e}")
+        else:
+            X = TRAINING_INPUTS[food](predictions)
+            mismatches = int(np.sum(np.asarray(original.predict(X)) != portable.predict(X)))
+            diff = np.max(np.abs(np.asarray(original.predict_proba(X), dtype=np.float64) - portable.predict_proba(X)))
+            # The binary sigmoid can differ from XGBoost's expf in the last float32 bit (see tree_compiler.py)
+            ok = mismatches == 0 and diff <= (1e-6 if portable.objective == 'binary:logistic' else 0.0)
+            report(source_path, ok, f"{X.shape[0]:,} training rows, {mismatches} label mismatches, max |proba diff| {diff:.2e}")
+    return failures
+
+
+def training_frame(predictions, food):
+    """Raw training records for the ColumnTransformer inputs (dal's are drawn like its notebook did)."""
+    import pandas as pd
+    if food == 'roti':
+        from dataset_cache import read_dataset
+        return read_dataset(os.path.join('ML', 'roti', 'roti_spoilage_dataset.csv'))[predictions.ROTI_REQUIRED_FIELDS]
+    encoder = predictions.models.get('dal', wait=True)['preprocessor'].named_transformers_['cat']
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({column: rng.choice(categories, 5000) for column, categories
+                       in zip(encoder.feature_names_in_, encoder.categories_)})
+    df['Time_since_preparation_hours'] = rng.uniform(0, 120, 5000)
+    df['Oil_separation'] = rng.uniform(0.0, 1.0, 5000)
+    return df[predictions.DAL_REQUIRED_FIELDS]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Export or verify the portable (numpy-only) models.')
+    parser.add_argument('command', choices=['export', 'verify'])
+    args = parser.parse_args()
+
+    from blueprints import predictions
+    if args.command == 'export':
+        manifest = export_all(export_sources(predictions))
+        for source, entry in sorted(manifest['artifacts'].items()):
+            print(f"✅ {source} -> {entry['file']} ({entry['kind']})")
+        print(f"--- Wrote {MANIFEST_PATH} ({len(manifest['files'])} files) ---")
+        return
+    raise SystemExit(1 if verify(predictions) else 0)
+
+
+if __name__ == '__main__':
+    main()
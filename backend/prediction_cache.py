@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+import numpy as np
+
+# --- Prediction Cache ---
+# Results are cached per food, keyed on the model's input row with every column
+# quantized to the split points the fitted trees actually use. Two inputs that
+# land in the same interval of every column take the same path through every
+# tree, so they get the same prediction. A cache hit is therefore exact, and
+# e.g. 5.2 and 5.9 hours share an entry whenever no split falls between them.
+
+
+class SplitQuantizer:
+    """Maps a model input row to a tuple of per-column interval indices."""
+
+    def __init__(self, thresholds, go_left_on_equal):
+        self.thresholds = [sorted(set(t)) for t in thresholds]
+        # sklearn sends x <= t left, XGBoost sends x < t left
+        self.go_left_on_equal = go_left_on_equal
+        self._bucket = bisect_left if go_left_on_equal else bisect_right
+
+    def bucket(self, column, value):
+        return self._bucket(self.thresholds[column], float(np.float32(value))) if self.thresholds[column] else 0
+
+    @classmethod
+    def from_model(cls, model):
+        # Pipelines: the quantizer works on the final estimator's input
+        if hasattr(model, 'steps'):
+            model = model.steps[-1][1]
+        if hasattr(model, 'split_thresholds'): # tree_compiler.CompiledEnsemble
+            return cls(model.split_thresholds(), go_left_on_equal=model.go_left_on_equal)
+        thresholds = [[] for _ in range(model.n_features_in_)]
+        if hasattr(model, 'get_booster'):
+            dump = json.loads(model.get_booster().save_raw(raw_format='json'))
+            for tree in dump['learner']['gradient_booster']['model']['trees']:
+                for feature, condition, left in zip(tree['split_indices'], tree['split_conditions'], tree['left_children']):
+                    if left != -1: # internal node
+                        thresholds[feature].append(float(np.float32(condition)))
+            return cls(thresholds, go_left_on_equal=False)
+        for estimator in getattr(model, 'estimators_', [model]):
+            tree = estimator.tree_
+            internal = tree.feature >= 0
+            for feature, threshold in zip(tree.feature[internal], tree.threshold[internal]):
+                thresholds[feature].append(float(threshold))
+        return cls(thresholds, go_left_on_equal=True)
+
+    def key(self, row):
+        """Returns the cache key for one input row, or None if it can't be keyed (NaN)."""
+        if hasattr(row, 'toarray'): # one row of a scipy sparse matrix
+            row = row.toarray()
+        # Both sklearn and XGBoost compare features as float32
+        values = np.asarray(row, dtype=np.float32).ravel().tolist()
+        if any(v != v for v in values):
+            return None
+        return tuple(self._bucket(t, v) if t else 0 for t, v in zip(self.thresholds, values))
+
+
+class PredictionCache:
+    """Per-food LRU + TTL cache, cleared automatically when the registry reloads a model."""
+
+    def __init__(self, registry, max_entries=4096, ttl_seconds=3600.0):
+        self.registry = registry
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generations = {}
+        self._stats = {}
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _food(self, food):
+        # Called with the lock held. Drops the food's entries if its model was reloaded.
+        generation = self.registry.generation(food)
+        if food not in self._entries:
+            self._entries[food] = OrderedDict()
+            self._stats[food] = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidations': 0}
+            self._generations[food] = generation
+        elif self._generations[food] != generation:
+            self._entries[food].clear()
+            self._stats[food]['invalidations'] += 1
+            self._generations[food] = generation
+        return self._entries[food], self._stats[food]
+
+    def get(self, food, key):
+        if key is None or not self.enabled:
+            return None
+        with self._lock:
+            entries, stats = self._food(food)
+            hit = entries.get(key)
+            if hit is not None and hit[0] < time.monotonic():
+                del entries[key]
+                stats['expired'] += 1
+                hit = None
+            if hit is None:
+                stats['misses'] += 1
+                return None
+            entries.move_to_end(key)
+            stats['hits'] += 1
+            return hit[1]
+
+    def put(self, food, key, value):
+        if key is None or not self.enabled:
+            return
+        with self._lock:
+            entries, stats = self._food(food)
+            entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                stats['evictions'] += 1
+
+    def clear(self, food=None):
+        with self._lock:
+            for name in ([food] if food else list(self._entries)):
+                if name in self._entries:
+                    self._entries[name].clear()
+
+    def stats(self):
+        with self._lock:
+            report = {}
+            for food, stats in self._stats.items():
+                lookups = stats['hits'] + stats['misses']
+                report[food] = {
+                    **stats,
+                    'size': len(self._entries[food]),
+                    'hit_ratio': round(stats['hits'] / lookups, 4) if lookups else None
+                }
+            return report
@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from log_sink import LogSink, FirestoreBatchWriter, JsonlWriter, MemoryWriter, Sentinel
+
+# --- Shared Services ---
+# Firebase, Gemini, Google Maps and the log sink are built the first time a
+# route needs them, not when app.py is imported, so a worker that only serves
+# some blueprints never imports the other SDKs. Each sits behind a LazyService:
+# concurrent first requests run its factory once and all get the same result.
+# A factory that fails prints its error and leaves the service as None, the
+# same as a missing key did when everything was initialized at import time.
+
+load_dotenv()
+
+# SERVER_PROFILE=inference: predictions blueprint only, served from the portable
+# models (see portable_models.py), without pandas, sklearn/joblib or xgboost.
+SERVER_PROFILE = os.getenv('SERVER_PROFILE', 'full').lower()
+INFERENCE_ONLY = SERVER_PROFILE == 'inference'
+
+
+class LazyService:
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._ready = False
+        self._value = None
+        self.init_seconds = None
+
+    def get(self):
+        """The service, built on first call; None if it isn't configured."""
+        if self._ready:
+            return self._value
+        with self._lock:
+            if not self._ready:
+                start = time.perf_counter()
+                self._value = self.factory()
+                self.init_seconds = time.perf_counter() - start
+                self._ready = True
+        return self._value
+
+    def peek(self):
+        """The service if it has been built already, without building it."""
+        return self._value if self._ready else None
+
+    def set(self, value):
+        """Replaces the service (benchmarks swap in stand-ins this way)."""
+        with self._lock:
+            self._value = value
+            self._ready = True
+
+    def status(self):
+        if not self._ready:
+            return {'state': 'cold'}
+        return {'state': 'ready' if self._value is not None else 'unavailable',
+                'init_seconds': round(self.init_seconds, 4) if self.init_seconds is not None else None}
+
+
+# FIRESTORE_BACKEND, GEMINI_BACKEND and MAPS_BACKEND=fake swap in the offline
+# stand-ins from stubs/; FAKE_LATENCY_SECONDS gives each of their calls a
+# simulated round trip (e.g. for the load tests in benchmarks/).
+FIRESTORE_BACKEND = os.getenv('FIRESTORE_BACKEND', 'firestore').lower()
+FAKE_LATENCY_SECONDS = float(os.getenv('FAKE_LATENCY_SECONDS', '0'))
+
+# --- Firebase ---
+def init_firebase():
+    try:
+        if FIRESTORE_BACKEND == 'fake':
+            from stubs.firestore import FakeFirestore
+            print("--- Using fake Firestore backend ---")
+            return FakeFirestore(latency=FAKE_LATENCY_SECONDS)
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        cred = credentials.Certificate("serviceAccountKey.json")
+        firebase_admin.initialize_app(cred)
+        db = firestore.client()
+        print("--- Firebase Admin SDK initialized successfully ---")
+        return db
+    except Exception as e:
+        print(f"❌ Error initializing Firebase: {e}")
+        return None
+
+def init_firebase_async():
+    """Firestore's AsyncClient on the same Firebase app, for the async routes (asgi.py)."""
+    db = firebase.get()
+    if db is None:
+        return None
+    if FIRESTORE_BACKEND == 'fake':
+        return db.async_client()
+    try:
+        from firebase_admin import firestore_async
+        return firestore_async.client()
+    except Exception as e:
+        print(f"❌ Error initializing async Firestore client: {e}")
+        return None
+
+# --- Gemini ---
+# Sessions have send_message_async too, which the async chat route awaits.
+GEMINI_MODEL_NAME = 'gemini-2.5-flash'
+
+def init_gemini():
+    """Returns make_chat_model(system_instruction=None), or None if Gemini isn't configured."""
+    try:
+        if os.getenv('GEMINI_BACKEND', 'gemini').lower() == 'fake':
+            from stubs.gemini import FakeGenerativeModel
+            make_chat_model = lambda system_instruction=None: FakeGenerativeModel(GEMINI_MODEL_NAME, system_instruction=system_instruction, latency=FAKE_LATENCY_SECONDS)
+            print("--- Using fake Gemini backend ---")
+        else:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key: raise ValueError("GEMINI_API_KEY not found in .env file.")
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            make_chat_model = lambda system_instruction=None: genai.GenerativeModel(GEMINI_MODEL_NAME, system_instruction=system_instruction)
+            print("✅ Gemini API configured successfully.")
+        make_chat_model() # fail here, not on the first chat message
+        return make_chat_model
+    except Exception as e:
+        print(f"❌ Error configuring Gemini API: {e}")
+        return None
+
+# --- Google Maps ---
+def init_maps():
+    try:
+        if os.getenv('MAPS_BACKEND', 'google').lower() == 'fake':
+            from stubs.maps import FakeMapsClient
+            print("--- Using fake Google Maps backend ---")
+            return FakeMapsClient(latency=FAKE_LATENCY_SECONDS)
+        gmaps_api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        if not gmaps_api_key: raise ValueError("GOOGLE_MAPS_API_KEY not found in .env file.")
+        import googlemaps
+        gmaps = googlemaps.Client(key=gmaps_api_key)
+        print("✅ Google Maps client initialized successfully.")
+        return gmaps
+    except Exception as e:
+        print(f"❌ Error initializing Google Maps client: {e}")
+        return None
+
+def init_maps_async():
+    """Awaitable places_nearby over httpx (see maps_async.py), for the async routes."""
+    try:
+        if os.getenv('MAPS_BACKEND', 'google').lower() == 'fake':
+            from stubs.maps import FakeAsyncMapsClient
+            print("--- Using fake async Google Maps backend ---")
+            return FakeAsyncMapsClient(latency=FAKE_LATENCY_SECONDS)
+        gmaps_api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        if not gmaps_api_key: raise ValueError("GOOGLE_MAPS_API_KEY not found in .env file.")
+        from maps_async import AsyncMapsClient
+        print("✅ Async Google Maps client initialized successfully.")
+        return AsyncMapsClient(gmaps_api_key)
+    except Exception as e:
+        print(f"❌ Error initializing async Google Maps client: {e}")
+        return None
+
+firebase = LazyService('firebase', init_firebase)
+firebase_async = LazyService('firebase (async)', init_firebase_async)
+gemini = LazyService('gemini', init_gemini)
+maps = LazyService('maps', init_maps)
+maps_async = LazyService('maps (async)', init_maps_async)
+
+# --- Log Sink ---
+# Prediction and chat logs are queued and written in batches off the request
+# path. LOG_SINK=firestore (default), jsonl (writes to LOG_SINK_PATH, for
+# offline runs), memory, or off.
+def make_log_sink():
+    kind = os.getenv('LOG_SINK', 'firestore').lower()
+    if kind == 'firestore' and firebase.get():
+        writer = FirestoreBatchWriter(firebase.get())
+    elif kind == 'jsonl':
+        writer = JsonlWriter(os.getenv('LOG_SINK_PATH', os.path.join('logs', 'logs.jsonl')))
+    elif kind == 'memory':
+        writer = MemoryWriter()
+    else:
+        return None
+    print(f"--- Log sink ready ({kind}) ---")
+    return LogSink(
+        writer,
+        max_queue=int(os.getenv('LOG_SINK_QUEUE_SIZE', 10000)),
+        flush_interval=float(os.getenv('LOG_SINK_FLUSH_SECONDS', 1.0))
+    )
+
+log_sink = LazyService('log sink', make_log_sink)
+
+_local_timestamp = Sentinel()
+
+def server_timestamp():
+    """firestore.SERVER_TIMESTAMP once Firebase is up; otherwise a Sentinel the log sink stamps with the local time."""
+    if firebase.peek() is not None and FIRESTORE_BACKEND != 'fake':
+        from firebase_admin import firestore
+        return firestore.SERVER_TIMESTAMP
+    return _local_timestamp
+
+def is_already_exists(error):
+    """Whether a Firestore create() failed because the document exists (409 Conflict / AlreadyExists)."""
+    return getattr(error, 'code', None) == 409
+
+
+def status():
+    return {service.name: service.status() for service in (firebase, firebase_async, gemini, maps, maps_async, log_sink)}
@@ -0,0 +1,166 @@
+import threading
+import time
+from array import array
+
+import numpy as np
+
+# --- Stage Metrics ---
+# Each predict route takes a timer for its food and marks the end of each
+# stage as it goes (parse, validate, frame, scale, cache, predict, log,
+# respond). done(outcome) closes the request, recording its total time and
+# how it was answered: rule (a validation or food-safety short-circuit),
+# cache, model, or error.
+# The hot path does as little as possible: mark() reads the clock and appends
+# the stage's duration to a per-(food, stage) array('q'), which is atomic
+# under the GIL, so no lock is taken. Durations are folded into fixed-bucket
+# histograms with NumPy every FOLD_EVERY requests of a food, and before every
+# read. render() writes everything in the Prometheus text format for
+# GET /metrics. Histograms are per process, so with several gunicorn workers
+# each worker reports its own.
+
+# Bucket upper bounds in nanoseconds, from 5 us to 1 s
+BUCKETS_NS = np.array([5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000,
+                       1_000_000, 2_500_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000,
+                       100_000_000, 250_000_000, 500_000_000, 1_000_000_000], dtype=np.int64)
+FOLD_EVERY = 4096
+_clock = time.perf_counter_ns
+
+
+class _Food:
+    def __init__(self):
+        self.durations = {} # stage -> array('q') of ns not folded yet
+        self.outcomes = {} # outcome -> array('b'), one entry per request not folded yet
+        self.histograms = {} # stage -> (counts[len(BUCKETS_NS) + 1], sum_ns); the last count is +Inf
+        self.outcome_counts = {}
+
+
+def _pending(arrays, name, typecode):
+    # The first use of a stage or outcome; setdefault keeps one array if two threads race here
+    return arrays.setdefault(name, array(typecode))
+
+
+class RequestTimer:
+    __slots__ = ('metrics', 'food', '_entry', '_durations', '_start', '_last')
+
+    def __init__(self, metrics, food):
+        self.metrics = metrics
+        self.food = food
+        self._entry = metrics._food(food)
+        self._durations = self._entry.durations
+        self._start = self._last = _clock()
+
+    def mark(self, stage):
+        """Ends `stage`: the time since the previous mark (or the start) is its duration."""
+        now = _clock()
+        try:
+            self._durations[stage].append(now - self._last)
+        except KeyError:
+            _pending(self._durations, stage, 'q').append(now - self._last)
+        self._last = now
+
+    def done(self, outcome):
+        totals = self._durations.get('total')
+        if totals is None:
+            totals = _pending(self._durations, 'total', 'q')
+        totals.append(self._last - self._start)
+        counter = self._entry.outcomes.get(outcome)
+        if counter is None:
+            counter = _pending(self._entry.outcomes, outcome, 'b')
+        counter.append(1)
+        if len(totals) >= FOLD_EVERY:
+            self.metrics._fold(self.food)
+
+
+class _NullTimer:
+    """What timer() returns with metrics off: every call is a no-op."""
+    def mark(self, stage):
+        pass
+
+    def done(self, outcome):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class StageMetrics:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._foods = {}
+
+    def timer(self, food):
+        return RequestTimer(self, food) if self.enabled else NULL_TIMER
+
+    def _food(self, food):
+        entry = self._foods.get(food)
+        if entry is None:
+            entry = self._foods.setdefault(food, _Food())
+        return entry
+
+    def _fold(self, food):
+        with self._lock:
+            entry = self._foods[food]
+            for stage, pending in list(entry.durations.items()):
+                n = len(pending)
+                if not n:
+                    continue
+                # Copy, then drop, the first n: appends racing with this land after them and are kept
+                chunk = np.frombuffer(pending[:n], dtype=np.int64)
+                del pending[:n]
+                counts, sum_ns = entry.histograms.get(stage, (np.zeros(len(BUCKETS_NS) + 1, dtype=np.int64), 0))
+                counts += np.bincount(np.searchsorted(BUCKETS_NS, chunk, side='left'), minlength=len(counts))
+                entry.histograms[stage] = (counts, sum_ns + int(chunk.sum()))
+            for outcome, pending in list(entry.outcomes.items()):
+                n = len(pending)
+                del pending[:n]
+                entry.outcome_counts[outcome] = entry.outcome_counts.get(outcome, 0) + n
+
+    def _snapshot(self):
+        for food in list(self._foods):
+            self._fold(food)
+        with self._lock:
+            return {food: ({stage: (counts.tolist(), sum_ns) for stage, (counts, sum_ns) in entry.histograms.items()},
+                           dict(entry.outcome_counts))
+                    for food, entry in self._foods.items()}
+
+    def clear(self):
+        with self._lock:
+            self._foods.clear()
+
+    def stats(self):
+        """{food: {'outcomes': {...}, 'stages': {stage: {'count', 'mean_ms'}}}}"""
+        foods = {}
+        for food, (histograms, outcomes) in self._snapshot().items():
+            foods[food] = {'outcomes': outcomes, 'stages': {
+                stage: {'count': sum(counts), 'mean_ms': round(sum_ns / sum(counts) / 1e6, 4) if sum(counts) else None}
+                for stage, (counts, sum_ns) in histograms.items()
+            }}
+        return foods
+
+    def render(self):
+        """All histograms and outcome counters in the Prometheus text exposition format."""
+        snapshot = self._snapshot()
+        lines = [
+            '# HELP prediction_stage_seconds Time spent in each stage of a predict request.',
+            '# TYPE prediction_stage_seconds histogram',
+        ]
+        for food, (histograms, _) in sorted(snapshot.items()):
+            for stage, (counts, sum_ns) in sorted(histograms.items()):
+                labels = f'food="{food}",stage="{stage}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS_NS.tolist(), counts):
+                    cumulative += count
+                    lines.append(f'prediction_stage_seconds_bucket{{{labels},le="{bound / 1e9:g}"}} {cumulative}')
+                cumulative += counts[-1]
+                lines.append(f'prediction_stage_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f'prediction_stage_seconds_sum{{{labels}}} {sum_ns / 1e9:.9f}')
+                lines.append(f'prediction_stage_seconds_count{{{labels}}} {cumulative}')
+        lines += [
+            '# HELP prediction_outcomes_total Predict requests by how they were answered.',
+            '# TYPE prediction_outcomes_total counter',
+        ]
+        for food, (_, outcomes) in sorted(snapshot.items()):
+            for outcome, count in sorted(outcomes.items()):
+                lines.append(f'prediction_outcomes_total{{food="{food}",outcome="{outcome}"}} {count}')
+        return '\n'.join(lines) + '\n'
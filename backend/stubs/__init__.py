@@ -0,0 +1,2 @@
+# Offline stand-ins for the external services app.py talks to. Selected with
+# environment variables (e.g. GEMINI_BACKEND=fake) for local runs and benchmarks.
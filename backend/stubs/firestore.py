@@ -0,0 +1,190 @@
+import asyncio
+import datetime
+import itertools
+import operator
+import threading
+import time
+
+# --- Fake Firestore ---
+# In-memory stand-in for the parts of the Firestore client the routes use:
+# collection(...).document(id).get()/set()/create(), where(...).order_by(...)
+# .limit(...).get()/.stream(), and batch().set()/commit() (the log sink's
+# writer). create() raises AlreadyExists for an existing document, as the real
+# client does. Every call that would be a round trip to Firestore can be given
+# a simulated latency. async_client() returns a view of the same data whose
+# calls are awaitable, like firebase_admin.firestore_async.client().
+
+_OPERATORS = {
+    '==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge, 'in': lambda a, b: a in b
+}
+_auto_ids = itertools.count(1)
+
+
+class AlreadyExists(Exception):
+    """What create() raises for an existing document; google.api_core's AlreadyExists is a 409 too."""
+    code = 409
+
+
+def _stamp(data):
+    # firestore.SERVER_TIMESTAMP (and log_sink.Sentinel) become the current time, as the server would do
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return {k: now if type(v).__name__ == 'Sentinel' else v for k, v in data.items()}
+
+
+class _Store:
+    def __init__(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.collections = {} # name -> {doc_id: dict}
+        self.calls = 0
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _Ref:
+    def __init__(self, store, asynchronous):
+        self._store = store
+        self._async = asynchronous
+
+    def _rpc(self, fn):
+        """Runs fn() as one round trip: after a sleep, or as a coroutine on the async client."""
+        with self._store.lock:
+            self._store.calls += 1
+        if self._async:
+            async def call():
+                if self._store.latency:
+                    await asyncio.sleep(self._store.latency)
+                return fn()
+            return call()
+        if self._store.latency:
+            time.sleep(self._store.latency)
+        return fn()
+
+
+class FakeDocumentReference(_Ref):
+    def __init__(self, store, asynchronous, collection, doc_id):
+        super().__init__(store, asynchronous)
+        self.collection_name = collection
+        self.id = doc_id
+
+    def get(self):
+        def read():
+            with self._store.lock:
+                return FakeSnapshot(self.id, self._store.collections.get(self.collection_name, {}).get(self.id))
+        return self._rpc(read)
+
+    def set(self, data, merge=False):
+        return self._rpc(lambda: self._write(data, merge))
+
+    def create(self, data):
+        def write():
+            with self._store.lock:
+                docs = self._store.collections.setdefault(self.collection_name, {})
+                if self.id in docs:
+                    raise AlreadyExists(f'Document already exists: {self.collection_name}/{self.id}')
+                docs[self.id] = _stamp(data)
+        return self._rpc(write)
+
+    def _write(self, data, merge=False):
+        with self._store.lock:
+            docs = self._store.collections.setdefault(self.collection_name, {})
+            docs[self.id] = {**docs.get(self.id, {}), **_stamp(data)} if merge else _stamp(data)
+
+
+class FakeQuery(_Ref):
+    def __init__(self, store, asynchronous, collection, filters=(), order=None, limit=None):
+        super().__init__(store, asynchronous)
+        self.collection_name = collection
+        self._filters = filters
+        self._order = order
+        self._limit = limit
+
+    def _derive(self, **changes):
+        args = {'filters': self._filters, 'order': self._order, 'limit': self._limit, **changes}
+        return FakeQuery(self._store, self._async, self.collection_name, **args)
+
+    def where(self, field, op, value):
+        return self._derive(filters=self._filters + ((field, _OPERATORS[op], value),))
+
+    def order_by(self, field, direction='ASCENDING'):
+        return self._derive(order=(field, direction))
+
+    def limit(self, count):
+        return self._derive(limit=count)
+
+    def _run(self):
+        with self._store.lock:
+            docs = list(self._store.collections.get(self.collection_name, {}).items())
+        found = [(doc_id, data) for doc_id, data in docs
+                 if all(field in data and op(data[field], value) for field, op, value in self._filters)]
+        if self._order:
+            field, direction = self._order
+            found = [d for d in found if field in d[1]]
+            found.sort(key=lambda d: d[1][field], reverse=direction == 'DESCENDING')
+        if self._limit is not None:
+            found = found[:self._limit]
+        return [FakeSnapshot(doc_id, dict(data)) for doc_id, data in found]
+
+    def get(self):
+        return self._rpc(self._run)
+
+    def stream(self):
+        if not self._async:
+            return iter(self._rpc(self._run))
+        async def results():
+            for snapshot in await self._rpc(self._run):
+                yield snapshot
+        return results()
+
+
+class FakeCollectionReference(FakeQuery):
+    def document(self, doc_id=None):
+        return FakeDocumentReference(self._store, self._async, self.collection_name, doc_id or f'auto-{next(_auto_ids)}')
+
+
+class FakeWriteBatch(_Ref):
+    def __init__(self, store, asynchronous):
+        super().__init__(store, asynchronous)
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append((reference, data, merge))
+
+    def commit(self):
+        def apply():
+            for reference, data, merge in self._writes:
+                reference._write(data, merge)
+            self._writes = []
+        return self._rpc(apply)
+
+
+class FakeFirestore:
+    def __init__(self, latency=0.0, _store=None, _async=False):
+        self._store = _store or _Store(latency)
+        self._async = _async
+
+    def collection(self, name):
+        return FakeCollectionReference(self._store, self._async, name)
+
+    def batch(self):
+        return FakeWriteBatch(self._store, self._async)
+
+    def async_client(self):
+        """The same data behind awaitable calls."""
+        return FakeFirestore(_store=self._store, _async=True)
+
+    @property
+    def calls(self):
+        return self._store.calls
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import threading
+import time
+
+# --- Fake Gemini ---
+# Mirrors the parts of google.generativeai that /api/chat uses:
+# GenerativeModel(name, system_instruction=...).start_chat(history=...) and
+# ChatSession.send_message(text[, stream=True]), whose response (or each
+# streamed chunk) has .text. Replies are a canned JSON block in the
+# shape the chat prompt asks for. Every request records how much prompt it
+# carried (system instruction + history + new message), which is what the
+# real API is billed and timed on. send_message_async is the awaitable twin
+# (the async /api/chat route uses it); its simulated delays don't block the loop.
+
+
+def _text(message):
+    if isinstance(message, dict):
+        return ' '.join(str(p) for p in message.get('parts', []))
+    return str(message)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeChatSession:
+    def __init__(self, model, history=None):
+        self.model = model
+        self.history = list(history or [])
+
+    def _prepare(self, content):
+        """(message, reply text, reply chunks, time to first token) for one send."""
+        message = _text(content)
+        prompt = [self.model.system_instruction or ''] + [_text(h) for h in self.history] + [message]
+        prompt_chars = sum(len(p) for p in prompt)
+        self.model._record(prompt)
+        text = self.model.reply(message)
+        chunks = [text[i:i + self.model.chunk_chars] for i in range(0, len(text), self.model.chunk_chars)]
+        return message, text, chunks, self.model.latency + self.model.latency_per_kchar * prompt_chars / 1000.0
+
+    def send_message(self, content, stream=False, **kwargs):
+        message, text, chunks, first_token = self._prepare(content)
+        if first_token:
+            time.sleep(first_token)
+        if stream:
+            return self._stream(message, text, chunks)
+        if self.model.chunk_delay:
+            time.sleep(self.model.chunk_delay * len(chunks))
+        self._append(message, text)
+        return FakeResponse(text)
+
+    def _stream(self, message, text, chunks):
+        for chunk in chunks:
+            if self.model.chunk_delay:
+                time.sleep(self.model.chunk_delay)
+            yield FakeResponse(chunk)
+        # Like the real ChatSession, the turn joins the history once the stream is consumed
+        self._append(message, text)
+
+    async def send_message_async(self, content, stream=False, **kwargs):
+        message, text, chunks, first_token = self._prepare(content)
+        if first_token:
+            await asyncio.sleep(first_token)
+        if stream:
+            return self._stream_async(message, text, chunks)
+        if self.model.chunk_delay:
+            await asyncio.sleep(self.model.chunk_delay * len(chunks))
+        self._append(message, text)
+        return FakeResponse(text)
+
+    async def _stream_async(self, message, text, chunks):
+        for chunk in chunks:
+            if self.model.chunk_delay:
+                await asyncio.sleep(self.model.chunk_delay)
+            yield FakeResponse(chunk)
+        self._append(message, text)
+
+    def _append(self, message, text):
+        self.history.append({'role': 'user', 'parts': [message]})
+        self.history.append({'role': 'model', 'parts': [text]})
+
+
+def default_reply(message):
+    body = {'replyText': f"(fake) You said: {message[:80]}", 'recipes': [], 'safetyTips': [], 'command': None}
+    return "```json\n" + json.dumps(body) + "\n```"
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name='fake-gemini', system_instruction=None, reply=None,
+                 latency_per_kchar=0.0, chunk_chars=24, chunk_delay=0.0, latency=0.0):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.reply = reply or default_reply
+        self.latency = latency # simulated round trip before the first token, whatever the prompt size
+        self.latency_per_kchar = latency_per_kchar # simulated time-to-first-token per 1000 prompt chars
+        self.chunk_chars = chunk_chars # size of each streamed chunk
+        self.chunk_delay = chunk_delay # simulated generation time per chunk
+        self.requests = [] # prompt parts (system instruction, history..., message) per send_message
+        self._lock = threading.Lock()
+
+    def start_chat(self, history=None):
+        return FakeChatSession(self, history)
+
+    def _record(self, prompt):
+        with self._lock:
+            self.requests.append(prompt)
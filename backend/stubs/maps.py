@@ -0,0 +1,76 @@
+import asyncio
+import math
+import random
+import threading
+import time
+
+# --- Fake Google Maps ---
+# Stand-in for googlemaps.Client.places_nearby over a fixed set of synthetic
+# NGOs scattered around a few city centres. Like the real Places API, a call
+# returns at most 20 results (ranked by a per-place "prominence"), and each
+# call can be given a simulated round-trip time. FakeAsyncMapsClient serves
+# the same places behind an awaitable places_nearby, like maps_async.AsyncMapsClient.
+
+CITY_CENTRES = {
+    'Mumbai': (19.0760, 72.8777),
+    'Pune': (18.5204, 73.8567),
+    'Delhi': (28.6139, 77.2090),
+    'Bengaluru': (12.9716, 77.5946)
+}
+MAX_RESULTS = 20
+
+
+def _distance_m(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371008.8 * math.asin(min(1.0, math.sqrt(a)))
+
+
+class FakeMapsClient:
+    def __init__(self, places_per_city=400, spread_km=25.0, latency=0.0, seed=0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        rng = random.Random(seed)
+        self.places = []
+        for city, (lat, lng) in CITY_CENTRES.items():
+            for i in range(places_per_city):
+                # Denser towards the centre, like real cities
+                r = spread_km * 1000 * rng.random() ** 1.5
+                theta = rng.uniform(0, 2 * math.pi)
+                p_lat = lat + (r * math.cos(theta)) / 111320.0
+                p_lng = lng + (r * math.sin(theta)) / (111320.0 * math.cos(math.radians(lat)))
+                self.places.append({
+                    'place_id': f'fake-{city.lower()}-{i}',
+                    'name': f'{city} Food Bank {i}',
+                    'vicinity': f'{i} Example Road, {city}',
+                    'geometry': {'location': {'lat': p_lat, 'lng': p_lng}},
+                    'prominence': rng.random()
+                })
+
+    def places_nearby(self, location=None, radius=None, keyword=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.search(location, radius)
+
+    def search(self, location, radius):
+        lat, lng = location
+        inside = [p for p in self.places
+                  if _distance_m(lat, lng, p['geometry']['location']['lat'], p['geometry']['location']['lng']) <= radius]
+        inside.sort(key=lambda p: -p['prominence'])
+        return {'results': [{k: v for k, v in p.items() if k != 'prominence'} for p in inside[:MAX_RESULTS]], 'status': 'OK'}
+
+
+class FakeAsyncMapsClient:
+    def __init__(self, client=None, **kwargs):
+        self.client = client or FakeMapsClient(**kwargs)
+
+    async def places_nearby(self, location=None, radius=None, keyword=None, **kwargs):
+        with self.client._lock:
+            self.client.calls += 1
+        if self.client.latency:
+            await asyncio.sleep(self.client.latency)
+        return self.client.search(location, radius)
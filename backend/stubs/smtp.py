@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import socket
+import threading
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+logging.getLogger('mail.log').setLevel(logging.ERROR) # aiosmtpd warns about its own legacy login_data on every AUTH
+
+# --- Local SMTP Stand-in ---
+# A plain-SMTP server (aiosmtpd) on localhost that accepts any login and keeps
+# the messages it receives, for running /api/notify-ngo without a mail
+# provider: point SMTP_HOST / SMTP_PORT at it with SMTP_SSL=0. Each message
+# can be given a simulated delivery time, and each connection a simulated
+# setup time (the TLS handshake and login of a real provider). fail_next(n)
+# makes the next n messages get a temporary 421 error, or drop the connection.
+#
+#     with FakeSmtpServer(delay=0.2) as smtp:
+#         ... # SMTP_HOST=127.0.0.1 SMTP_PORT=<smtp.port> SMTP_SSL=0
+#         smtp.messages
+
+
+class _Handler:
+    def __init__(self, server):
+        self.server = server
+
+    async def handle_EHLO(self, smtp, session, envelope, hostname, responses):
+        with self.server._lock:
+            self.server.connections += 1
+        if self.server.connect_delay:
+            await asyncio.sleep(self.server.connect_delay)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, smtp, session, envelope):
+        if self.server.delay:
+            await asyncio.sleep(self.server.delay)
+        with self.server._lock:
+            if self.server._failures:
+                self.server._failures -= 1
+                if self.server._failure == 'disconnect':
+                    smtp.transport.close()
+                    return '421 Connection dropped'
+                return '421 Service not available, try again later'
+            self.server.messages.append((envelope.mail_from, list(envelope.rcpt_tos), envelope.content))
+        return '250 Message accepted for delivery'
+
+
+class FakeSmtpServer:
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0, connect_delay=0.0):
+        self.host = host
+        self.delay = delay
+        self.connect_delay = connect_delay
+        self.messages = [] # (from, [to], raw message bytes)
+        self.connections = 0
+        self.logins = 0
+        self._failures = 0
+        self._failure = None
+        self._lock = threading.Lock()
+        self._controller = Controller(
+            _Handler(self), hostname=host, port=port or self._free_port(host),
+            authenticator=self._authenticate, auth_require_tls=False
+        )
+
+    @staticmethod
+    def _free_port(host):
+        with socket.socket() as s:
+            s.bind((host, 0))
+            return s.getsockname()[1]
+
+    def _authenticate(self, server, session, envelope, mechanism, auth_data):
+        with self._lock:
+            self.logins += 1
+        return AuthResult(success=True)
+
+    def fail_next(self, n, mode='421'):
+        """The next n messages get a 421 reply (mode='421') or have their connection dropped (mode='disconnect')."""
+        with self._lock:
+            self._failures, self._failure = n, mode
+
+    @property
+    def port(self):
+        return self._controller.port
+
+    def start(self):
+        self._controller.start()
+        return self
+
+    def stop(self):
+        self._controller.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
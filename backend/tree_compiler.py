@@ -0,0 +1,435 @@
+import json
+import os
+
+import numpy as np
+
+from lookup_tables import file_sha256
+
+# --- Tree Ensemble Compiler ---
+# Flattens a fitted RandomForestClassifier or XGBClassifier into one set of
+# contiguous node arrays shared by all of its trees:
+#   feature, threshold   the split at each internal node
+#   children             (n_nodes, 2) node index of the left / right child
+#   default_left         where a NaN goes at each node
+#   value                leaf output (class fractions for a forest, the leaf
+#                        weight for XGBoost)
+#   roots                first node of each tree
+# Leaves point back at themselves, so the evaluator can step every tree of
+# every row together for max_depth steps with plain NumPy gathers, instead of
+# going through sklearn/xgboost input validation and thread pools per call.
+#
+# The arithmetic follows the libraries, so predictions are identical (the
+# binary sigmoid to within one float32 rounding of exp):
+#   - forest: float32 input compared with x <= threshold (float64), per-tree
+#     fractions summed in tree order and divided by the number of trees;
+#   - XGBoost: float32 compare x < threshold, leaf weights summed in float32
+#     in tree order from the base margin, then softmax (scipy's formula) or
+#     sigmoid.
+# Only numpy is needed at serving time.
+#
+#   python tree_compiler.py compile [foods]   # writes ML/<food>/<food>_compiled.npz
+#   python tree_compiler.py verify  [foods]   # compiled vs pickled model on the training CSV
+
+COMPILED_FOODS = ('rice', 'milk', 'paneer', 'roti', 'dal')
+APPLY_CHUNK_ROWS = 128
+
+
+def _flatten(trees):
+    """trees: list of (feature, threshold, left, right, default_left, value) per tree, -1 children at leaves."""
+    sizes = [len(t[0]) for t in trees]
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+    feature, threshold, children, default_left, value = [], [], [], [], []
+    for root, (feat, thr, left, right, dleft, val) in zip(roots, trees):
+        leaf = left < 0
+        own = np.arange(len(feat), dtype=np.int32) + root
+        # Leaves loop back on themselves so extra steps are no-ops
+        children.append(np.column_stack([np.where(leaf, own, left + root), np.where(leaf, own, right + root)]))
+        feature.append(np.where(leaf, 0, feat))
+        threshold.append(np.where(leaf, 0, thr))
+        default_left.append(np.where(leaf, True, dleft))
+        value.append(val)
+    return (np.concatenate(feature).astype(np.int32), np.concatenate(threshold),
+            np.concatenate(children).astype(np.int32), np.concatenate(default_left).astype(bool),
+            np.concatenate(value), roots)
+
+
+def _max_depth(children, roots):
+    depth, nodes = 0, roots
+    while True:
+        internal = children[nodes, 0] != nodes
+        if not internal.any():
+            return depth
+        nodes = children[nodes[internal]].ravel()
+        depth += 1
+
+
+class CompiledEnsemble:
+    """A flattened tree ensemble with the predict / predict_proba interface the routes use."""
+
+    def __init__(self, kind, feature, threshold, children, default_left, value, roots, max_depth,
+                 classes, feature_names=None, objective=None, tree_group=None, base_margin=None,
+                 source_sha256=None):
+        self.kind = kind # 'forest' or 'xgboost'
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = None
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.objective = objective
+        self.tree_group = tree_group
+        self.base_margin = base_margin
+        self.source_sha256 = source_sha256
+        # sklearn sends x <= t left, XGBoost sends x < t left
+        self.go_left_on_equal = kind == 'forest'
+        self._feature = feature.astype(np.intp)
+        self._children = children.astype(np.intp).ravel() # left, right, left, right, ...
+        self._roots = roots.astype(np.intp)
+        if kind == 'xgboost':
+            # Column indices of each output group's trees, in tree order
+            self._groups = [np.flatnonzero(tree_group == g) for g in range(len(base_margin))]
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    # --- Export ---
+
+    @classmethod
+    def from_model(cls, model, source_path=None):
+        if hasattr(model, 'steps'): # Pipelines: compile the final estimator
+            model = model.steps[-1][1]
+        source_sha256 = file_sha256(source_path) if source_path else None
+        feature_names = getattr(model, 'feature_names_in_', None)
+        if hasattr(model, 'get_booster'):
+            compiled = cls._from_xgboost(model, feature_names, source_sha256)
+        else:
+            compiled = cls._from_forest(model, feature_names, source_sha256)
+        compiled.n_features_in_ = int(model.n_features_in_)
+        return compiled
+
+    @classmethod
+    def _from_forest(cls, model, feature_names, source_sha256):
+        n_classes = len(model.classes_)
+        trees = []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+            # tree_.value already holds per-leaf class fractions, exactly what the tree's predict_proba returns
+            trees.append((tree.feature, tree.threshold, tree.children_left, tree.children_right,
+                          missing_left.astype(bool), np.asarray(tree.value[:, 0, :n_classes], dtype=np.float64)))
+        feature, threshold, children, default_left, value, roots = _flatten(trees)
+        return cls('forest', feature, threshold.astype(np.float64), children, default_left, value, roots,
+                   _max_depth(children, roots), model.classes_, feature_names, source_sha256=source_sha256)
+
+    @classmethod
+    def _from_xgboost(cls, model, feature_names, source_sha256):
+        learner = json.loads(model.get_booster().save_raw(raw_format='json'))['learner']
+        objective = learner['objective']['name']
+        if objective not in ('binary:logistic', 'multi:softmax', 'multi:softprob'):
+            raise ValueError(f"Unsupported XGBoost objective '{objective}'.")
+        booster = learner['gradient_booster']
+        if booster['name'] != 'gbtree':
+            raise ValueError(f"Unsupported XGBoost booster '{booster['name']}'.")
+        trees = []
+        for tree in booster['model']['trees']:
+            if tree.get('categories_nodes'):
+                raise ValueError("Categorical splits are not supported.")
+            left = np.asarray(tree['left_children'], dtype=np.int64)
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            # split_conditions holds the threshold at internal nodes and the leaf weight at leaves
+            trees.append((np.asarray(tree['split_indices']), conditions, left,
+                          np.asarray(tree['right_children'], dtype=np.int64),
+                          np.asarray(tree['default_left'], dtype=bool), conditions))
+        feature, threshold, children, default_left, value, roots = _flatten(trees)
+        base_score = json.loads(learner['learner_model_param']['base_score'].replace('E', 'e'))
+        base_score = np.atleast_1d(np.asarray(base_score, dtype=np.float32))
+        if objective == 'binary:logistic':
+            # base_score is a probability; the trees add to its logit, which
+            # XGBoost computes in float32 as -log(1 / p - 1)
+            base_margin = -np.log(np.float32(1) / base_score - np.float32(1))
+        else:
+            base_margin = base_score
+        n_groups = max(1, int(learner['learner_model_param']['num_class']))
+        if len(base_margin) != n_groups: # older models store one scalar intercept
+            base_margin = np.full(n_groups, base_margin[0], dtype=np.float32)
+        tree_group = np.asarray(booster['model']['tree_info'], dtype=np.int32)
+        return cls('xgboost', feature, threshold.astype(np.float32), children, default_left,
+                   value.astype(np.float32), roots, _max_depth(children, roots), model.classes_,
+                   feature_names, objective=objective, tree_group=tree_group, base_margin=base_margin,
+                   source_sha256=source_sha256)
+
+    # --- Evaluation ---
+
+    def _as_matrix(self, X):
+        if hasattr(X, 'columns') and self.feature_names is not None and list(X.columns) != self.feature_names:
+            raise ValueError("Input columns don't match the features the model was trained on.")
+        if hasattr(X, 'toarray'): # scipy sparse (e.g. one-hot encoder output)
+            X = X.toarray()
+        # Both sklearn and XGBoost compare features as float32
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.n_features_in_ is not None and X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features_in_}.")
+        return X
+
+    def apply(self, X):
+        """Leaf index of every tree for every row, shape (n_rows, n_trees)."""
+        X = self._as_matrix(X)
+        if len(X) <= APPLY_CHUNK_ROWS:
+            return self._apply(X)
+        # Big batches go in slices, so the per-step index arrays stay in cache
+        return np.concatenate([self._apply(X[i:i + APPLY_CHUNK_ROWS]) for i in range(0, len(X), APPLY_CHUNK_ROWS)])
+
+    def _apply(self, X):
+        n_rows, n_features = X.shape
+        # Flat take() on 1-d arrays is much cheaper than 2-d fancy indexing
+        X_flat = X.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        nodes = np.repeat(self._roots[None, :], n_rows, axis=0)
+        has_nan = bool(np.isnan(X_flat).any())
+        for _ in range(self.max_depth):
+            x = X_flat.take(self._feature.take(nodes) + row_offset)
+            threshold = self.threshold.take(nodes)
+            go_right = x > threshold if self.go_left_on_equal else x >= threshold
+            if has_nan:
+                go_right = np.where(np.isnan(x), ~self.default_left.take(nodes), go_right)
+            nodes = self._children.take(2 * nodes + go_right)
+        return nodes
+
+    def decision_function(self, X):
+        """XGBoost only: raw margin per output group, shape (n_rows, n_groups), float32."""
+        leaves = self.value[self.apply(X)]
+        margins = np.empty((len(leaves), len(self._groups)), dtype=np.float32)
+        for g, columns in enumerate(self._groups):
+            # float32, tree by tree, starting from the base margin
+            terms = np.concatenate([np.full((len(leaves), 1), self.base_margin[g], dtype=np.float32), leaves[:, columns]], axis=1)
+            margins[:, g] = np.cumsum(terms, axis=1, dtype=np.float32)[:, -1]
+        return margins
+
+    def predict_proba(self, X):
+        if self.kind == 'forest':
+            leaves = self.value[self.apply(X)] # (n_rows, n_trees, n_classes)
+            # Summed in tree order like sklearn's accumulator (cumsum is sequential), then averaged
+            proba = np.cumsum(leaves, axis=1)[:, -1]
+            proba /= self.n_trees
+            return proba
+        margins = self.decision_function(X)
+        if self.objective == 'binary:logistic':
+            # XGBoost's Sigmoid(): 1 / (expf(min(-x, 88.7)) + 1), exp taken in float64 and rounded like expf
+            x = np.minimum(-margins[:, 0], np.float32(88.7))
+            p = np.float32(1) / (np.exp(x.astype(np.float64)).astype(np.float32) + np.float32(1))
+            return np.vstack((1.0 - p, p)).transpose()
+        # multi:softmax / multi:softprob: scipy.special.softmax, as XGBClassifier.predict_proba uses
+        shifted = np.exp(margins - np.amax(margins, axis=1, keepdims=True))
+        return shifted / np.sum(shifted, axis=1, keepdims=True)
+
+    def predict(self, X):
+        if self.kind == 'forest':
+            return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+        if self.objective == 'binary:logistic':
+            return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+        return self.classes_[np.argmax(self.decision_function(X), axis=1)]
+
+    def split_thresholds(self):
+        """Every split point per input column (what SplitQuantizer buckets on)."""
+        internal = self.children[:, 0] != np.arange(len(self.children))
+        thresholds = [[] for _ in range(self.n_features_in_)]
+        for feature, threshold in zip(self.feature[internal].tolist(), self.threshold[internal].tolist()):
+            thresholds[feature].append(threshold)
+        return thresholds
+
+    # --- Artifacts ---
+
+    def save(self, path):
+        meta = {
+            'kind': self.kind,
+            'max_depth': self.max_depth,
+            'classes': [c.item() if hasattr(c, 'item') else c for c in self.classes_],
+            'n_features_in': self.n_features_in_,
+            'feature_names': self.feature_names,
+            'objective': self.objective,
+            'source_sha256': self.source_sha256
+        }
+        arrays = {
+            'feature': self.feature, 'threshold': self.threshold, 'children': self.children,
+            'default_left': self.default_left, 'value': self.value, 'roots': self.roots
+        }
+        if self.kind == 'xgboost':
+            arrays.update(tree_group=self.tree_group, base_margin=self.base_margin)
+        np.savez_compressed(path, meta=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            arrays = {name: data[name] for name in data.files if name != 'meta'}
+        compiled = cls(
+            meta['kind'], arrays['feature'], arrays['threshold'], arrays['children'], arrays['default_left'],
+            arrays['value'], arrays['roots'], meta['max_depth'], meta['classes'], meta['feature_names'],
+            objective=meta['objective'], tree_group=arrays.get('tree_group'), base_margin=arrays.get('base_margin'),
+            source_sha256=meta['source_sha256']
+        )
+        compiled.n_features_in_ = meta['n_features_in']
+        return compiled
+
+
+def compiled_path(food):
+    return os.path.join('ML', food, f'{food}_compiled.npz')
+
+
+def load_compiled_model(food, model_path):
+    """Loads a compiled ensemble, or returns None (with a warning) if it is missing or stale."""
+    path = compiled_path(food)
+    if not os.path.exists(path):
+        print(f"Warning: no compiled model for {food}. Run 'python tree_compiler.py compile {food}'. Serving from the pickle.")
+        return None
+    compiled = CompiledEnsemble.load(path)
+    if compiled.source_sha256 != file_sha256(model_path):
+        print(f"Warning: {food} compiled model was built from a different model file. Serving from the pickle.")
+        return None
+    return compiled
+
+
+# --- Training-set verification inputs ---
+# Each returns the model input matrix for the food's training data, built the
+# way the app builds a request's input.
+
+def rice_training_inputs(predictions):
+    from dataset_cache import read_dataset
+    df = read_dataset(os.path.join('ML', 'rice', 'rice_spoilage_dataset.csv'))
+    return predictions.rice_encoder.encode_batch(
+        df['hours_since_cooking'].to_numpy(float), df['initial_hours_at_room_temp'].to_numpy(float),
+        df['observed_smell'].to_numpy(object), df['observed_appearance'].to_numpy(object),
+        df['storage_location'].to_numpy(object), df['cooling_method'].to_numpy(object)
+    )
+
+
+def milk_training_inputs(predictions):
+    import pandas as pd
+    from dataset_cache import read_dataset
+    df = read_dataset(os.path.join('ML', 'milk', 'milk_spoilage_dataset.csv'))
+    rows = [predictions.milk_feature_row(r.days_since_open_or_purchase, r.cumulative_hours_at_room_temp, bool(r.was_boiled),
+                                 r.milk_type, r.storage_location, r.observed_smell, r.observed_consistency)
+            for r in df.itertuples(index=False)]
+    return pd.DataFrame(predictions.scale_milk_rows(np.asarray(rows, dtype=np.float64)), columns=predictions.MILK_MODEL_FEATURES)
+
+
+def paneer_training_inputs(predictions):
+    # The route zeroes the one-hot columns (see encoders.py), so use the
+    # training design matrix itself to exercise every branch of the forest
+    from dataset_cache import load_frame
+    df = load_frame(os.path.join('ML', 'paneer', 'paneer_preprocessed'))
+    return df.reindex(columns=predictions.models.get('paneer', wait=True)['columns'], fill_value=0).to_numpy(dtype=np.float64)
+
+
+def roti_training_inputs(predictions):
+    from dataset_cache import read_dataset
+    df = read_dataset(os.path.join('ML', 'roti', 'roti_spoilage_dataset.csv'))
+    return predictions.models.get('roti', wait=True)['transformer'].transform(df[predictions.ROTI_REQUIRED_FIELDS])
+
+
+def dal_training_inputs(predictions, n_rows=5000):
+    # The dal model was trained on data synthesised in DalSpoilage_V3.ipynb,
+    # not on either CSV in ML/dal. Draw rows the same way: the fitted
+    # encoder's categories, 0-120 hours and 0-1 oil separation.
+    import pandas as pd
+    preprocessor = predictions.models.get('dal', wait=True)['preprocessor']
+    encoder = preprocessor.named_transformers_['cat']
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({column: rng.choice(categories, n_rows) for column, categories
+                       in zip(encoder.feature_names_in_, encoder.categories_)})
+    df['Time_since_preparation_hours'] = rng.uniform(0, 120, n_rows)
+    df['Oil_separation'] = rng.uniform(0.0, 1.0, n_rows)
+    return preprocessor.transform(df[predictions.DAL_REQUIRED_FIELDS])
+
+
+TRAINING_INPUTS = {
+    'rice': rice_training_inputs,
+    'milk': milk_training_inputs,
+    'paneer': paneer_training_inputs,
+    'roti': roti_training_inputs,
+    'dal': dal_training_inputs
+}
+
+
+def threshold_probes(X, compiled, n_rows=2000, seed=0):
+    """Training rows with one column moved exactly onto one of its split points, to check ties."""
+    if hasattr(X, 'toarray'):
+        X = X.toarray()
+    X = np.array(X, dtype=np.float64)
+    thresholds = compiled.split_thresholds()
+    columns = [j for j, t in enumerate(thresholds) if t]
+    rng = np.random.default_rng(seed)
+    probes = X[rng.integers(0, len(X), n_rows)]
+    for row in probes:
+        j = columns[rng.integers(len(columns))]
+        row[j] = thresholds[j][rng.integers(len(thresholds[j]))]
+    return probes
+
+
+def source_model(predictions, food):
+    """The pickled estimator behind a food's compiled model, and the file it came from."""
+    import joblib
+    if food == 'roti':
+        return joblib.load(predictions.roti_model_path)[-1], predictions.roti_model_path
+    if food == 'paneer':
+        with open(predictions.paneer_config_filepath, 'r') as f:
+            path = os.path.join(predictions.paneer_model_dir, json.load(f)['model_file'])
+    else:
+        path = getattr(predictions, f'{food}_model_path')
+    return joblib.load(path), path
+
+
+def compare(model, compiled, X):
+    """(rows, label mismatches, max |proba difference|) of compiled vs model on X."""
+    expected_proba = np.asarray(model.predict_proba(X), dtype=np.float64)
+    got_proba = np.asarray(compiled.predict_proba(X), dtype=np.float64)
+    mismatches = int(np.sum(np.asarray(model.predict(X)) != compiled.predict(X)))
+    return len(expected_proba), mismatches, float(np.max(np.abs(expected_proba - got_proba)))
+
+
+def main():
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description='Compile or verify the flattened tree ensembles.')
+    parser.add_argument('command', choices=['compile', 'verify'])
+    parser.add_argument('foods', nargs='*', default=list(COMPILED_FOODS))
+    args = parser.parse_args()
+
+    from blueprints import predictions
+    failed = False
+    for food in args.foods:
+        model, path = source_model(predictions, food)
+        start = time.perf_counter()
+        if args.command == 'compile':
+            compiled = CompiledEnsemble.from_model(model, source_path=path)
+            compiled.save(compiled_path(food))
+            print(f"✅ {food}: {compiled.n_trees} trees, {len(compiled.feature):,} nodes, depth {compiled.max_depth} "
+                  f"({time.perf_counter() - start:.1f}s) -> {compiled_path(food)}")
+            continue
+        compiled = load_compiled_model(food, path)
+        if compiled is None:
+            failed = True
+            continue
+        X = TRAINING_INPUTS[food](predictions)
+        for label, inputs in (('training rows', X), ('split-point probes', threshold_probes(X, compiled))):
+            if label != 'training rows' and hasattr(X, 'columns'):
+                inputs = type(X)(inputs, columns=X.columns)
+            rows, mismatches, max_diff = compare(model, compiled, inputs)
+            # Everything matches bit for bit except the dal sigmoid, where C's expf and
+            # numpy's exp can round differently in the last float32 bit
+            ok = mismatches == 0 and max_diff <= (0.0 if compiled.objective != 'binary:logistic' else 1e-6)
+            failed |= not ok
+            print(f"{'✅' if ok else '❌'} {food}: {rows:,} {label}, {mismatches} label mismatches, "
+                  f"max |proba diff| {max_diff:.2e}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+
+# --- User Record Cache ---
+# /api/login looks users up here before going to Firestore. A record found in
+# Firestore is kept for ttl_seconds; an email that isn't there is remembered
+# as unknown for negative_ttl_seconds, so repeated attempts with a wrong or
+# mistyped email don't each cost a read. Signup writes the new record through
+# (replacing any "unknown" entry), so a user can log in straight after signing
+# up on the same process; on another process, after at most
+# negative_ttl_seconds. Entries are kept in LRU order up to max_users.
+
+_UNKNOWN = object()
+
+
+class UserCache:
+    def __init__(self, fetch, ttl_seconds=60.0, negative_ttl_seconds=5.0, max_users=10000):
+        """fetch(email) returns the user's record as a dict, or None if there is no such user."""
+        self.fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._users = OrderedDict() # email -> (expires_at, record or _UNKNOWN)
+        self._stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'evictions': 0}
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_users > 0
+
+    def get(self, email):
+        """The user's record, or None if there is no such user."""
+        if not self.enabled:
+            return self.fetch(email)
+        found, record = self._cached(email)
+        if found:
+            return record
+        return self._store(email, self.fetch(email))
+
+    async def get_async(self, email, fetch):
+        """get() for the async auth route, with fetch(email) a coroutine function."""
+        if not self.enabled:
+            return await fetch(email)
+        found, record = self._cached(email)
+        if found:
+            return record
+        return self._store(email, await fetch(email))
+
+    def _cached(self, email):
+        with self._lock:
+            entry = self._users.get(email)
+            if entry is not None and entry[0] > time.monotonic():
+                self._users.move_to_end(email)
+                if entry[1] is _UNKNOWN:
+                    self._stats['negative_hits'] += 1
+                    return True, None
+                self._stats['hits'] += 1
+                return True, dict(entry[1])
+            self._stats['misses'] += 1
+            return False, None
+
+    def _store(self, email, record):
+        if record is None:
+            self._put(email, _UNKNOWN, self.negative_ttl_seconds)
+            return None
+        self._put(email, dict(record), self.ttl_seconds)
+        return record
+
+    def put(self, email, record):
+        """Writes a record through, e.g. right after signup."""
+        if self.enabled:
+            self._put(email, dict(record), self.ttl_seconds)
+
+    def _put(self, email, value, ttl):
+        with self._lock:
+            if ttl <= 0:
+                self._users.pop(email, None)
+                return
+            self._users[email] = (time.monotonic() + ttl, value)
+            self._users.move_to_end(email)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, email):
+        with self._lock:
+            self._users.pop(email, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['negative_hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'users': len(self._users),
+                'capacity': self.max_users,
+                'hit_ratio': round((self._stats['hits'] + self._stats['negative_hits']) / lookups, 4) if lookups else None
+            }